@@ -1,13 +1,32 @@
 from __future__ import annotations
 
-from gymnasium.envs.registration import register
+import importlib
 
-from minigrid import minigrid_env, wrappers
-from minigrid.core import roomgrid
-from minigrid.core.world_object import Wall
+from gymnasium.envs.registration import register
 
 __version__ = "2.2.1"
 
+# Modules and classes available from the package, which are only imported
+# when first accessed to keep `import minigrid` fast. Environment modules
+# are imported by `gym.make` when it resolves their entry point.
+_LAZY_ATTRIBUTES = {
+    "minigrid_env": ("minigrid.minigrid_env", None),
+    "wrappers": ("minigrid.wrappers", None),
+    "roomgrid": ("minigrid.core.roomgrid", None),
+    "Wall": ("minigrid.core.world_object", "Wall"),
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    value = importlib.import_module(module_name)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
 
 try:
     import sys
@@ -21,6 +40,8 @@ except Exception:  # nosec
 
 
 def register_minigrid_envs():
+    from minigrid.core.world_object import Wall
+
     # BlockedUnlockPickup
     # ----------------------------------------
 
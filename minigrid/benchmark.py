@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import subprocess
+import sys
 import time
 
 import gymnasium as gym
@@ -49,6 +51,29 @@ def benchmark(env_id, num_resets, num_frames):
     env.close()
 
 
+def benchmark_import(num_runs, statement="import minigrid"):
+    """
+    Time running a statement, by default importing minigrid, in new
+    interpreters, which short-lived workers pay at every start. This
+    includes importing gymnasium, which also imports minigrid to register
+    its environments.
+    """
+
+    def run(code):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        return time.perf_counter() - t0
+
+    # Subtract the start time of an empty interpreter
+    baseline = sorted(run("pass") for _ in range(num_runs))
+    times = sorted(run(f"import gymnasium; {statement}") for _ in range(num_runs))
+    import_time = 1000 * (times[num_runs // 2] - baseline[num_runs // 2])
+
+    print(f"Import time ({statement}): {import_time:.1f} ms")
+
+    return import_time
+
+
 def benchmark_manual_control(env_id, num_resets, num_frames, tile_size):
     env = gym.make(env_id, tile_size=tile_size)
     env = ManualControl(env, seed=args.seed)
@@ -124,8 +149,17 @@ if __name__ == "__main__":
         "--tile-size", type=int, help="size at which to render tiles", default=32
     )
 
+    parser.add_argument(
+        "--num-imports",
+        type=int,
+        help="number of interpreters to start to benchmark the import time",
+        default=10,
+    )
+
     args = parser.parse_args()
     benchmark(args.env_id, args.num_resets, args.num_frames)
+    benchmark_import(args.num_imports)
+    benchmark_import(args.num_imports, f"gymnasium.make({args.env_id!r})")
 
     benchmark_manual_control(
         args.env_id, args.num_resets, args.num_frames, args.tile_size
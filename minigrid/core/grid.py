@@ -1,29 +1,152 @@
 from __future__ import annotations
 
-import math
-from typing import Any, Callable
+import struct
+from functools import lru_cache
+from typing import Any, Callable, Sequence
 
 import numpy as np
 
-from minigrid.core.constants import OBJECT_TO_IDX, TILE_PIXELS
+from minigrid.core.constants import COLOR_TO_IDX, OBJECT_TO_IDX, TILE_PIXELS
+from minigrid.core.tile_atlas import TileAtlas, TileCache, draw_tile
 from minigrid.core.world_object import Wall, WorldObj
-from minigrid.utils.rendering import (
-    downsample,
-    fill_coords,
-    highlight_img,
-    point_in_rect,
-    point_in_triangle,
-    rotate_fn,
+
+# Encoding of the cells outside of the grid
+WALL_CODE = Wall().encode()
+
+# Kinds of Zobrist keys, so that keys for grid cells, the agent and the
+# object it carries never collide
+ZOBRIST_CELL = 0
+ZOBRIST_AGENT = 1
+ZOBRIST_CARRYING = 2
+
+
+def zobrist_key(index: int, code: tuple[int, int, int], kind: int = ZOBRIST_CELL):
+    """
+    Pseudo-random 64-bit key for an encoded object at a given cell index,
+    computed with the splitmix64 finalizer so that no table is needed
+    """
+
+    x = kind << 56 | int(index) << 24
+    x |= int(code[0]) << 16 | int(code[1]) << 8 | int(code[2])
+    x = (x + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return x ^ (x >> 31)
+
+
+def zobrist_keys(
+    indices: np.ndarray, codes: np.ndarray, kind: int = ZOBRIST_CELL
+) -> np.ndarray:
+    """
+    Vectorized `zobrist_key`, for arrays of cell indices and of the
+    `(n, 3)` encodings of the objects at these cells
+    """
+
+    codes = codes.astype(np.uint64)
+    x = np.uint64(kind << 56) | indices.astype(np.uint64) << np.uint64(24)
+    x |= codes[:, 0] << np.uint64(16) | codes[:, 1] << np.uint64(8) | codes[:, 2]
+    x += np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+# Binary format of `Grid.to_bytes`: a header with the magic bytes, the
+# format version, the size of the grid and the number of object records,
+# followed by the cell encodings and the object records
+GRID_FORMAT_VERSION = 1
+GRID_MAGIC = b"MGgr"
+_GRID_HEADER = struct.Struct("<4sBHHI")
+
+# Record of an object whose state is not entirely held by its encoding,
+# with flags telling which of its positions and contents are set
+OBJECT_RECORD = np.dtype(
+    [
+        ("code", "u1", 3),
+        ("flags", "u1"),
+        ("init_pos", "<i2", 2),
+        ("cur_pos", "<i2", 2),
+    ]
 )
+_HAS_INIT_POS = 1
+_HAS_CUR_POS = 2
+_HAS_CONTAINS = 4
+
+# Object types stored with a record, the objects of the other types are
+# static and shared between the cells of the decoded grid
+_RECORD_TYPES = np.zeros(256, dtype=bool)
+_RECORD_TYPES[[OBJECT_TO_IDX[t] for t in ("door", "key", "ball", "box")]] = True
+
+
+def pack_objects(objs: Sequence[WorldObj]) -> np.ndarray:
+    """
+    Pack objects into an array of `OBJECT_RECORD`, one per object followed
+    by the records of the objects they contain, breadth first
+    """
+
+    objs = list(objs)
+    records = []
+    for obj in objs:
+        flags = 0
+        init_pos = cur_pos = (0, 0)
+        if obj.init_pos is not None:
+            init_pos = tuple(obj.init_pos)
+            flags |= _HAS_INIT_POS
+        if obj.cur_pos is not None:
+            cur_pos = tuple(obj.cur_pos)
+            flags |= _HAS_CUR_POS
+        if obj.contains is not None:
+            objs.append(obj.contains)
+            flags |= _HAS_CONTAINS
+        records.append((obj.encode(), flags, init_pos, cur_pos))
+    return np.array(records, dtype=OBJECT_RECORD)
+
+
+def unpack_objects(records: np.ndarray, num_objs: int) -> list[WorldObj]:
+    """
+    Unpack the first `num_objs` objects of records packed by `pack_objects`,
+    along with the objects they contain
+    """
+
+    objs = [WorldObj.decode(*code) for code in records["code"].tolist()]
+    flags = records["flags"].tolist()
+    init_pos = records["init_pos"].tolist()
+    cur_pos = records["cur_pos"].tolist()
+
+    contents = num_objs
+    for k, obj in enumerate(objs):
+        if obj is None:
+            raise ValueError(f"object record {k} holds no object")
+        if flags[k] & _HAS_INIT_POS:
+            obj.init_pos = tuple(init_pos[k])
+        if flags[k] & _HAS_CUR_POS:
+            obj.cur_pos = tuple(cur_pos[k])
+        if flags[k] & _HAS_CONTAINS:
+            if contents >= len(objs):
+                raise ValueError("missing object record for the contents of a box")
+            obj.contains = objs[contents]
+            contents += 1
+    if contents != len(objs):
+        raise ValueError("object records left over after unpacking")
+    return objs[:num_objs]
 
 
 class Grid:
     """
     Represent a grid and operations on it
+
+    Alongside the list of world objects, the grid keeps a `(width, height, 3)`
+    array with the (type, color, state) encoding of every cell. All changes
+    to the grid must go through `set`, which keeps both in sync. Objects
+    whose state is modified in place (e.g. doors being opened) must be set
+    again at their position afterwards.
+
+    `set` also maintains a Zobrist hash of the grid contents in `zobrist`,
+    the XOR of the keys of all non-empty cells.
     """
 
-    # Static cache of pre-renderer tiles
-    tile_cache: dict[tuple[Any, ...], Any] = {}
+    # Static cache of pre-rendered tiles
+    tile_cache: TileCache = TileCache(max_bytes=16 * 2**20)
 
     def __init__(self, width: int, height: int):
         assert width >= 3
@@ -34,25 +157,36 @@ class Grid:
 
         self.grid: list[WorldObj | None] = [None] * (width * height)
 
+        # Encoding of each cell, indexed by column then row
+        self.codes: np.ndarray = np.zeros((width, height, 3), dtype=np.uint8)
+        self.codes[:, :, 0] = OBJECT_TO_IDX["empty"]
+
+        # Cells the agent cannot see behind
+        self.opaque: np.ndarray = np.zeros((width, height), dtype=bool)
+
+        # Zobrist key of each cell, 0 for empty cells, and their XOR
+        self.cell_keys: list[int] = [0] * (width * height)
+        self.zobrist: int = 0
+
     def __contains__(self, key: Any) -> bool:
         if isinstance(key, WorldObj):
             for e in self.grid:
                 if e is key:
                     return True
         elif isinstance(key, tuple):
-            for e in self.grid:
-                if e is None:
-                    continue
-                if (e.color, e.type) == key:
-                    return True
-                if key[0] is None and key[1] == e.type:
-                    return True
+            color, type = key
+            if type not in OBJECT_TO_IDX or type in ("unseen", "empty"):
+                return False
+            match = self.codes[:, :, 0] == OBJECT_TO_IDX[type]
+            if color is not None:
+                if color not in COLOR_TO_IDX:
+                    return False
+                match &= self.codes[:, :, 1] == COLOR_TO_IDX[color]
+            return bool(match.any())
         return False
 
     def __eq__(self, other: Grid) -> bool:
-        grid1 = self.encode()
-        grid2 = other.encode()
-        return np.array_equal(grid2, grid1)
+        return np.array_equal(self.codes, other.codes)
 
     def __ne__(self, other: Grid) -> bool:
         return not self == other
@@ -62,6 +196,26 @@ class Grid:
 
         return deepcopy(self)
 
+    def __deepcopy__(self, memo: dict[int, Any]) -> Grid:
+        from copy import deepcopy
+
+        grid = Grid.__new__(Grid)
+        memo[id(self)] = grid
+
+        for key, value in self.__dict__.items():
+            if key == "grid":
+                # Only copy the objects that can change, static objects
+                # such as walls are shared with the copy
+                value = [
+                    v if v is None or v.is_static() else deepcopy(v, memo)
+                    for v in value
+                ]
+            else:
+                value = deepcopy(value, memo)
+            setattr(grid, key, value)
+
+        return grid
+
     def set(self, i: int, j: int, v: WorldObj | None):
         assert (
             0 <= i < self.width
@@ -69,7 +223,21 @@ class Grid:
         assert (
             0 <= j < self.height
         ), f"row index {j} outside of grid of height {self.height}"
-        self.grid[j * self.width + i] = v
+        index = j * self.width + i
+        self.grid[index] = v
+
+        if v is None:
+            self.codes[i, j] = (OBJECT_TO_IDX["empty"], 0, 0)
+            self.opaque[i, j] = False
+            key = 0
+        else:
+            code = v.encode()
+            self.codes[i, j] = code
+            self.opaque[i, j] = not v.see_behind()
+            key = zobrist_key(index, code)
+
+        self.zobrist ^= self.cell_keys[index] ^ key
+        self.cell_keys[index] = key
 
     def get(self, i: int, j: int) -> WorldObj | None:
         assert 0 <= i < self.width
@@ -142,6 +310,56 @@ class Grid:
 
         return grid
 
+    def slice_codes(self, topX: int, topY: int, width: int, height: int) -> np.ndarray:
+        """
+        Get the encoding of a subset of the grid, cells outside of the grid
+        are encoded as walls (same as `slice(...).encode()`)
+        """
+
+        return self._slice_array(self.codes, topX, topY, width, height, WALL_CODE)
+
+    def slice_opaque(self, topX: int, topY: int, width: int, height: int) -> np.ndarray:
+        """
+        Get the opacity of a subset of the grid, cells outside of the grid
+        are opaque walls
+        """
+
+        return self._slice_array(self.opaque, topX, topY, width, height, True)
+
+    def empty_cells(
+        self, topX: int, topY: int, width: int, height: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the x and y coordinates of the empty cells in a subset of the
+        grid, ordered by column then row
+        """
+
+        x0, y0 = max(topX, 0), max(topY, 0)
+        x1, y1 = min(topX + width, self.width), min(topY + height, self.height)
+        xs, ys = np.nonzero(self.codes[x0:x1, y0:y1, 0] == OBJECT_TO_IDX["empty"])
+        return xs + x0, ys + y0
+
+    def _slice_array(
+        self,
+        array: np.ndarray,
+        topX: int,
+        topY: int,
+        width: int,
+        height: int,
+        fill: Any,
+    ) -> np.ndarray:
+        out = np.empty((width, height) + array.shape[2:], dtype=array.dtype)
+        out[...] = fill
+
+        x0, y0 = max(topX, 0), max(topY, 0)
+        x1, y1 = min(topX + width, self.width), min(topY + height, self.height)
+        if x0 < x1 and y0 < y1:
+            # Bounds of the copied cells in the output
+            i0, i1, j0, j1 = x0 - topX, x1 - topX, y0 - topY, y1 - topY
+            out[i0:i1, j0:j1] = array[x0:x1, y0:y1]
+
+        return out
+
     @classmethod
     def render_tile(
         cls,
@@ -153,44 +371,19 @@ class Grid:
     ) -> np.ndarray:
         """
         Render a tile and cache the result
+        :param subdivs: supersampling factor along each axis, 1 draws the
+            tile without anti-aliasing
         """
 
         # Hash map lookup key for the cache
-        key: tuple[Any, ...] = (agent_dir, highlight, tile_size)
+        key: tuple[Any, ...] = (agent_dir, highlight, tile_size, subdivs)
         key = obj.encode() + key if obj else key
 
-        if key in cls.tile_cache:
-            return cls.tile_cache[key]
+        img = cls.tile_cache.get(key)
+        if img is not None:
+            return img
 
-        img = np.zeros(
-            shape=(tile_size * subdivs, tile_size * subdivs, 3), dtype=np.uint8
-        )
-
-        # Draw the grid lines (top and left edges)
-        fill_coords(img, point_in_rect(0, 0.031, 0, 1), (100, 100, 100))
-        fill_coords(img, point_in_rect(0, 1, 0, 0.031), (100, 100, 100))
-
-        if obj is not None:
-            obj.render(img)
-
-        # Overlay the agent on top
-        if agent_dir is not None:
-            tri_fn = point_in_triangle(
-                (0.12, 0.19),
-                (0.87, 0.50),
-                (0.12, 0.81),
-            )
-
-            # Rotate the agent based on its direction
-            tri_fn = rotate_fn(tri_fn, cx=0.5, cy=0.5, theta=0.5 * math.pi * agent_dir)
-            fill_coords(img, tri_fn, (255, 0, 0))
-
-        # Highlight the cell if needed
-        if highlight:
-            highlight_img(img)
-
-        # Downsample the image to perform supersampling/anti-aliasing
-        img = downsample(img, subdivs)
+        img = draw_tile(obj, agent_dir, highlight, tile_size, subdivs)
 
         # Cache the rendered tile
         cls.tile_cache[key] = img
@@ -203,69 +396,35 @@ class Grid:
         agent_pos: tuple[int, int],
         agent_dir: int | None = None,
         highlight_mask: np.ndarray | None = None,
+        subdivs: int = 3,
     ) -> np.ndarray:
         """
-        Render this grid at a given scale
-        :param r: target renderer object
+        Render this grid at a given scale, gathering the tiles of all the
+        cells at once from the shared `TileAtlas` of that size
         :param tile_size: tile size in pixels
+        :param subdivs: supersampling factor of the tiles
         """
 
-        if highlight_mask is None:
-            highlight_mask = np.zeros(shape=(self.width, self.height), dtype=bool)
-
-        # Compute the total grid size
-        width_px = self.width * tile_size
-        height_px = self.height * tile_size
-
-        img = np.zeros(shape=(height_px, width_px, 3), dtype=np.uint8)
+        atlas = TileAtlas.get(tile_size, subdivs)
+        return atlas.render(self.codes, agent_pos, agent_dir, highlight_mask)
 
-        # Render the grid
-        for j in range(0, self.height):
-            for i in range(0, self.width):
-                cell = self.get(i, j)
-
-                agent_here = np.array_equal(agent_pos, (i, j))
-                assert highlight_mask is not None
-                tile_img = Grid.render_tile(
-                    cell,
-                    agent_dir=agent_dir if agent_here else None,
-                    highlight=highlight_mask[i, j],
-                    tile_size=tile_size,
-                )
-
-                ymin = j * tile_size
-                ymax = (j + 1) * tile_size
-                xmin = i * tile_size
-                xmax = (i + 1) * tile_size
-                img[ymin:ymax, xmin:xmax, :] = tile_img
-
-        return img
-
-    def encode(self, vis_mask: np.ndarray | None = None) -> np.ndarray:
+    def encode(
+        self, vis_mask: np.ndarray | None = None, out: np.ndarray | None = None
+    ) -> np.ndarray:
         """
-        Produce a compact numpy encoding of the grid
+        Produce a compact numpy encoding of the grid, written into `out` if
+        given
         """
 
-        if vis_mask is None:
-            vis_mask = np.ones((self.width, self.height), dtype=bool)
-
-        array = np.zeros((self.width, self.height, 3), dtype="uint8")
+        if out is None:
+            out = np.empty_like(self.codes)
 
-        for i in range(self.width):
-            for j in range(self.height):
-                assert vis_mask is not None
-                if vis_mask[i, j]:
-                    v = self.get(i, j)
-
-                    if v is None:
-                        array[i, j, 0] = OBJECT_TO_IDX["empty"]
-                        array[i, j, 1] = 0
-                        array[i, j, 2] = 0
-
-                    else:
-                        array[i, j, :] = v.encode()
+        if vis_mask is None:
+            out[...] = self.codes
+        else:
+            np.multiply(self.codes, vis_mask[:, :, None], out=out)
 
-        return array
+        return out
 
     @staticmethod
     def decode(array: np.ndarray) -> tuple[Grid, np.ndarray]:
@@ -288,41 +447,210 @@ class Grid:
 
         return grid, vis_mask
 
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the grid into a compact, versioned binary format which
+        `from_bytes` reads back: the encoding of the cells, followed by a
+        record per door, key, ball and box with the positions stored on the
+        object and the contents of boxes, which `encode` loses
+        """
+
+        cells = self.codes.transpose(1, 0, 2).reshape(-1, 3)
+        indices = np.flatnonzero(_RECORD_TYPES[cells[:, 0]])
+        records = pack_objects([self.grid[k] for k in indices.tolist()])
+        header = _GRID_HEADER.pack(
+            GRID_MAGIC, GRID_FORMAT_VERSION, self.width, self.height, len(records)
+        )
+        return header + self.codes.tobytes() + records.tobytes()
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Grid:
+        """
+        Deserialize a grid written by `to_bytes`. The objects are decoded
+        once per distinct encoding, and cells holding the same static
+        object, such as walls, goals and lava, share one instance. As
+        `to_bytes` only records the positions of doors, keys, balls and
+        boxes, the `init_pos` and `cur_pos` of the static objects are left
+        as None.
+        """
+
+        if len(data) < _GRID_HEADER.size:
+            raise ValueError("truncated grid data")
+        magic, version, width, height, num_records = _GRID_HEADER.unpack_from(data)
+        if magic != GRID_MAGIC:
+            raise ValueError("not a serialized grid")
+        if version != GRID_FORMAT_VERSION:
+            raise ValueError(
+                f"unsupported grid format version {version}, "
+                f"expected {GRID_FORMAT_VERSION}"
+            )
+        size = width * height * 3 + num_records * OBJECT_RECORD.itemsize
+        if len(data) != _GRID_HEADER.size + size:
+            raise ValueError("grid data of the wrong size")
+
+        grid = Grid(width, height)
+        offset = _GRID_HEADER.size
+        codes = np.frombuffer(data, np.uint8, width * height * 3, offset)
+        codes = codes.reshape(width, height, 3)
+        records = np.frombuffer(data, OBJECT_RECORD, num_records, offset + codes.nbytes)
+
+        # Decode each distinct encoding once, then gather the objects of the
+        # cells in the order of the grid list
+        cells = codes.transpose(1, 0, 2).reshape(-1, 3)
+        values, inverse = np.unique(
+            cells[:, 0].astype(np.uint32) << 16
+            | cells[:, 1].astype(np.uint32) << 8
+            | cells[:, 2],
+            return_inverse=True,
+        )
+        objs = [
+            WorldObj.decode(v >> 16, v >> 8 & 0xFF, v & 0xFF) for v in values.tolist()
+        ]
+        grid.grid = list(map(objs.__getitem__, inverse.tolist()))
+
+        indices = np.flatnonzero(_RECORD_TYPES[cells[:, 0]])
+        if len(indices) > num_records:
+            raise ValueError("missing object records in grid data")
+        for index, obj in zip(indices.tolist(), unpack_objects(records, len(indices))):
+            grid.grid[index] = obj
+
+        # Unseen cells are decoded as empty cells
+        empty = np.array([obj is None for obj in objs])[inverse]
+        opaque = np.array([obj is not None and not obj.see_behind() for obj in objs])
+        grid.codes[...] = codes
+        grid.codes[empty.reshape(height, width).T] = (OBJECT_TO_IDX["empty"], 0, 0)
+        grid.opaque[...] = opaque[inverse].reshape(height, width).T
+
+        indices = np.flatnonzero(~empty)
+        keys = np.zeros(width * height, dtype=np.uint64)
+        keys[indices] = zobrist_keys(indices, cells[indices])
+        grid.cell_keys = keys.tolist()
+        grid.zobrist = int(np.bitwise_xor.reduce(keys))
+
+        return grid
+
     def process_vis(self, agent_pos: tuple[int, int]) -> np.ndarray:
-        mask = np.zeros(shape=(self.width, self.height), dtype=bool)
+        mask = Grid.compute_vis(self.opaque, agent_pos)
+
+        for i, j in zip(*np.nonzero(~mask)):
+            self.set(i, j, None)
+
+        return mask
 
-        mask[agent_pos[0], agent_pos[1]] = True
+    @staticmethod
+    def compute_vis(opaque: np.ndarray, agent_pos: tuple[int, int]) -> np.ndarray:
+        """
+        Compute which cells are visible from the agent's position, given
+        which cells cannot be seen behind. The agent is assumed to look
+        towards the top of the array (decreasing row indices).
 
-        for j in reversed(range(0, self.height)):
-            for i in range(0, self.width - 1):
-                if not mask[i, j]:
-                    continue
+        Rows are processed from the agent's row upwards. Each row is packed
+        into a bitmask, and its visibility is looked up in a table keyed on
+        the cells already visible in that row and on its opacity.
+        """
 
-                cell = self.get(i, j)
-                if cell and not cell.see_behind():
-                    continue
+        width, height = opaque.shape
 
-                mask[i + 1, j] = True
-                if j > 0:
-                    mask[i + 1, j - 1] = True
-                    mask[i, j - 1] = True
+        # Python integers are used as bitmasks for very wide views
+        dtype = np.int64 if width < 63 else object
+        shifts = np.arange(width)
 
-            for i in reversed(range(1, self.width)):
-                if not mask[i, j]:
-                    continue
+        opaque_rows = (opaque.T.astype(dtype) << shifts).sum(axis=1).tolist()
+        vis_rows = [0] * height
 
-                cell = self.get(i, j)
-                if cell and not cell.see_behind():
-                    continue
+        seen = 1 << agent_pos[0]
+        for j in reversed(range(0, agent_pos[1] + 1)):
+            vis_rows[j], seen = _vis_row(width, seen, opaque_rows[j])
 
-                mask[i - 1, j] = True
-                if j > 0:
-                    mask[i - 1, j - 1] = True
-                    mask[i, j - 1] = True
+        vis_rows = np.array(vis_rows, dtype=dtype)
+        return (vis_rows[None, :] >> shifts[:, None]) & 1 == 1
 
-        for j in range(0, self.height):
-            for i in range(0, self.width):
-                if not mask[i, j]:
-                    self.set(i, j, None)
+    @staticmethod
+    def compute_vis_batch(opaque: np.ndarray, agent_pos: tuple[int, int]) -> np.ndarray:
+        """
+        Same as `compute_vis` for a batch of `(N, width, height)` views that
+        share the same agent position, processing the rows of all views at
+        once. For views up to 9 cells wide, the visibility of the rows is
+        looked up in tables covering all the (seen, opaque) pairs.
+        """
 
-        return mask
+        num_views, width, height = opaque.shape
+        assert width < 63
+
+        shifts = np.arange(width, dtype=np.int64)
+        opaque_rows = (1 << shifts) @ opaque
+        vis_rows = np.zeros((num_views, height), dtype=np.int64)
+
+        seen = np.full(num_views, 1 << agent_pos[0], dtype=np.int64)
+        if width <= 9:
+            vis_table, seen_table = _vis_row_tables(width)
+            for j in reversed(range(0, agent_pos[1] + 1)):
+                index = seen << width | opaque_rows[:, j]
+                vis_rows[:, j] = vis_table[index]
+                seen = seen_table[index]
+        else:
+            for j in reversed(range(0, agent_pos[1] + 1)):
+                vis_rows[:, j], seen = _vis_rows(width, seen, opaque_rows[:, j])
+
+        return (vis_rows[:, None, :] >> shifts[None, :, None]) & 1 == 1
+
+
+@lru_cache(maxsize=2**16)
+def _vis_row(width: int, seen: int, opaque: int) -> tuple[int, int]:
+    """
+    Propagate visibility along a row of cells, bit i of the masks being
+    the cell in column i. Starting from the cells already seen, visibility
+    spreads left and right until it reaches cells that can't be seen behind.
+
+    Returns the visible cells of this row, and the cells made visible in
+    the row above, which are those next to or above a visible cell that
+    can be seen behind.
+    """
+
+    full = (1 << width) - 1
+    clear = full & ~opaque
+
+    vis = seen
+    while True:
+        spread = vis & clear
+        new_vis = (vis | spread << 1 | spread >> 1) & full
+        if new_vis == vis:
+            break
+        vis = new_vis
+
+    spread = vis & clear
+    return vis, (spread | spread << 1 | spread >> 1) & full
+
+
+def _vis_rows(
+    width: int, seen: np.ndarray, opaque: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Same as `_vis_row` for arrays of rows
+    """
+
+    full = (1 << width) - 1
+    clear = full & ~opaque
+
+    vis = seen
+    while True:
+        spread = vis & clear
+        new_vis = (vis | spread << 1 | spread >> 1) & full
+        if np.array_equal(new_vis, vis):
+            break
+        vis = new_vis
+
+    spread = vis & clear
+    return vis, (spread | spread << 1 | spread >> 1) & full
+
+
+@lru_cache(maxsize=None)
+def _vis_row_tables(width: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Outputs of `_vis_row` for all rows of a given width, indexed by
+    `seen << width | opaque`
+    """
+
+    index = np.arange(1 << 2 * width, dtype=np.int64)
+    vis, seen = _vis_rows(width, index >> width, index & ((1 << width) - 1))
+    return vis.astype(np.int16), seen.astype(np.int64)
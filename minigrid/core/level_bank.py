@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable
+
+import gymnasium as gym
+import numpy as np
+
+from minigrid.minigrid_env import MiniGridEnv
+from minigrid.utils.episode_log import decode_kwargs, encode_kwargs
+
+# Version of the banks written by `LevelBank.save`
+LEVEL_BANK_VERSION = 1
+
+# Arrays making up a bank, each saved into its own `.npy` file
+BANK_ARRAYS = ("seeds", "offsets", "states", "extra_offsets", "extra_states")
+
+
+def env_class_name(env: MiniGridEnv) -> str:
+    env_class = type(env.unwrapped)
+    return f"{env_class.__module__}.{env_class.__qualname__}"
+
+
+def env_config(env: MiniGridEnv) -> dict[str, int]:
+    """
+    Configuration of an environment which the levels of a bank depend on,
+    leaving out the attributes restored from the levels themselves
+    """
+
+    env = env.unwrapped
+    state_fields = env.get_state_fields()
+    return {
+        name: int(getattr(env, name))
+        for name in ("width", "height", "agent_view_size", "max_steps")
+        if name not in state_fields
+    }
+
+
+def generate_level(env: MiniGridEnv, seed: int) -> tuple[bytes, bytes]:
+    """
+    Generate the level of an environment for a given seed and return its
+    state serialized by `to_bytes` and `extra_state_to_bytes`, right after
+    `_gen_grid`. The rest of `reset` runs when the level is loaded, as
+    after generating it.
+    """
+
+    env = env.unwrapped
+    super(MiniGridEnv, env).reset(seed=seed)
+    env.agent_pos = (-1, -1)
+    env.agent_dir = -1
+    env._gen_grid(env.width, env.height)
+    return env.to_bytes(), env.extra_state_to_bytes()
+
+
+def _generate_levels(env_id: str, env_kwargs: dict[str, Any], seeds: list[int]):
+    env = gym.make(env_id, **env_kwargs).unwrapped
+    config = env_config(env)
+    # Set the attributes which are only initialized by reset
+    env.reset(seed=0)
+
+    levels = [generate_level(env, seed) for seed in seeds]
+    env.close()
+    return env_class_name(env), config, levels
+
+
+def _concatenate(parts: list[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    offsets = np.cumsum([0] + [len(part) for part in parts], dtype=np.int64)
+    return offsets, np.frombuffer(b"".join(parts), dtype=np.uint8)
+
+
+class LevelBank:
+    """
+    Bank of levels generated ahead of time, which environments load on
+    reset instead of generating a level. This skips the generation of
+    levels such as the BabyAI levels, whose rejection sampling can take
+    tens of milliseconds.
+
+    Each level is stored with the seed it was generated with, its state
+    after generating it serialized by `MiniGridEnv.to_bytes`, which holds
+    the grid, the agent and the mission, and its extra state serialized by
+    `MiniGridEnv.extra_state_to_bytes`, which holds the random number
+    generator and the attributes added by subclasses, such as the BabyAI
+    instructions. A level of the bank is thus the level
+    `reset(seed=seeds[level])` would generate, and episodes continue as
+    they would after that reset. The attributes added by subclasses are
+    unpickled when loading levels, restricted to the classes of minigrid,
+    so banks should still come from trusted sources.
+
+    Banks are saved as a directory of `.npy` files which `load` opens as
+    read-only memory-mapped arrays, so that processes share the pages of a
+    single copy and only read the levels they load, along with a
+    `bank.json` file holding the environment the levels were generated
+    with. Levels are only loaded into environments of the same class and
+    configuration. Banks are created with `generate`, or from the command
+    line:
+
+        python -m minigrid.core.level_bank BabyAI-BossLevel-v0 bank --num-levels 1000
+
+    Environments created with `level_bank=bank` load a level of the bank on
+    every reset, either `options={"level": level}` or a level drawn at
+    random, and report it with its seed in the info.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.core.level_bank import LevelBank
+        >>> bank = LevelBank.generate("MiniGrid-DoorKey-8x8-v0", range(10))
+        >>> env = gym.make("MiniGrid-DoorKey-8x8-v0", level_bank=bank)
+        >>> _, info = env.reset(options={"level": 3})
+        >>> info
+        {'level': 3, 'level_seed': 3}
+    """
+
+    def __init__(
+        self,
+        env_class: str,
+        env_config: dict[str, int],
+        seeds: np.ndarray,
+        offsets: np.ndarray,
+        states: np.ndarray,
+        extra_offsets: np.ndarray,
+        extra_states: np.ndarray,
+        env_id: str | None = None,
+        env_kwargs: dict[str, Any] | None = None,
+    ):
+        self.env_class = env_class
+        self.env_config = env_config
+        self.seeds = seeds
+        self.offsets = offsets
+        self.states = states
+        self.extra_offsets = extra_offsets
+        self.extra_states = extra_states
+
+        # Environment the levels were generated with, for reference only
+        self.env_id = env_id
+        self.env_kwargs = env_kwargs or {}
+
+    @classmethod
+    def generate(
+        cls,
+        env_id: str,
+        seeds: Iterable[int],
+        env_kwargs: dict[str, Any] | None = None,
+        num_workers: int = 1,
+    ) -> LevelBank:
+        """
+        Generate the levels of an environment for the given seeds, split
+        between `num_workers` processes
+        """
+
+        seeds = [int(seed) for seed in seeds]
+        env_kwargs = env_kwargs or {}
+        if num_workers > 1:
+            bounds = np.linspace(0, len(seeds), num_workers + 1).astype(int)
+            with ProcessPoolExecutor(num_workers) as executor:
+                results = list(
+                    executor.map(
+                        _generate_levels,
+                        [env_id] * num_workers,
+                        [env_kwargs] * num_workers,
+                        [seeds[a:b] for a, b in zip(bounds[:-1], bounds[1:])],
+                    )
+                )
+        else:
+            results = [_generate_levels(env_id, env_kwargs, seeds)]
+
+        env_class, config = results[0][:2]
+        levels = [level for *_, worker_levels in results for level in worker_levels]
+        offsets, states = _concatenate([state for state, _ in levels])
+        extra_offsets, extra_states = _concatenate([extra for _, extra in levels])
+        return cls(
+            env_class,
+            config,
+            seeds=np.array(seeds, dtype=np.int64),
+            offsets=offsets,
+            states=states,
+            extra_offsets=extra_offsets,
+            extra_states=extra_states,
+            env_id=env_id,
+            env_kwargs=env_kwargs,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> LevelBank:
+        """
+        Open a bank saved with `save`, as read-only memory-mapped arrays
+        """
+
+        with open(os.path.join(path, "bank.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != LEVEL_BANK_VERSION:
+            raise ValueError(
+                f"unsupported level bank version {meta.get('version')}, "
+                f"expected {LEVEL_BANK_VERSION}"
+            )
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in BANK_ARRAYS
+        }
+        bank = cls(
+            meta["env_class"],
+            meta["env_config"],
+            env_id=meta["env_id"],
+            env_kwargs=decode_kwargs(meta["env_kwargs"]),
+            **arrays,
+        )
+        if not len(bank.offsets) == len(bank.extra_offsets) == len(bank) + 1:
+            raise ValueError(f"inconsistent level bank in {path}")
+        return bank
+
+    def save(self, path: str):
+        """
+        Save the bank into a new directory. The files are written into a
+        temporary directory which is then renamed, so that processes never
+        see a partial bank.
+        """
+
+        path = os.path.abspath(path)
+        if os.path.exists(path):
+            raise FileExistsError(f"{path} already exists")
+
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=parent)
+        try:
+            for name in BANK_ARRAYS:
+                np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+            meta = {
+                "version": LEVEL_BANK_VERSION,
+                "env_id": self.env_id,
+                "env_kwargs": encode_kwargs(self.env_kwargs),
+                "env_class": self.env_class,
+                "env_config": self.env_config,
+                "num_levels": len(self),
+            }
+            with open(os.path.join(tmp_path, "bank.json"), "w") as f:
+                json.dump(meta, f, indent=2)
+            os.chmod(tmp_path, 0o755)
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path)
+            raise
+
+    def __len__(self) -> int:
+        return len(self.seeds)
+
+    def check_env(self, env: MiniGridEnv):
+        """
+        Check that the levels of the bank can be loaded into an environment,
+        which must have the class and configuration of the environment they
+        were generated with
+        """
+
+        if env_class_name(env) != self.env_class:
+            raise ValueError(
+                f"the levels of this bank are {self.env_class} levels, "
+                f"got a {env_class_name(env)} environment"
+            )
+        config = env_config(env)
+        if config != self.env_config:
+            raise ValueError(
+                f"the levels of this bank were generated with {self.env_config}, "
+                f"got an environment with {config}"
+            )
+
+    def load_level(self, level: int, env: MiniGridEnv):
+        """
+        Restore a level into an environment, as right after `_gen_grid`.
+        The objects of the level referring to the environment, such as the
+        BabyAI instructions, are bound to `env`.
+        """
+
+        env = env.unwrapped
+        self.check_env(env)
+        start, end = self.offsets[level], self.offsets[level + 1]
+        env.load_bytes(self.states[start:end])
+        start, end = self.extra_offsets[level], self.extra_offsets[level + 1]
+        env.load_extra_state_bytes(self.extra_states[start:end])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Generate a bank of levels of an environment"
+    )
+    parser.add_argument("env_id", help="gym environment to generate levels of")
+    parser.add_argument("path", help="directory to save the bank into")
+    parser.add_argument(
+        "--num-levels", type=int, help="number of levels to generate", default=1000
+    )
+    parser.add_argument(
+        "--seed", type=int, help="seed of the first level, then +1", default=0
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        help="number of processes generating levels",
+        default=os.cpu_count() or 1,
+    )
+
+    args = parser.parse_args()
+    bank = LevelBank.generate(
+        args.env_id,
+        range(args.seed, args.seed + args.num_levels),
+        num_workers=args.num_workers,
+    )
+    bank.save(args.path)
+    print(f"Saved {len(bank)} levels of {args.env_id} to {args.path}")
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from copy import deepcopy
+
 import numpy as np
 
 from minigrid.core.constants import COLOR_NAMES
@@ -41,6 +43,20 @@ class Room:
         # List of objects contained
         self.objs: list[WorldObj] = []
 
+    def __deepcopy__(self, memo) -> Room:
+        # Positions are tuples and can be shared between copies, only the
+        # doors, neighbors and objects need copying
+        room = Room.__new__(Room)
+        memo[id(self)] = room
+        room.top = self.top
+        room.size = self.size
+        room.doors = deepcopy(self.doors, memo)
+        room.door_pos = list(self.door_pos)
+        room.neighbors = deepcopy(self.neighbors, memo)
+        room.locked = self.locked
+        room.objs = deepcopy(self.objs, memo)
+        return room
+
     def rand_pos(self, env: MiniGridEnv) -> tuple[int, int]:
         topX, topY = self.top
         sizeX, sizeY = self.size
@@ -69,6 +85,8 @@ class RoomGrid(MiniGridEnv):
     This is meant to serve as a base class for other environments.
     """
 
+    state_fields = ("room_grid",)
+
     def __init__(
         self,
         room_size: int = 7,
@@ -0,0 +1,498 @@
+from __future__ import annotations
+
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, NamedTuple
+
+import numpy as np
+
+from minigrid.core.constants import (
+    COLOR_TO_IDX,
+    OBJECT_TO_IDX,
+    STATE_TO_IDX,
+    TILE_PIXELS,
+)
+from minigrid.core.world_object import WorldObj
+from minigrid.utils.rendering import (
+    downsample,
+    fill_coords,
+    highlight_img,
+    point_in_rect,
+    point_in_triangle,
+    rotate_fn,
+)
+
+# Shape of the table of tiles, indexed by the (type, color, state) encoding
+# of the cell, whether it is highlighted and the direction of the agent on
+# it plus one, 0 meaning no agent
+ATLAS_SHAPE = (len(OBJECT_TO_IDX), len(COLOR_TO_IDX), len(STATE_TO_IDX), 2, 5)
+
+# Steps between the indices of tiles with consecutive types, colors and
+# states
+CODE_STRIDES = np.cumprod(ATLAS_SHAPE[:0:-1])[::-1][:3]
+
+# Tiles which can be drawn, all but the ones of the agent object type,
+# which only appears in fully observable encodings
+DRAWABLE = np.ones(ATLAS_SHAPE, dtype=bool)
+DRAWABLE[OBJECT_TO_IDX["agent"]] = False
+
+# Version of the tiles drawn by `TileAtlas`, part of the names of the saved
+# atlases shared by `get`, to be increased whenever the pixels of the tiles
+# change so that atlases saved by previous versions are not reused
+TILE_ATLAS_VERSION = 2
+DRAWABLE = DRAWABLE.ravel()
+
+
+def draw_tile(
+    obj: WorldObj | None,
+    agent_dir: int | None = None,
+    highlight: bool = False,
+    tile_size: int = TILE_PIXELS,
+    subdivs: int = 3,
+) -> np.ndarray:
+    """
+    Render a tile with an optional object, agent and highlight
+    """
+
+    img = np.zeros(shape=(tile_size * subdivs, tile_size * subdivs, 3), dtype=np.uint8)
+
+    # Draw the grid lines (top and left edges)
+    fill_coords(img, point_in_rect(0, 0.031, 0, 1), (100, 100, 100))
+    fill_coords(img, point_in_rect(0, 1, 0, 0.031), (100, 100, 100))
+
+    if obj is not None:
+        obj.render(img)
+
+    # Overlay the agent on top
+    if agent_dir is not None:
+        tri_fn = point_in_triangle(
+            (0.12, 0.19),
+            (0.87, 0.50),
+            (0.12, 0.81),
+        )
+
+        # Rotate the agent based on its direction
+        tri_fn = rotate_fn(tri_fn, cx=0.5, cy=0.5, theta=0.5 * math.pi * agent_dir)
+        fill_coords(img, tri_fn, (255, 0, 0))
+
+    # Highlight the cell if needed
+    if highlight:
+        highlight_img(img)
+
+    # Downsample the image to perform supersampling/anti-aliasing
+    return downsample(img, subdivs)
+
+
+class TileCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    currsize: int
+    nbytes: int
+    max_bytes: int
+
+
+class TileCache:
+    """
+    Thread-safe cache of rendered tiles or atlases, evicting the least
+    recently used entries once their total size exceeds `max_bytes`. The
+    size of an entry is its `nbytes`. An entry larger than the budget is
+    still kept until the next one is added.
+
+    Lookups with `get` or `[]` count as hits or misses, and the counters are
+    reported by `cache_info` as for `functools.lru_cache`.
+
+    Example:
+        >>> import numpy as np
+        >>> from minigrid.core.tile_atlas import TileCache
+        >>> cache = TileCache(max_bytes=1024)
+        >>> cache["a"] = np.zeros(512, dtype=np.uint8)
+        >>> cache["b"] = np.zeros(512, dtype=np.uint8)
+        >>> cache.get("a") is not None
+        True
+        >>> cache["c"] = np.zeros(512, dtype=np.uint8)
+        >>> "b" in cache
+        False
+        >>> cache.cache_info()
+        TileCacheInfo(hits=1, misses=0, evictions=1, currsize=2, nbytes=1024, max_bytes=1024)
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        with self._lock:
+            old_value = self._entries.pop(key, None)
+            if old_value is not None:
+                self._nbytes -= old_value.nbytes
+            self._entries[key] = value
+            self._nbytes += value.nbytes
+
+            # Evict the least recently used entries, keeping the new one
+            while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all the entries and reset the counters
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def cache_info(self) -> TileCacheInfo:
+        with self._lock:
+            return TileCacheInfo(
+                self.hits,
+                self.misses,
+                self.evictions,
+                len(self._entries),
+                self._nbytes,
+                self.max_bytes,
+            )
+
+
+class TileAtlas:
+    """
+    Table of the rendered tiles of a given size, stored in a single
+    `(num_tiles, tile_size, tile_size, 3)` array so that a whole grid can be
+    rendered with one gather from the encoding of its cells.
+
+    Tiles are indexed by the (type, color, state) encoding of the cell,
+    whether it is highlighted and the direction of the agent on it, see
+    `tile_index`. They are drawn the first time they are needed, from the
+    object decoded from their encoding. Stacked grids, such as the
+    observations of `VecMiniGridEnv`, are rendered all at once by passing
+    arrays with leading batch dimensions, optionally into a preallocated
+    output array.
+
+    Atlases can also be saved with all their tiles drawn and loaded as
+    read-only memory-mapped arrays, so that processes rendering
+    environments share the pages of a single copy and skip drawing the
+    tiles. When `cache_dir` is set, which defaults to the
+    `MINIGRID_TILE_CACHE` environment variable, `get` opens the atlases
+    saved in that directory and saves the missing ones there, under names
+    holding `TILE_ATLAS_VERSION`.
+
+    The atlases shared by `get` are kept in the `atlases` cache, bounded to
+    256 MiB by default. `warm` draws all the tiles of an atlas up front.
+
+    Example:
+        >>> from minigrid.core.grid import Grid
+        >>> from minigrid.core.tile_atlas import TileAtlas
+        >>> grid = Grid(5, 4)
+        >>> grid.wall_rect(0, 0, 5, 4)
+        >>> atlas = TileAtlas.get(tile_size=8)
+        >>> atlas.render(grid.codes, agent_pos=(1, 2), agent_dir=0).shape
+        (32, 40, 3)
+    """
+
+    # Shared atlases, by tile size and subdivisions
+    atlases: TileCache = TileCache(max_bytes=256 * 2**20)
+
+    # Directory of the saved atlases shared by `get`, if any
+    cache_dir: str | None = os.environ.get("MINIGRID_TILE_CACHE")
+
+    def __init__(self, tile_size: int = TILE_PIXELS, subdivs: int = 3):
+        self.tile_size = tile_size
+        self.subdivs = subdivs
+
+        num_tiles = int(np.prod(ATLAS_SHAPE))
+        self.tiles = np.zeros((num_tiles, tile_size, tile_size, 3), dtype=np.uint8)
+        self.drawn = np.zeros(num_tiles, dtype=bool)
+
+    @classmethod
+    def get(cls, tile_size: int = TILE_PIXELS, subdivs: int = 3) -> TileAtlas:
+        """
+        Get the shared atlas for a tile size, creating it if needed, or
+        loading it from `cache_dir` if set
+        """
+
+        key = (tile_size, subdivs)
+        atlas = cls.atlases.get(key)
+        if atlas is None:
+            if cls.cache_dir is None:
+                atlas = cls(tile_size, subdivs)
+            else:
+                name = f"tiles_v{TILE_ATLAS_VERSION}_{tile_size}_{subdivs}.npy"
+                path = os.path.join(cls.cache_dir, name)
+                if not os.path.exists(path):
+                    cls(tile_size, subdivs).save(path)
+                atlas = cls.load(path, subdivs)
+            cls.atlases[key] = atlas
+        return atlas
+
+    @classmethod
+    def load(cls, path: str, subdivs: int = 3) -> TileAtlas:
+        """
+        Open an atlas saved with `save` as a read-only memory-mapped array
+        """
+
+        tiles = np.load(path, mmap_mode="r")
+        tile_size = tiles.shape[1] if tiles.ndim == 4 else 0
+        if tiles.shape != (len(DRAWABLE), tile_size, tile_size, 3):
+            raise ValueError(f"{path} is not a tile atlas, its shape is {tiles.shape}")
+
+        # All the tiles count as drawn, so that the read-only array is never
+        # written to. The tiles of the agent type, which cannot be drawn,
+        # are left blank.
+        atlas = cls(tile_size, subdivs)
+        atlas.tiles = tiles
+        atlas.drawn[:] = True
+        return atlas
+
+    def save(self, path: str):
+        """
+        Draw all the tiles and save the atlas to a `.npy` file. The file is
+        written under a temporary name and then renamed, so that processes
+        saving the same atlas concurrently never see a partial file.
+        """
+
+        self.warm()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, self.tiles)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @property
+    def nbytes(self) -> int:
+        return self.tiles.nbytes
+
+    def warm(self):
+        """
+        Draw all the tiles which are not drawn yet
+        """
+
+        self.draw(np.flatnonzero(DRAWABLE))
+
+    @staticmethod
+    def tile_index(
+        codes: np.ndarray,
+        highlight: np.ndarray | bool = False,
+        agent_dir: np.ndarray | int = -1,
+    ) -> np.ndarray:
+        """
+        Index of the tiles of cells given their `(..., 3)` encoding, whether
+        they are highlighted and the direction of the agent on them, -1 for
+        cells without the agent
+        """
+
+        index = codes.astype(np.intp) @ CODE_STRIDES
+        index += highlight * ATLAS_SHAPE[4]
+        index += np.asarray(agent_dir) + 1
+        return index
+
+    def draw(self, index: np.ndarray):
+        """
+        Draw the tiles with the given indices which are not drawn yet
+        """
+
+        index = np.asarray(index).ravel()
+        for tile in np.unique(index[~self.drawn[index]]):
+            type_idx, color, state, highlight, agent_dir = np.unravel_index(
+                tile, ATLAS_SHAPE
+            )
+            self.tiles[tile] = draw_tile(
+                WorldObj.decode(type_idx, color, state),
+                agent_dir=agent_dir - 1 if agent_dir else None,
+                highlight=bool(highlight),
+                tile_size=self.tile_size,
+                subdivs=self.subdivs,
+            )
+            self.drawn[tile] = True
+
+    def gather(self, index: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Assemble the images of a `(..., width, height)` array of tile
+        indices, drawing the missing tiles first. The images are written
+        into `out` if given, which must be a `(..., height * tile_size,
+        width * tile_size, 3)` array of bytes.
+        """
+
+        self.draw(index)
+
+        *batch, width, height = index.shape
+        size = self.tile_size
+        shape = (*batch, height * size, width * size, 3)
+        if out is None:
+            out = np.empty(shape, dtype=np.uint8)
+        elif out.shape != shape or out.dtype != np.uint8:
+            raise ValueError(
+                f"expected a uint8 output array of shape {shape}, "
+                f"got {out.dtype} {out.shape}"
+            )
+
+        # Gather the tiles one row of cells at a time, for as many images
+        # as fit in about 1 MiB. This is several times faster for large
+        # images than gathering all the tiles into a temporary array.
+        # Cells are indexed by column then row, images by row then column.
+        rows = out.reshape(-1, height, size, width, size, 3)
+        index = index.reshape(-1, width, height)
+        chunk = max(1, 2**20 // self.tiles[0].nbytes // width)
+        for start in range(0, len(index), chunk):
+            end = start + chunk
+            for j in range(height):
+                tiles = self.tiles[index[start:end, :, j]]
+                rows[start:end, j] = tiles.swapaxes(1, 2)
+
+        return out
+
+    @staticmethod
+    def grid_index(
+        codes: np.ndarray,
+        agent_pos: np.ndarray | tuple[int, int] | None = None,
+        agent_dir: np.ndarray | int | None = None,
+        highlight_mask: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Index of the tiles of grids from the `(..., width, height, 3)`
+        encoding of their cells, with the agents drawn at their `(..., 2)`
+        positions, if inside the grids, and directions
+        """
+
+        *batch, width, height = codes.shape[:-1]
+        highlight = False if highlight_mask is None else highlight_mask
+        index = TileAtlas.tile_index(codes, highlight)
+
+        if agent_pos is not None and agent_dir is not None:
+            if batch:
+                x, y = np.broadcast_to(agent_pos, (*batch, 2)).reshape(-1, 2).T
+                agent_dir = np.broadcast_to(agent_dir, batch).ravel()
+                n = np.flatnonzero((x >= 0) & (x < width) & (y >= 0) & (y < height))
+                index.reshape(-1, width, height)[n, x[n], y[n]] += agent_dir[n] + 1
+            else:
+                x, y = agent_pos
+                if 0 <= x < width and 0 <= y < height:
+                    index[x, y] += agent_dir + 1
+
+        return index
+
+    def render(
+        self,
+        codes: np.ndarray,
+        agent_pos: np.ndarray | tuple[int, int] | None = None,
+        agent_dir: np.ndarray | int | None = None,
+        highlight_mask: np.ndarray | None = None,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Render grids from the `(..., width, height, 3)` encoding of their
+        cells, see `grid_index` and `gather`
+        """
+
+        index = self.grid_index(codes, agent_pos, agent_dir, highlight_mask)
+        return self.gather(index, out)
+
+
+def render_frames(
+    envs: Iterable[Any],
+    tile_size: int = TILE_PIXELS,
+    highlight: bool = True,
+    agent_pov: bool = False,
+    out: np.ndarray | None = None,
+    subdivs: int = 3,
+) -> np.ndarray:
+    """
+    Render the frames of several MiniGrid environments, as returned by
+    their `get_frame`, into a single `(N, height, width, 3)` array. The
+    frames are written straight into `out` if given, without allocating
+    an image per environment.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> import numpy as np
+        >>> from minigrid.core.tile_atlas import render_frames
+        >>> envs = [gym.make("MiniGrid-Empty-5x5-v0") for _ in range(4)]
+        >>> for i, env in enumerate(envs):
+        ...     _ = env.reset(seed=i)
+        >>> out = np.empty((4, 56, 56, 3), dtype=np.uint8)
+        >>> frames = render_frames(envs, tile_size=8, agent_pov=True, out=out)
+        >>> frames is out
+        True
+    """
+
+    index = np.stack(
+        [env.unwrapped.get_frame_tiles(highlight, agent_pov) for env in envs]
+    )
+    return TileAtlas.get(tile_size, subdivs).gather(index, out)
+
+
+class TileFrame:
+    """
+    Image of a grid kept from one render to the next, into which only the
+    tiles of the cells which changed since the previous render are copied.
+    Cells are compared through their tile index, so changes to the grid,
+    the agent and the highlighted cells are all picked up.
+    """
+
+    def __init__(self, atlas: TileAtlas):
+        self.atlas = atlas
+        self.index: np.ndarray | None = None
+        self.img: np.ndarray | None = None
+
+    def update(self, index: np.ndarray) -> np.ndarray:
+        """
+        Update the image to a `(width, height)` array of tile indices and
+        return it. The image is updated in place by the following calls.
+        """
+
+        if self.img is None or self.index.shape != index.shape:
+            self.img = self.atlas.gather(index)
+            self.index = index.copy()
+            return self.img
+
+        xs, ys = np.nonzero(index != self.index)
+        if len(xs) > 0:
+            tiles = index[xs, ys]
+            self.atlas.draw(tiles)
+
+            width, height = index.shape
+            size = self.atlas.tile_size
+            img = self.img.reshape(height, size, width, size, 3)
+            img[ys, :, xs] = self.atlas.tiles[tiles]
+            self.index[xs, ys] = tiles
+
+        return self.img
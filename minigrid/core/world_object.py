@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Tuple
+from copy import deepcopy
+from typing import TYPE_CHECKING, Any, Tuple
 
 import numpy as np
 
@@ -23,6 +24,10 @@ if TYPE_CHECKING:
 
 Point = Tuple[int, int]
 
+# Attribute types which are shared when copying objects, tuples are only
+# expected to hold positions
+_IMMUTABLE_TYPES = (type(None), bool, int, float, str, tuple, np.generic)
+
 
 class WorldObj:
 
@@ -59,6 +64,10 @@ class WorldObj:
         """Can the agent see behind this object?"""
         return True
 
+    def is_static(self) -> bool:
+        """Is this object left unchanged once placed in the grid?"""
+        return False
+
     def toggle(self, env: MiniGridEnv, pos: tuple[int, int]) -> bool:
         """Method to trigger/toggle an action this object performs"""
         return False
@@ -106,6 +115,24 @@ class WorldObj:
         """Draw this object with the given renderer"""
         raise NotImplementedError
 
+    def __deepcopy__(self, memo: dict[int, Any]) -> WorldObj:
+        # Static objects are shared between copies
+        if self.is_static():
+            return self
+
+        cls = self.__class__
+        obj = cls.__new__(cls)
+        memo[id(self)] = obj
+        obj.__dict__.update(
+            (
+                key,
+                value if isinstance(value, _IMMUTABLE_TYPES) else deepcopy(value, memo),
+            )
+            for key, value in self.__dict__.items()
+        )
+
+        return obj
+
 
 class Goal(WorldObj):
     def __init__(self):
@@ -114,6 +141,9 @@ class Goal(WorldObj):
     def can_overlap(self):
         return True
 
+    def is_static(self):
+        return True
+
     def render(self, img):
         fill_coords(img, point_in_rect(0, 1, 0, 1), COLORS[self.color])
 
@@ -129,6 +159,9 @@ class Floor(WorldObj):
     def can_overlap(self):
         return True
 
+    def is_static(self):
+        return True
+
     def render(self, img):
         # Give the floor a pale color
         color = COLORS[self.color] / 2
@@ -142,6 +175,9 @@ class Lava(WorldObj):
     def can_overlap(self):
         return True
 
+    def is_static(self):
+        return True
+
     def render(self, img):
         c = (255, 128, 0)
 
@@ -165,6 +201,9 @@ class Wall(WorldObj):
     def see_behind(self):
         return False
 
+    def is_static(self):
+        return True
+
     def render(self, img):
         fill_coords(img, point_in_rect(0, 1, 0, 1), COLORS[self.color])
 
@@ -188,10 +227,12 @@ class Door(WorldObj):
             if isinstance(env.carrying, Key) and env.carrying.color == self.color:
                 self.is_locked = False
                 self.is_open = True
+                env.grid.set(pos[0], pos[1], self)
                 return True
             return False
 
         self.is_open = not self.is_open
+        env.grid.set(pos[0], pos[1], self)
         return True
 
     def encode(self):
@@ -1,27 +1,75 @@
 from __future__ import annotations
 
-from minigrid.envs.blockedunlockpickup import BlockedUnlockPickupEnv
-from minigrid.envs.crossing import CrossingEnv
-from minigrid.envs.distshift import DistShiftEnv
-from minigrid.envs.doorkey import DoorKeyEnv
-from minigrid.envs.dynamicobstacles import DynamicObstaclesEnv
-from minigrid.envs.empty import EmptyEnv
-from minigrid.envs.fetch import FetchEnv
-from minigrid.envs.fourrooms import FourRoomsEnv
-from minigrid.envs.gotodoor import GoToDoorEnv
-from minigrid.envs.gotoobject import GoToObjectEnv
-from minigrid.envs.keycorridor import KeyCorridorEnv
-from minigrid.envs.lavagap import LavaGapEnv
-from minigrid.envs.lockedroom import LockedRoom, LockedRoomEnv
-from minigrid.envs.memory import MemoryEnv
-from minigrid.envs.multiroom import MultiRoom, MultiRoomEnv
-from minigrid.envs.obstructedmaze import (
-    ObstructedMaze_1Dlhb,
-    ObstructedMaze_Full,
-    ObstructedMazeEnv,
-)
-from minigrid.envs.playground import PlaygroundEnv
-from minigrid.envs.putnear import PutNearEnv
-from minigrid.envs.redbluedoors import RedBlueDoorEnv
-from minigrid.envs.unlock import UnlockEnv
-from minigrid.envs.unlockpickup import UnlockPickupEnv
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from minigrid.envs.blockedunlockpickup import BlockedUnlockPickupEnv
+    from minigrid.envs.crossing import CrossingEnv
+    from minigrid.envs.distshift import DistShiftEnv
+    from minigrid.envs.doorkey import DoorKeyEnv
+    from minigrid.envs.dynamicobstacles import DynamicObstaclesEnv
+    from minigrid.envs.empty import EmptyEnv
+    from minigrid.envs.fetch import FetchEnv
+    from minigrid.envs.fourrooms import FourRoomsEnv
+    from minigrid.envs.gotodoor import GoToDoorEnv
+    from minigrid.envs.gotoobject import GoToObjectEnv
+    from minigrid.envs.keycorridor import KeyCorridorEnv
+    from minigrid.envs.lavagap import LavaGapEnv
+    from minigrid.envs.lockedroom import LockedRoom, LockedRoomEnv
+    from minigrid.envs.memory import MemoryEnv
+    from minigrid.envs.multiroom import MultiRoom, MultiRoomEnv
+    from minigrid.envs.obstructedmaze import (
+        ObstructedMaze_1Dlhb,
+        ObstructedMaze_Full,
+        ObstructedMazeEnv,
+    )
+    from minigrid.envs.playground import PlaygroundEnv
+    from minigrid.envs.putnear import PutNearEnv
+    from minigrid.envs.redbluedoors import RedBlueDoorEnv
+    from minigrid.envs.unlock import UnlockEnv
+    from minigrid.envs.unlockpickup import UnlockPickupEnv
+
+# Modules of the classes exported here, which are only imported when a class
+# is first accessed, for example by `gym.make` resolving an entry point
+_ENV_MODULES = {
+    "BlockedUnlockPickupEnv": "minigrid.envs.blockedunlockpickup",
+    "CrossingEnv": "minigrid.envs.crossing",
+    "DistShiftEnv": "minigrid.envs.distshift",
+    "DoorKeyEnv": "minigrid.envs.doorkey",
+    "DynamicObstaclesEnv": "minigrid.envs.dynamicobstacles",
+    "EmptyEnv": "minigrid.envs.empty",
+    "FetchEnv": "minigrid.envs.fetch",
+    "FourRoomsEnv": "minigrid.envs.fourrooms",
+    "GoToDoorEnv": "minigrid.envs.gotodoor",
+    "GoToObjectEnv": "minigrid.envs.gotoobject",
+    "KeyCorridorEnv": "minigrid.envs.keycorridor",
+    "LavaGapEnv": "minigrid.envs.lavagap",
+    "LockedRoom": "minigrid.envs.lockedroom",
+    "LockedRoomEnv": "minigrid.envs.lockedroom",
+    "MemoryEnv": "minigrid.envs.memory",
+    "MultiRoom": "minigrid.envs.multiroom",
+    "MultiRoomEnv": "minigrid.envs.multiroom",
+    "ObstructedMaze_1Dlhb": "minigrid.envs.obstructedmaze",
+    "ObstructedMaze_Full": "minigrid.envs.obstructedmaze",
+    "ObstructedMazeEnv": "minigrid.envs.obstructedmaze",
+    "PlaygroundEnv": "minigrid.envs.playground",
+    "PutNearEnv": "minigrid.envs.putnear",
+    "RedBlueDoorEnv": "minigrid.envs.redbluedoors",
+    "UnlockEnv": "minigrid.envs.unlock",
+    "UnlockPickupEnv": "minigrid.envs.unlockpickup",
+}
+
+__all__ = list(_ENV_MODULES)
+
+
+def __getattr__(name: str):
+    if name not in _ENV_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    env_class = getattr(importlib.import_module(_ENV_MODULES[name]), name)
+    globals()[name] = env_class
+    return env_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,53 +1,116 @@
 from __future__ import annotations
 
-from minigrid.envs.babyai.goto import (
-    GoTo,
-    GoToDoor,
-    GoToImpUnlock,
-    GoToLocal,
-    GoToObj,
-    GoToObjDoor,
-    GoToRedBall,
-    GoToRedBallGrey,
-    GoToRedBallNoDists,
-    GoToRedBlueBall,
-    GoToSeq,
-)
-from minigrid.envs.babyai.open import (
-    Open,
-    OpenDoor,
-    OpenDoorsOrder,
-    OpenRedDoor,
-    OpenTwoDoors,
-)
-from minigrid.envs.babyai.other import (
-    ActionObjDoor,
-    FindObjS5,
-    KeyCorridor,
-    MoveTwoAcross,
-    OneRoomS8,
-)
-from minigrid.envs.babyai.pickup import (
-    Pickup,
-    PickupAbove,
-    PickupDist,
-    PickupLoc,
-    UnblockPickup,
-)
-from minigrid.envs.babyai.putnext import PutNext, PutNextLocal
-from minigrid.envs.babyai.synth import (
-    BossLevel,
-    BossLevelNoUnlock,
-    MiniBossLevel,
-    Synth,
-    SynthLoc,
-    SynthSeq,
-)
-from minigrid.envs.babyai.unlock import (
-    BlockedUnlockPickup,
-    KeyInBox,
-    Unlock,
-    UnlockLocal,
-    UnlockPickup,
-    UnlockToUnlock,
-)
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from minigrid.envs.babyai.goto import (
+        GoTo,
+        GoToDoor,
+        GoToImpUnlock,
+        GoToLocal,
+        GoToObj,
+        GoToObjDoor,
+        GoToRedBall,
+        GoToRedBallGrey,
+        GoToRedBallNoDists,
+        GoToRedBlueBall,
+        GoToSeq,
+    )
+    from minigrid.envs.babyai.open import (
+        Open,
+        OpenDoor,
+        OpenDoorsOrder,
+        OpenRedDoor,
+        OpenTwoDoors,
+    )
+    from minigrid.envs.babyai.other import (
+        ActionObjDoor,
+        FindObjS5,
+        KeyCorridor,
+        MoveTwoAcross,
+        OneRoomS8,
+    )
+    from minigrid.envs.babyai.pickup import (
+        Pickup,
+        PickupAbove,
+        PickupDist,
+        PickupLoc,
+        UnblockPickup,
+    )
+    from minigrid.envs.babyai.putnext import PutNext, PutNextLocal
+    from minigrid.envs.babyai.synth import (
+        BossLevel,
+        BossLevelNoUnlock,
+        MiniBossLevel,
+        Synth,
+        SynthLoc,
+        SynthSeq,
+    )
+    from minigrid.envs.babyai.unlock import (
+        BlockedUnlockPickup,
+        KeyInBox,
+        Unlock,
+        UnlockLocal,
+        UnlockPickup,
+        UnlockToUnlock,
+    )
+
+# Modules of the classes exported here, which are only imported when a class
+# is first accessed, for example by `gym.make` resolving an entry point
+_ENV_MODULES = {
+    "GoTo": "minigrid.envs.babyai.goto",
+    "GoToDoor": "minigrid.envs.babyai.goto",
+    "GoToImpUnlock": "minigrid.envs.babyai.goto",
+    "GoToLocal": "minigrid.envs.babyai.goto",
+    "GoToObj": "minigrid.envs.babyai.goto",
+    "GoToObjDoor": "minigrid.envs.babyai.goto",
+    "GoToRedBall": "minigrid.envs.babyai.goto",
+    "GoToRedBallGrey": "minigrid.envs.babyai.goto",
+    "GoToRedBallNoDists": "minigrid.envs.babyai.goto",
+    "GoToRedBlueBall": "minigrid.envs.babyai.goto",
+    "GoToSeq": "minigrid.envs.babyai.goto",
+    "Open": "minigrid.envs.babyai.open",
+    "OpenDoor": "minigrid.envs.babyai.open",
+    "OpenDoorsOrder": "minigrid.envs.babyai.open",
+    "OpenRedDoor": "minigrid.envs.babyai.open",
+    "OpenTwoDoors": "minigrid.envs.babyai.open",
+    "ActionObjDoor": "minigrid.envs.babyai.other",
+    "FindObjS5": "minigrid.envs.babyai.other",
+    "KeyCorridor": "minigrid.envs.babyai.other",
+    "MoveTwoAcross": "minigrid.envs.babyai.other",
+    "OneRoomS8": "minigrid.envs.babyai.other",
+    "Pickup": "minigrid.envs.babyai.pickup",
+    "PickupAbove": "minigrid.envs.babyai.pickup",
+    "PickupDist": "minigrid.envs.babyai.pickup",
+    "PickupLoc": "minigrid.envs.babyai.pickup",
+    "UnblockPickup": "minigrid.envs.babyai.pickup",
+    "PutNext": "minigrid.envs.babyai.putnext",
+    "PutNextLocal": "minigrid.envs.babyai.putnext",
+    "BossLevel": "minigrid.envs.babyai.synth",
+    "BossLevelNoUnlock": "minigrid.envs.babyai.synth",
+    "MiniBossLevel": "minigrid.envs.babyai.synth",
+    "Synth": "minigrid.envs.babyai.synth",
+    "SynthLoc": "minigrid.envs.babyai.synth",
+    "SynthSeq": "minigrid.envs.babyai.synth",
+    "BlockedUnlockPickup": "minigrid.envs.babyai.unlock",
+    "KeyInBox": "minigrid.envs.babyai.unlock",
+    "Unlock": "minigrid.envs.babyai.unlock",
+    "UnlockLocal": "minigrid.envs.babyai.unlock",
+    "UnlockPickup": "minigrid.envs.babyai.unlock",
+    "UnlockToUnlock": "minigrid.envs.babyai.unlock",
+}
+
+__all__ = list(_ENV_MODULES)
+
+
+def __getattr__(name: str):
+    if name not in _ENV_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    env_class = getattr(importlib.import_module(_ENV_MODULES[name]), name)
+    globals()[name] = env_class
+    return env_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
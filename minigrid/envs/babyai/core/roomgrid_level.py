@@ -50,6 +50,8 @@ class RoomGridLevel(RoomGrid):
     of approximately similar difficulty.
     """
 
+    state_fields = ("instrs", "surface", "max_steps")
+
     def __init__(self, room_size=8, max_steps: int | None = None, **kwargs):
         mission_space = BabyAIMissionSpace()
 
@@ -245,6 +247,7 @@ class RoomGridLevel(RoomGrid):
                 for door in room.doors:
                     if door:
                         door.is_open = True
+                        self.grid.set(*door.cur_pos, door)
 
     def check_objs_reachable(self, raise_exc=True):
         """
@@ -70,6 +70,7 @@ class GoToRedBallGrey(RoomGridLevel):
 
         for dist in dists:
             dist.color = "grey"
+            self.grid.set(*dist.cur_pos, dist)
 
         # Make sure no unblocking is required
         self.check_objs_reachable()
@@ -141,6 +141,8 @@ class PutNext(RoomGridLevel):
 
     """
 
+    state_fields = ("obj_a",)
+
     def __init__(
         self,
         room_size,
@@ -64,6 +64,8 @@ class BlockedUnlockPickupEnv(RoomGrid):
 
     """
 
+    state_fields = ("obj",)
+
     def __init__(self, max_steps: int | None = None, **kwargs):
         mission_space = MissionSpace(
             mission_func=self._gen_mission,
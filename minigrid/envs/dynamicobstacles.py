@@ -69,6 +69,8 @@ class DynamicObstaclesEnv(MiniGridEnv):
 
     """
 
+    state_fields = ("obstacles",)
+
     def __init__(
         self,
         size=8,
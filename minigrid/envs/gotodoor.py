@@ -63,6 +63,8 @@ class GoToDoorEnv(MiniGridEnv):
 
     """
 
+    state_fields = ("target_pos", "target_color")
+
     def __init__(self, size=5, max_steps: int | None = None, **kwargs):
         assert size >= 5
         self.size = size
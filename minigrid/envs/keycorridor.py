@@ -72,6 +72,8 @@ class KeyCorridorEnv(RoomGrid):
 
     """
 
+    state_fields = ("obj",)
+
     def __init__(
         self,
         num_rows=3,
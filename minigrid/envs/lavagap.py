@@ -66,6 +66,8 @@ class LavaGapEnv(MiniGridEnv):
 
     """
 
+    state_fields = ("goal_pos", "gap_pos")
+
     def __init__(
         self, size, obstacle_type=Lava, max_steps: int | None = None, **kwargs
     ):
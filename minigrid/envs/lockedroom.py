@@ -76,6 +76,8 @@ class LockedRoomEnv(MiniGridEnv):
 
     """
 
+    state_fields = ("rooms",)
+
     def __init__(self, size=19, max_steps: int | None = None, **kwargs):
         self.size = size
 
@@ -67,6 +67,8 @@ class MemoryEnv(MiniGridEnv):
 
     """
 
+    state_fields = ("success_pos", "failure_pos")
+
     def __init__(
         self, size=8, random_length=False, max_steps: int | None = None, **kwargs
     ):
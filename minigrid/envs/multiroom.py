@@ -72,6 +72,8 @@ class MultiRoomEnv(MiniGridEnv):
 
     """
 
+    state_fields = ("rooms", "goal_pos")
+
     def __init__(
         self,
         minNumRooms,
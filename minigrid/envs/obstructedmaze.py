@@ -78,6 +78,8 @@ class ObstructedMazeEnv(RoomGrid):
 
     """
 
+    state_fields = ("obj",)
+
     def __init__(
         self,
         num_rows,
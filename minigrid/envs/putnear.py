@@ -67,6 +67,15 @@ class PutNearEnv(MiniGridEnv):
 
     """
 
+    state_fields = (
+        "move_type",
+        "moveColor",
+        "move_pos",
+        "target_type",
+        "target_color",
+        "target_pos",
+    )
+
     def __init__(self, size=6, numObjs=2, max_steps: int | None = None, **kwargs):
         self.size = size
         self.numObjs = numObjs
@@ -59,6 +59,8 @@ class RedBlueDoorEnv(MiniGridEnv):
 
     """
 
+    state_fields = ("red_door", "blue_door")
+
     def __init__(self, size=8, max_steps: int | None = None, **kwargs):
         self.size = size
         mission_space = MissionSpace(mission_func=self._gen_mission)
@@ -57,6 +57,8 @@ class UnlockPickupEnv(RoomGrid):
 
     """
 
+    state_fields = ("obj",)
+
     def __init__(self, max_steps: int | None = None, **kwargs):
         room_size = 6
         mission_space = MissionSpace(
@@ -117,6 +117,12 @@ if __name__ == "__main__":
         default="640",
         help="set the resolution for pygame rendering (width and height)",
     )
+    parser.add_argument(
+        "--render-fps",
+        type=int,
+        default=None,
+        help="frame rate limit of the window, 0 renders without limit",
+    )
 
     args = parser.parse_args()
 
@@ -127,6 +133,7 @@ if __name__ == "__main__":
         agent_pov=args.agent_view,
         agent_view_size=args.agent_view_size,
         screen_size=args.screen_size,
+        render_fps=args.render_fps,
     )
 
     # TODO: check if this can be removed
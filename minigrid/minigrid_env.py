@@ -1,25 +1,191 @@
 from __future__ import annotations
 
-import hashlib
+import io
 import math
+import pickle
+import struct
 from abc import abstractmethod
-from typing import Any, Iterable, SupportsFloat, TypeVar
+from copy import deepcopy
+from typing import TYPE_CHECKING, Any, Iterable, SupportsFloat, TypeVar
 
 import gymnasium as gym
 import numpy as np
-import pygame
-import pygame.freetype
 from gymnasium import spaces
 from gymnasium.core import ActType, ObsType
 
 from minigrid.core.actions import Actions
-from minigrid.core.constants import COLOR_NAMES, DIR_TO_VEC, TILE_PIXELS
-from minigrid.core.grid import Grid
+from minigrid.core.constants import COLOR_NAMES, DIR_TO_VEC, OBJECT_TO_IDX, TILE_PIXELS
+from minigrid.core.grid import (
+    OBJECT_RECORD,
+    ZOBRIST_AGENT,
+    ZOBRIST_CARRYING,
+    Grid,
+    pack_objects,
+    unpack_objects,
+    zobrist_key,
+)
 from minigrid.core.mission import MissionSpace
+from minigrid.core.tile_atlas import TileAtlas, TileFrame
 from minigrid.core.world_object import Point, WorldObj
 
+if TYPE_CHECKING:
+    import pygame
+
+    from minigrid.core.level_bank import LevelBank
+
 T = TypeVar("T")
 
+# Binary format of `MiniGridEnv.to_bytes`: a header with the magic bytes,
+# the format version, the agent pose, the step count, the length of the
+# mission and the number of records of the carried object, followed by the
+# mission, the records and the grid
+STATE_FORMAT_VERSION = 1
+STATE_MAGIC = b"MGst"
+_STATE_HEADER = struct.Struct("<4sBhhbIIB")
+
+
+class _EnvRef:
+    """
+    Stands in for the environment in state snapshots, so that objects
+    referring to it (such as BabyAI instructions) are bound to whichever
+    environment the snapshot is restored into
+    """
+
+    def __reduce__(self):
+        return "_ENV_REF"
+
+
+_ENV_REF = _EnvRef()
+
+# Binary format of `MiniGridEnv.extra_state_to_bytes`: a header with the
+# magic bytes, the format version and the state of the PCG64 generator (the
+# halves of its 128-bit state and increment, and its buffered 32-bit
+# value), followed by the pickled attributes added to `state_fields` by
+# subclasses, if any
+EXTRA_STATE_FORMAT_VERSION = 1
+EXTRA_STATE_MAGIC = b"MGex"
+_EXTRA_STATE_HEADER = struct.Struct("<4sBQQQQBI")
+
+# Functions and classes of numpy which the pickled extra state may refer to,
+# besides the classes of minigrid
+_NUMPY_GLOBALS = {"ndarray", "dtype", "scalar", "_reconstruct", "_frombuffer"}
+
+
+def _object_refs(env: MiniGridEnv) -> Iterable[tuple[tuple, WorldObj]]:
+    """
+    Objects of the grid and the carried object, along with the references
+    which `_ExtraStateUnpickler` resolves to them, following the objects
+    held by boxes
+    """
+
+    roots = [(("carrying",), env.carrying)]
+    roots += [(("cell", index), obj) for index, obj in enumerate(env.grid.grid)]
+    for ref, obj in roots:
+        depth = 0
+        while obj is not None:
+            yield ref + (depth,), obj
+            obj, depth = obj.contains, depth + 1
+
+
+class _ExtraStatePickler(pickle.Pickler):
+    """
+    Pickle the extra state of an environment, with the environment, the
+    objects of its grid and the carried object saved as references, so that
+    the attributes referring to them refer to those restored by `load_bytes`
+    """
+
+    def __init__(self, file, env: MiniGridEnv):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.refs = {id(env): ("env",)}
+        for ref, obj in _object_refs(env):
+            self.refs.setdefault(id(obj), ref)
+
+    def persistent_id(self, obj):
+        return self.refs.get(id(obj))
+
+
+class _ExtraStateUnpickler(pickle.Unpickler):
+    """
+    Unpickle the extra state of an environment, binding the references to
+    the environment and its objects, and refusing any global other than the
+    classes of minigrid and the numpy arrays and scalars
+    """
+
+    def __init__(self, file, env: MiniGridEnv):
+        super().__init__(file)
+        self.env = env
+
+    def persistent_load(self, pid):
+        if pid == ("env",):
+            return self.env
+        if pid[0] == "carrying" and len(pid) == 2:
+            obj = self.env.carrying
+        elif pid[0] == "cell" and len(pid) == 3:
+            obj = self.env.grid.grid[pid[1]]
+        else:
+            raise pickle.UnpicklingError(f"unsupported persistent id {pid!r}")
+        for _ in range(pid[-1]):
+            obj = obj.contains
+        return obj
+
+    def find_class(self, module, name):
+        root = module.split(".")[0]
+        if root == "numpy" and name in _NUMPY_GLOBALS:
+            return super().find_class(module, name)
+        if root == "minigrid":
+            obj = super().find_class(module, name)
+            if isinstance(obj, type) and obj.__module__.startswith("minigrid."):
+                return obj
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a state")
+
+
+class _HumanRenderer:
+    """
+    Surfaces and font of the human render mode, created once for a frame
+    size and window, into which the frames are then drawn in place
+    """
+
+    font_size = 22
+
+    def __init__(self, frame_size: tuple[int, int], window: pygame.Surface):
+        import pygame.freetype
+
+        self.frame_size = frame_size
+        self.window = window
+
+        # Background with a margin for the mission description, with the
+        # format of the window so that it can be scaled straight into it
+        width, height = frame_size
+        offset = width * 0.1
+        self.bg = pygame.Surface((int(width + offset), int(height + offset)), 0, window)
+        self.bg.fill((255, 255, 255))
+        self.frame = self.bg.subsurface(pygame.Rect(offset / 2, 0, width, height))
+
+        self.font = pygame.freetype.SysFont(
+            pygame.font.get_default_font(), self.font_size
+        )
+        self.mission = None
+        self.text = None
+        self.text_rect = None
+
+    def draw(self, img: np.ndarray, mission: str):
+        """
+        Draw a `(height, width, 3)` frame and its mission into the window
+        """
+
+        import pygame
+
+        pygame.surfarray.blit_array(self.frame, img.swapaxes(0, 1))
+        pygame.transform.smoothscale(self.bg, self.window.get_size(), self.window)
+
+        # Only render the mission description again when it changes
+        if mission != self.mission:
+            self.text, self.text_rect = self.font.render(mission, size=self.font_size)
+            self.text_rect.center = self.window.get_rect().center
+            self.text_rect.y = self.window.get_height() - self.font_size * 1.5
+            self.mission = mission
+        self.window.blit(self.text, self.text_rect)
+
 
 class MiniGridEnv(gym.Env):
     """
@@ -31,6 +197,18 @@ class MiniGridEnv(gym.Env):
         "render_fps": 10,
     }
 
+    # Attributes making up the state of an episode, saved by `get_state` and
+    # restored by `set_state`. Subclasses list only the attributes they add,
+    # those of their parent classes are included automatically.
+    state_fields = (
+        "grid",
+        "agent_pos",
+        "agent_dir",
+        "carrying",
+        "step_count",
+        "mission",
+    )
+
     def __init__(
         self,
         mission_space: MissionSpace,
@@ -45,6 +223,10 @@ class MiniGridEnv(gym.Env):
         highlight: bool = True,
         tile_size: int = TILE_PIXELS,
         agent_pov: bool = False,
+        sample_free_cells: bool = False,
+        copy_obs: bool = True,
+        render_fps: int | None = None,
+        level_bank: LevelBank | str | None = None,
     ):
         # Initialize mission
         self.mission = mission_space.sample()
@@ -90,6 +272,15 @@ class MiniGridEnv(gym.Env):
         self.render_size = None
         self.window = None
         self.clock = None
+        self._human_renderer: _HumanRenderer | None = None
+
+        # Frame rate limit of the human render mode, 0 renders unthrottled
+        if render_fps is None:
+            render_fps = self.metadata["render_fps"]
+        self.render_fps = render_fps
+
+        # Frames kept between renders, by view, tile size and subdivisions
+        self._frames: dict[tuple[str, int, int], TileFrame] = {}
 
         # Environment configuration
         self.width = width
@@ -116,6 +307,26 @@ class MiniGridEnv(gym.Env):
         self.tile_size = tile_size
         self.agent_pov = agent_pov
 
+        # Generation mode: sample positions in `place_obj` from the empty
+        # cells instead of rejection sampling over all cells. Both modes are
+        # deterministic for a given seed but generate different layouts.
+        self.sample_free_cells = sample_free_cells
+
+        # Observation mode: when False, the image observations are written
+        # into a buffer owned by the environment, which is overwritten by the
+        # next step or reset, instead of a new array at every step
+        self.copy_obs = copy_obs
+        self._obs_image: np.ndarray | None = None
+
+        # Bank of pre-generated levels loaded on reset instead of generating
+        # them, with the generator drawing the levels to load
+        if isinstance(level_bank, str):
+            from minigrid.core.level_bank import LevelBank
+
+            level_bank = LevelBank.load(level_bank)
+        self.level_bank = level_bank
+        self._level_rng: np.random.Generator | None = None
+
     def reset(
         self,
         *,
@@ -128,8 +339,13 @@ class MiniGridEnv(gym.Env):
         self.agent_pos = (-1, -1)
         self.agent_dir = -1
 
-        # Generate a new random grid at the start of each episode
-        self._gen_grid(self.width, self.height)
+        # Generate a new random grid at the start of each episode, or load
+        # one from the level bank
+        info = {}
+        if self.level_bank is None:
+            self._gen_grid(self.width, self.height)
+        else:
+            info = self._load_level(seed, options)
 
         # These fields should be defined by _gen_grid
         assert (
@@ -154,19 +370,239 @@ class MiniGridEnv(gym.Env):
         # Return first observation
         obs = self.gen_obs()
 
-        return obs, {}
+        return obs, info
+
+    def _load_level(
+        self, seed: int | None, options: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        """
+        Load a level of the level bank, the one given by the `level` reset
+        option or one drawn at random, as generated by `_gen_grid`
+        """
+
+        # Levels are drawn with their own generator, as loading a level
+        # restores the generator of the environment
+        if seed is not None or self._level_rng is None:
+            self._level_rng = np.random.default_rng(seed)
+        if options is not None and "level" in options:
+            level = int(options["level"])
+        else:
+            level = int(self._level_rng.integers(len(self.level_bank)))
+
+        self.level_bank.load_level(level, self)
+        return {"level": level, "level_seed": int(self.level_bank.seeds[level])}
 
     def hash(self, size=16):
         """Compute a hash that uniquely identifies the current state of the environment.
-        :param size: Size of the hashing
+        :param size: Size of the hashing, at most 16 hexadecimal digits as
+            the hash is the 64-bit key of `hash_key`
+        """
+        if size > 16:
+            raise ValueError(
+                f"hashes have at most 16 hexadecimal digits, got size={size}"
+            )
+        return f"{self.hash_key():016x}"[:size]
+
+    def hash_key(self) -> int:
+        """
+        64-bit Zobrist hash of the grid, the agent position and direction and
+        the carried object, suitable as a dictionary key. The hash of the
+        grid is maintained by `Grid.set`, so this takes constant time.
+        """
+        x, y = self.agent_pos
+        key = self.grid.zobrist ^ zobrist_key(
+            y * self.grid.width + x, (self.agent_dir, 0, 0), ZOBRIST_AGENT
+        )
+        if self.carrying is not None:
+            key ^= zobrist_key(0, self.carrying.encode(), ZOBRIST_CARRYING)
+        return key
+
+    @classmethod
+    def get_state_fields(cls) -> list[str]:
+        """
+        Names of the attributes declared in `state_fields` by this class and
+        all of its parent classes
+        """
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name in vars(klass).get("state_fields", ()):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def get_state(self) -> dict[str, Any]:
+        """
+        Take a snapshot of the current episode, which can be restored with
+        `set_state`. The snapshot holds the attributes listed in
+        `state_fields` and the state of the random number generator. It
+        shares no mutable objects with the environment and can be pickled.
+        """
+        state = {name: getattr(self, name) for name in self.get_state_fields()}
+        state["np_random"] = self.np_random.bit_generator.state
+        return deepcopy(state, {id(self): _ENV_REF})
+
+    def set_state(self, state: dict[str, Any]):
+        """
+        Restore a snapshot taken with `get_state`, on this environment or on
+        another instance of the same environment class. The snapshot itself
+        is left untouched and can be restored again.
+        """
+        self._restore_state(deepcopy(state, {id(_ENV_REF): self}))
+
+    def _restore_state(self, state: dict[str, Any]):
+        self.np_random.bit_generator.state = state.pop("np_random")
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the state of the episode held by the `state_fields` of
+        this base class into a compact, versioned binary format, which
+        `load_bytes` restores: the agent pose, the step count, the mission,
+        the carried object and the grid as written by `Grid.to_bytes`.
+        Attributes added by subclasses, such as the BabyAI instructions,
+        and the random number generator are left out, which
+        `extra_state_to_bytes` serializes.
+        """
+
+        mission = self.mission.encode()
+        records = pack_objects([] if self.carrying is None else [self.carrying])
+        x, y = self.agent_pos
+        header = _STATE_HEADER.pack(
+            STATE_MAGIC,
+            STATE_FORMAT_VERSION,
+            x,
+            y,
+            self.agent_dir,
+            self.step_count,
+            len(mission),
+            len(records),
+        )
+        return header + mission + records.tobytes() + self.grid.to_bytes()
+
+    def load_bytes(self, data: bytes):
+        """
+        Restore a state serialized by `to_bytes`, on this environment or on
+        another instance of the same environment class
+        """
+
+        data = memoryview(data)
+        if len(data) < _STATE_HEADER.size:
+            raise ValueError("truncated state data")
+        (
+            magic,
+            version,
+            x,
+            y,
+            agent_dir,
+            step_count,
+            mission_size,
+            num_records,
+        ) = _STATE_HEADER.unpack_from(data)
+        if magic != STATE_MAGIC:
+            raise ValueError("not a serialized state")
+        if version != STATE_FORMAT_VERSION:
+            raise ValueError(
+                f"unsupported state format version {version}, "
+                f"expected {STATE_FORMAT_VERSION}"
+            )
+
+        start = _STATE_HEADER.size
+        offset = start + mission_size
+        mission = bytes(data[start:offset]).decode()
+        grid_offset = offset + num_records * OBJECT_RECORD.itemsize
+        if len(data) < grid_offset:
+            raise ValueError("truncated state data")
+        records = np.frombuffer(data, OBJECT_RECORD, num_records, offset)
+        grid = Grid.from_bytes(data[grid_offset:])
+
+        self.grid = grid
+        self.agent_pos = (x, y)
+        self.agent_dir = agent_dir
+        self.carrying = unpack_objects(records, 1)[0] if num_records else None
+        self.step_count = step_count
+        self.mission = mission
+
+    def extra_state_to_bytes(self) -> bytes:
+        """
+        Serialize what `to_bytes` leaves out of `get_state`, which
+        `load_extra_state_bytes` restores: the state of the random number
+        generator, and the attributes added to `state_fields` by subclasses
+        pickled, with the objects of the grid and the carried object
+        pickled as references to those `to_bytes` serializes
+        """
+
+        state = self.np_random.bit_generator.state
+        if state["bit_generator"] != "PCG64":
+            raise ValueError(f"unsupported generator {state['bit_generator']}")
+        mask = (1 << 64) - 1
+        header = _EXTRA_STATE_HEADER.pack(
+            EXTRA_STATE_MAGIC,
+            EXTRA_STATE_FORMAT_VERSION,
+            state["state"]["state"] >> 64,
+            state["state"]["state"] & mask,
+            state["state"]["inc"] >> 64,
+            state["state"]["inc"] & mask,
+            state["has_uint32"],
+            state["uinteger"],
+        )
+
+        base_fields = MiniGridEnv.get_state_fields()
+        names = [name for name in self.get_state_fields() if name not in base_fields]
+        if not names:
+            return header
+        buffer = io.BytesIO()
+        _ExtraStatePickler(buffer, self).dump(
+            {name: getattr(self, name) for name in names}
+        )
+        return header + buffer.getvalue()
+
+    def load_extra_state_bytes(self, data: bytes):
+        """
+        Restore an extra state serialized by `extra_state_to_bytes`, after
+        restoring the state serialized by `to_bytes` along with it. Only the
+        classes of minigrid and numpy arrays are unpickled, but as their
+        constructors still run, states should come from trusted sources.
         """
-        sample_hash = hashlib.sha256()
 
-        to_encode = [self.grid.encode().tolist(), self.agent_pos, self.agent_dir]
-        for item in to_encode:
-            sample_hash.update(str(item).encode("utf8"))
+        data = memoryview(data)
+        if len(data) < _EXTRA_STATE_HEADER.size:
+            raise ValueError("truncated extra state data")
+        (
+            magic,
+            version,
+            state_high,
+            state_low,
+            inc_high,
+            inc_low,
+            has_uint32,
+            uinteger,
+        ) = _EXTRA_STATE_HEADER.unpack_from(data)
+        if magic != EXTRA_STATE_MAGIC:
+            raise ValueError("not a serialized extra state")
+        if version != EXTRA_STATE_FORMAT_VERSION:
+            raise ValueError(
+                f"unsupported extra state format version {version}, "
+                f"expected {EXTRA_STATE_FORMAT_VERSION}"
+            )
 
-        return sample_hash.hexdigest()[:size]
+        start = _EXTRA_STATE_HEADER.size
+        attributes = {}
+        if len(data) > start:
+            file = io.BytesIO(data[start:])
+            attributes = _ExtraStateUnpickler(file, self).load()
+
+        self.np_random.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {
+                "state": state_high << 64 | state_low,
+                "inc": inc_high << 64 | inc_low,
+            },
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+        for name, value in attributes.items():
+            setattr(self, name, value)
 
     @property
     def steps_remaining(self):
@@ -240,7 +676,7 @@ class MiniGridEnv(gym.Env):
         Generate random integer in [low,high[
         """
 
-        return self.np_random.integers(low, high)
+        return int(self.np_random.integers(low, high))
 
     def _rand_float(self, low: float, high: float) -> float:
         """
@@ -315,6 +751,7 @@ class MiniGridEnv(gym.Env):
         :param top: top-left position of the rectangle where to place
         :param size: size of the rectangle where to place
         :param reject_fn: function to filter out potential positions
+        :param max_tries: maximum number of positions to try
         """
 
         if top is None:
@@ -325,6 +762,24 @@ class MiniGridEnv(gym.Env):
         if size is None:
             size = (self.grid.width, self.grid.height)
 
+        if self.sample_free_cells:
+            pos = self._sample_free_cell(top, size, reject_fn, max_tries)
+        else:
+            pos = self._sample_cell(top, size, reject_fn, max_tries)
+
+        self.grid.set(pos[0], pos[1], obj)
+
+        if obj is not None:
+            obj.init_pos = pos
+            obj.cur_pos = pos
+
+        return pos
+
+    def _sample_cell(self, top, size, reject_fn, max_tries) -> tuple[int, int]:
+        """
+        Rejection sampling of a position for `place_obj`
+        """
+
         num_tries = 0
 
         while True:
@@ -354,13 +809,38 @@ class MiniGridEnv(gym.Env):
 
             break
 
-        self.grid.set(pos[0], pos[1], obj)
+        return pos
 
-        if obj is not None:
-            obj.init_pos = pos
-            obj.cur_pos = pos
+    def _sample_free_cell(self, top, size, reject_fn, max_tries) -> tuple[int, int]:
+        """
+        Sample a position for `place_obj` among the empty cells, each cell
+        being tried at most once
+        """
 
-        return pos
+        xs, ys = self.grid.empty_cells(*top, *size)
+        num_cells = len(xs)
+        num_tries = 0
+
+        while True:
+            if num_cells == 0 or num_tries > max_tries:
+                raise RecursionError("no empty position left in place_obj")
+
+            num_tries += 1
+
+            k = self._rand_int(0, num_cells)
+            pos = (int(xs[k]), int(ys[k]))
+
+            # Don't place the object where the agent is, and check if there
+            # is a filtering criterion. Rejected cells are removed from the
+            # candidates.
+            if np.array_equal(pos, self.agent_pos) or (
+                reject_fn and reject_fn(self, pos)
+            ):
+                num_cells -= 1
+                xs[k], ys[k] = xs[num_cells], ys[num_cells]
+                continue
+
+            return pos
 
     def put_obj(self, obj: WorldObj, i: int, j: int):
         """
@@ -622,15 +1102,71 @@ class MiniGridEnv(gym.Env):
 
         return grid, vis_mask
 
+    def gen_obs_image(self, agent_view_size=None, out=None):
+        """
+        Generate the encoding of the sub-grid observed by the agent.
+        This is equivalent to encoding the output of `gen_obs_grid`, but
+        works directly on the grid arrays without creating any grid objects.
+        if agent_view_size is None, self.agent_view_size is used
+        The encoding is written into `out` if given.
+        """
+
+        image, _ = self._gen_obs_view(agent_view_size, out)
+        return image
+
+    def _gen_obs_view(self, agent_view_size=None, out=None):
+        """
+        Generate the encoding of the sub-grid observed by the agent and its
+        visibility mask, as `gen_obs_image`
+        """
+
+        topX, topY, botX, botY = self.get_view_exts(agent_view_size)
+
+        agent_view_size = agent_view_size or self.agent_view_size
+
+        # Rotate the view so that the agent is looking up
+        k = -(self.agent_dir + 1)
+
+        image = self.grid.slice_codes(topX, topY, agent_view_size, agent_view_size)
+        if out is None:
+            image = np.ascontiguousarray(np.rot90(image, k))
+        else:
+            out[...] = np.rot90(image, k)
+            image = out
+
+        agent_pos = agent_view_size // 2, agent_view_size - 1
+
+        # Process occluders and visibility
+        if not self.see_through_walls:
+            opaque = self.grid.slice_opaque(
+                topX, topY, agent_view_size, agent_view_size
+            )
+            vis_mask = Grid.compute_vis(np.rot90(opaque, k), agent_pos)
+            image[~vis_mask] = 0
+        else:
+            vis_mask = np.ones(shape=image.shape[:2], dtype=bool)
+
+        # Make it so the agent sees what it's carrying
+        if self.carrying:
+            image[agent_pos] = self.carrying.encode()
+        else:
+            image[agent_pos] = (OBJECT_TO_IDX["empty"], 0, 0)
+
+        return image, vis_mask
+
     def gen_obs(self):
         """
         Generate the agent's view (partially observable, low-resolution encoding)
         """
 
-        grid, vis_mask = self.gen_obs_grid()
-
         # Encode the partially observable view into a numpy array
-        image = grid.encode(vis_mask)
+        if self.copy_obs:
+            image = self.gen_obs_image()
+        else:
+            shape = (self.agent_view_size, self.agent_view_size, 3)
+            if self._obs_image is None or self._obs_image.shape != shape:
+                self._obs_image = np.zeros(shape, dtype=np.uint8)
+            image = self.gen_obs_image(out=self._obs_image)
 
         # Observations are dictionaries containing:
         # - an image (partially observable view of the environment)
@@ -640,28 +1176,44 @@ class MiniGridEnv(gym.Env):
 
         return obs
 
-    def get_pov_render(self, tile_size):
+    def get_pov_render(self, tile_size, out=None, subdivs=3):
         """
         Render an agent's POV observation for visualization
         """
-        grid, vis_mask = self.gen_obs_grid()
-
-        # Render the whole grid
-        img = grid.render(
-            tile_size,
-            agent_pos=(self.agent_view_size // 2, self.agent_view_size - 1),
-            agent_dir=3,
-            highlight_mask=vis_mask,
-        )
 
-        return img
+        index = self.get_frame_tiles(agent_pov=True)
+        return self._render_frame("pov", tile_size, index, out, subdivs)
 
-    def get_full_render(self, highlight, tile_size):
+    def get_full_render(self, highlight, tile_size, out=None, subdivs=3):
         """
         Render a non-paratial observation for visualization
         """
+
+        index = self.get_frame_tiles(highlight)
+        return self._render_frame("full", tile_size, index, out, subdivs)
+
+    def get_frame_tiles(self, highlight: bool = True, agent_pov: bool = False):
+        """
+        Get the `(width, height)` array of the `TileAtlas` indices of the
+        tiles making up the frame returned by `get_frame`
+        """
+
+        if agent_pov:
+            image, vis_mask = self._gen_obs_view()
+
+            # Render the whole view, hidden cells are drawn empty
+            return TileAtlas.grid_index(
+                image,
+                agent_pos=(self.agent_view_size // 2, self.agent_view_size - 1),
+                agent_dir=3,
+                highlight_mask=vis_mask,
+            )
+
+        if not highlight:
+            return TileAtlas.grid_index(self.grid.codes, self.agent_pos, self.agent_dir)
+
         # Compute which cells are visible to the agent
-        _, vis_mask = self.gen_obs_grid()
+        _, vis_mask = self._gen_obs_view()
 
         # Compute the world coordinates of the bottom-left corner
         # of the agent's view area
@@ -673,42 +1225,53 @@ class MiniGridEnv(gym.Env):
             - r_vec * (self.agent_view_size // 2)
         )
 
+        # Compute the world coordinates of the visible cells
+        vis_i, vis_j = np.nonzero(vis_mask)
+        abs_i, abs_j = (
+            top_left[:, None] - f_vec[:, None] * vis_j + r_vec[:, None] * vis_i
+        )
+        inside = (abs_i >= 0) & (abs_i < self.width)
+        inside &= (abs_j >= 0) & (abs_j < self.height)
+
         # Mask of which cells to highlight
         highlight_mask = np.zeros(shape=(self.width, self.height), dtype=bool)
+        highlight_mask[abs_i[inside], abs_j[inside]] = True
 
-        # For each cell in the visibility mask
-        for vis_j in range(0, self.agent_view_size):
-            for vis_i in range(0, self.agent_view_size):
-                # If this cell is not visible, don't highlight it
-                if not vis_mask[vis_i, vis_j]:
-                    continue
-
-                # Compute the world coordinates of this cell
-                abs_i, abs_j = top_left - (f_vec * vis_j) + (r_vec * vis_i)
-
-                if abs_i < 0 or abs_i >= self.width:
-                    continue
-                if abs_j < 0 or abs_j >= self.height:
-                    continue
-
-                # Mark this cell to be highlighted
-                highlight_mask[abs_i, abs_j] = True
-
-        # Render the whole grid
-        img = self.grid.render(
-            tile_size,
-            self.agent_pos,
-            self.agent_dir,
-            highlight_mask=highlight_mask if highlight else None,
+        return TileAtlas.grid_index(
+            self.grid.codes, self.agent_pos, self.agent_dir, highlight_mask
         )
 
-        return img
+    def _render_frame(self, view, tile_size, index, out=None, subdivs=3):
+        """
+        Render the tiles of a frame into the frame kept for this view and
+        tile size, only copying the tiles which changed since the previous
+        frame, and return a copy of it or write it into `out`
+        """
+
+        atlas = TileAtlas.get(tile_size, subdivs)
+        key = (view, tile_size, subdivs)
+        frame = self._frames.get(key)
+        if frame is None or frame.atlas is not atlas:
+            frame = self._frames[key] = TileFrame(atlas)
+
+        img = frame.update(index)
+        if out is None:
+            return img.copy()
+        if out.shape != img.shape or out.dtype != np.uint8:
+            raise ValueError(
+                f"expected a uint8 output array of shape {img.shape}, "
+                f"got {out.dtype} {out.shape}"
+            )
+        out[...] = img
+        return out
 
     def get_frame(
         self,
         highlight: bool = True,
         tile_size: int = TILE_PIXELS,
         agent_pov: bool = False,
+        out: np.ndarray | None = None,
+        subdivs: int = 3,
     ):
         """Returns an RGB image corresponding to the whole environment or the agent's point of view.
 
@@ -717,6 +1280,8 @@ class MiniGridEnv(gym.Env):
             highlight (bool): If true, the agent's field of view or point of view is highlighted with a lighter gray color.
             tile_size (int): How many pixels will form a tile from the NxM grid.
             agent_pov (bool): If true, the rendered frame will only contain the point of view of the agent.
+            out (np.ndarray): If given, a uint8 array of the shape of the frame which the frame is written into instead of a new array.
+            subdivs (int): Supersampling factor used to anti-alias the tiles. 1 draws the tiles without anti-aliasing, which is faster to draw but gives jagged edges at small tile sizes.
 
         Returns:
 
@@ -725,17 +1290,18 @@ class MiniGridEnv(gym.Env):
         """
 
         if agent_pov:
-            return self.get_pov_render(tile_size)
+            return self.get_pov_render(tile_size, out, subdivs)
         else:
-            return self.get_full_render(highlight, tile_size)
+            return self.get_full_render(highlight, tile_size, out, subdivs)
 
     def render(self):
         img = self.get_frame(self.highlight, self.tile_size, self.agent_pov)
 
         if self.render_mode == "human":
-            img = np.transpose(img, axes=(1, 0, 2))
-            if self.render_size is None:
-                self.render_size = img.shape[:2]
+            # pygame is only loaded by the human render mode, as it takes
+            # long to import
+            import pygame
+
             if self.window is None:
                 pygame.init()
                 pygame.display.init()
@@ -745,31 +1311,19 @@ class MiniGridEnv(gym.Env):
                 pygame.display.set_caption("minigrid")
             if self.clock is None:
                 self.clock = pygame.time.Clock()
-            surf = pygame.surfarray.make_surface(img)
 
-            # Create background with mission description
-            offset = surf.get_size()[0] * 0.1
-            # offset = 32 if self.agent_pov else 64
-            bg = pygame.Surface(
-                (int(surf.get_size()[0] + offset), int(surf.get_size()[1] + offset))
-            )
-            bg.convert()
-            bg.fill((255, 255, 255))
-            bg.blit(surf, (offset / 2, 0))
-
-            bg = pygame.transform.smoothscale(bg, (self.screen_size, self.screen_size))
-
-            font_size = 22
-            text = self.mission
-            font = pygame.freetype.SysFont(pygame.font.get_default_font(), font_size)
-            text_rect = font.get_rect(text, size=font_size)
-            text_rect.center = bg.get_rect().center
-            text_rect.y = bg.get_height() - font_size * 1.5
-            font.render_to(bg, text_rect, text, size=font_size)
+            frame_size = (img.shape[1], img.shape[0])
+            if self.render_size is None:
+                self.render_size = frame_size
+            if (
+                self._human_renderer is None
+                or self._human_renderer.frame_size != frame_size
+            ):
+                self._human_renderer = _HumanRenderer(frame_size, self.window)
+            self._human_renderer.draw(img, self.mission)
 
-            self.window.blit(bg, (0, 0))
             pygame.event.pump()
-            self.clock.tick(self.metadata["render_fps"])
+            self.clock.tick(self.render_fps)
             pygame.display.flip()
 
         elif self.render_mode == "rgb_array":
@@ -777,4 +1331,9 @@ class MiniGridEnv(gym.Env):
 
     def close(self):
         if self.window:
+            import pygame
+
             pygame.quit()
+            self.window = None
+            self.clock = None
+            self._human_renderer = None
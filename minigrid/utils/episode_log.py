@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+from typing import TYPE_CHECKING, Any
+
+import gymnasium as gym
+import numpy as np
+
+from minigrid.core.constants import TILE_PIXELS
+
+if TYPE_CHECKING:
+    from minigrid.minigrid_env import MiniGridEnv
+
+# Version of the files written by `EpisodeLog.save`
+EPISODE_LOG_VERSION = 2
+
+
+def encode_kwargs(kwargs: dict[str, Any]) -> dict[str, Any]:
+    """
+    Encode environment arguments into JSON values, with classes such as the
+    `obstacle_type` of the crossing environments written as
+    `{"class": "module:name"}` and tuples as `{"tuple": [...]}`. Other
+    values must be JSON values already.
+    """
+
+    encoded = {}
+    for name, value in kwargs.items():
+        if isinstance(value, type):
+            value = {"class": f"{value.__module__}:{value.__qualname__}"}
+        elif isinstance(value, tuple):
+            value = {"tuple": list(value)}
+        try:
+            json.dumps(value)
+        except TypeError:
+            raise TypeError(
+                f"the environment argument {name}={value!r} cannot be saved "
+                "into an episode log, only JSON values and classes can"
+            ) from None
+        encoded[name] = value
+    return encoded
+
+
+def decode_kwargs(kwargs: dict[str, Any]) -> dict[str, Any]:
+    """
+    Decode environment arguments encoded by `encode_kwargs`
+    """
+
+    decoded = {}
+    for name, value in kwargs.items():
+        if isinstance(value, dict) and list(value) == ["class"]:
+            module, qualname = value["class"].split(":")
+            value = importlib.import_module(module)
+            for attr in qualname.split("."):
+                value = getattr(value, attr)
+        elif isinstance(value, dict) and list(value) == ["tuple"]:
+            value = tuple(value["tuple"])
+        decoded[name] = value
+    return decoded
+
+
+class EpisodeLog:
+    """
+    Log of an episode holding only what is needed to play it again: the
+    environment id and arguments, the seed and options of the reset and the
+    actions taken. Environments are deterministic given these, so every
+    observation and frame of the episode can be rebuilt by `EpisodeReplay`
+    instead of being stored.
+
+    Snapshots of the environment can be stored every few steps as
+    checkpoints, which replays fast-forward from. Episodes reset without a
+    seed can only be replayed from a checkpoint taken on reset. Checkpoints
+    hold the state serialized by `MiniGridEnv.to_bytes` and the extra state
+    serialized by `MiniGridEnv.extra_state_to_bytes`, whose attributes
+    added by subclasses, such as the BabyAI instructions, are unpickled
+    when replaying, restricted to the classes of minigrid. Logs holding
+    such checkpoints should still come from trusted sources.
+    """
+
+    def __init__(
+        self,
+        env_id: str,
+        env_kwargs: dict[str, Any] | None = None,
+        seed: int | None = None,
+        options: dict[str, Any] | None = None,
+        actions: list[int] | None = None,
+        checkpoints: dict[int, tuple[bytes, bytes]] | None = None,
+    ):
+        self.env_id = env_id
+        self.env_kwargs = env_kwargs or {}
+        self.seed = seed
+        self.options = options
+        self.actions: list[int] = list(actions or [])
+
+        # Serialized states and extra states of the environment, by number of
+        # steps taken
+        self.checkpoints: dict[int, tuple[bytes, bytes]] = dict(checkpoints or {})
+
+    def __len__(self) -> int:
+        """Number of steps of the episode"""
+        return len(self.actions)
+
+    def add_checkpoint(self, env: MiniGridEnv):
+        """
+        Store a snapshot of an environment playing this episode, after the
+        actions logged so far
+        """
+        env = env.unwrapped
+        self.checkpoints[len(self.actions)] = (
+            env.to_bytes(),
+            env.extra_state_to_bytes(),
+        )
+
+    def save(self, path: str | os.PathLike):
+        """
+        Save the log into a `.npz` file, with the actions as an array of
+        bytes and the states and extra states of the checkpoints each
+        concatenated into a single array
+        """
+
+        meta = {
+            "version": EPISODE_LOG_VERSION,
+            "env_id": self.env_id,
+            "env_kwargs": encode_kwargs(self.env_kwargs),
+            "seed": self.seed,
+            "options": self.options,
+        }
+        steps = sorted(self.checkpoints)
+        states = [self.checkpoints[step][0] for step in steps]
+        extra_states = [self.checkpoints[step][1] for step in steps]
+        np.savez_compressed(
+            path,
+            meta=np.frombuffer(json.dumps(meta).encode(), np.uint8),
+            actions=np.array(self.actions, dtype=np.uint8),
+            checkpoint_steps=np.array(steps, dtype=np.int64),
+            checkpoint_offsets=np.cumsum([0] + [len(state) for state in states]),
+            checkpoints=np.frombuffer(b"".join(states), np.uint8),
+            extra_offsets=np.cumsum([0] + [len(state) for state in extra_states]),
+            extra_checkpoints=np.frombuffer(b"".join(extra_states), np.uint8),
+        )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> EpisodeLog:
+        """
+        Load a log saved with `save`. The checkpoints are only unpickled
+        when replaying them, see `EpisodeReplay`.
+        """
+
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes())
+            if meta["version"] != EPISODE_LOG_VERSION:
+                raise ValueError(
+                    f"unsupported episode log version {meta['version']}, "
+                    f"expected {EPISODE_LOG_VERSION}"
+                )
+            offsets = data["checkpoint_offsets"]
+            states = data["checkpoints"]
+            extra_offsets = data["extra_offsets"]
+            extra_states = data["extra_checkpoints"]
+            checkpoints = {}
+            for k, step in enumerate(data["checkpoint_steps"]):
+                start, end = offsets[k], offsets[k + 1]
+                extra_start, extra_end = extra_offsets[k], extra_offsets[k + 1]
+                checkpoints[int(step)] = (
+                    states[start:end].tobytes(),
+                    extra_states[extra_start:extra_end].tobytes(),
+                )
+            actions = data["actions"].tolist()
+
+        return cls(
+            meta["env_id"],
+            decode_kwargs(meta["env_kwargs"]),
+            meta["seed"],
+            meta["options"],
+            actions,
+            checkpoints,
+        )
+
+
+class EpisodeReplay:
+    """
+    Play a logged episode again to rebuild its observations and frames on
+    demand, in any order. Seeking to a step continues from the current step
+    when going forward, or else restores the nearest checkpoint before it,
+    or resets the environment, and fast-forwards through the actions.
+    Restoring a checkpoint unpickles the attributes added to the state by
+    subclasses, restricted to the classes of minigrid, so logs with
+    checkpoints should only be replayed from trusted sources.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.utils.episode_log import EpisodeLog, EpisodeReplay
+        >>> env = gym.make("MiniGrid-Empty-5x5-v0")
+        >>> _ = env.reset(seed=0)
+        >>> log = EpisodeLog("MiniGrid-Empty-5x5-v0", seed=0)
+        >>> for action in [1, 2, 2]:
+        ...     obs, *_ = env.step(action)
+        ...     log.actions.append(action)
+        >>> replay = EpisodeReplay(log)
+        >>> bool((replay.observation(3)["image"] == obs["image"]).all())
+        True
+    """
+
+    def __init__(self, log: EpisodeLog, env: MiniGridEnv | None = None):
+        self.log = log
+        if env is None:
+            env = gym.make(log.env_id, **log.env_kwargs)
+        self.env: MiniGridEnv = env.unwrapped
+
+        # Number of logged actions played since the start of the episode,
+        # -1 before the environment is reset
+        self.step_count = -1
+
+    def __len__(self) -> int:
+        """Number of observations of the episode, including the first one"""
+        return len(self.log) + 1
+
+    def seek(self, step: int) -> MiniGridEnv:
+        """
+        Bring the environment to its state after `step` actions of the
+        episode, and return it
+        """
+
+        if not 0 <= step <= len(self.log):
+            raise IndexError(f"step {step} out of range for {len(self)} steps")
+
+        checkpoint = max((s for s in self.log.checkpoints if s <= step), default=None)
+        if not 0 <= self.step_count <= step or (
+            checkpoint is not None and checkpoint > self.step_count
+        ):
+            if checkpoint is not None:
+                # Set the attributes which are only initialized by reset
+                if self.step_count < 0:
+                    self.env.reset(seed=self.log.seed, options=self.log.options)
+                state, extra_state = self.log.checkpoints[checkpoint]
+                self.env.load_bytes(state)
+                self.env.load_extra_state_bytes(extra_state)
+                self.step_count = checkpoint
+            elif self.log.seed is not None:
+                self.env.reset(seed=self.log.seed, options=self.log.options)
+                self.step_count = 0
+            else:
+                raise ValueError(
+                    "episodes reset without a seed need a checkpoint on reset"
+                )
+
+        while self.step_count < step:
+            self.env.step(self.log.actions[self.step_count])
+            self.step_count += 1
+
+        return self.env
+
+    def observation(self, step: int) -> dict[str, Any]:
+        """
+        Observation of the unwrapped environment after `step` actions
+        """
+        return self.seek(step).gen_obs()
+
+    def frame(
+        self,
+        step: int,
+        highlight: bool = True,
+        tile_size: int = TILE_PIXELS,
+        agent_pov: bool = False,
+    ) -> np.ndarray:
+        """
+        Frame rendered by `get_frame` after `step` actions
+        """
+        return self.seek(step).get_frame(highlight, tile_size, agent_pov)
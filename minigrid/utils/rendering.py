@@ -7,32 +7,54 @@ import numpy as np
 
 def downsample(img, factor):
     """
-    Downsample an image along both dimensions by some factor
+    Downsample an image along both dimensions by some factor, averaging
+    each block of pixels. Integer images are summed with integer
+    accumulators and divided with rounding, keeping their dtype.
     """
 
     assert img.shape[0] % factor == 0
     assert img.shape[1] % factor == 0
 
-    img = img.reshape(
-        [img.shape[0] // factor, factor, img.shape[1] // factor, factor, 3]
-    )
-    img = img.mean(axis=3)
-    img = img.mean(axis=1)
+    if factor == 1:
+        return img
 
-    return img
+    height, width = img.shape[0] // factor, img.shape[1] // factor
+    if not np.issubdtype(img.dtype, np.integer):
+        img = img.reshape([height, factor, width, factor, -1])
+        return img.mean(axis=(1, 3))
+
+    # Adding the strided slices is much faster than reducing the short
+    # block axes with sum(); uint8 blocks of up to 16x16 fit into uint16
+    area = factor * factor
+    acc_dtype = np.uint16 if img.dtype == np.uint8 and area <= 256 else np.int64
+
+    # Sum the rows of each block, then the columns
+    img = img.reshape([height, factor, -1])
+    rows = img[:, 0].astype(acc_dtype)
+    for dy in range(1, factor):
+        rows += img[:, dy]
+    rows = rows.reshape([height, width, factor, -1])
+    total = rows[:, :, 0].copy()
+    for dx in range(1, factor):
+        total += rows[:, :, dx]
+
+    # Divide with rounding to the nearest value
+    total += area // 2
+    total //= area
+    return total.astype(img.dtype)
 
 
 def fill_coords(img, fn, color):
     """
-    Fill pixels of an image with coordinates matching a filter function
+    Fill pixels of an image with coordinates matching a filter function.
+    The function is called once with arrays of the pixel center coordinates
+    and must return a boolean mask of the pixels to fill.
     """
 
-    for y in range(img.shape[0]):
-        for x in range(img.shape[1]):
-            yf = (y + 0.5) / img.shape[0]
-            xf = (x + 0.5) / img.shape[1]
-            if fn(xf, yf):
-                img[y, x] = color
+    yf = (np.arange(img.shape[0]) + 0.5) / img.shape[0]
+    xf = (np.arange(img.shape[1]) + 0.5) / img.shape[1]
+    mask = np.broadcast_to(fn(xf[None, :], yf[:, None]), img.shape[:2])
+    img[mask] = color
 
     return img
 
@@ -57,25 +79,17 @@ def point_in_line(x0, y0, x1, y1, r):
     dist = np.linalg.norm(dir)
     dir = dir / dist
 
-    xmin = min(x0, x1) - r
-    xmax = max(x0, x1) + r
-    ymin = min(y0, y1) - r
-    ymax = max(y0, y1) + r
-
     def fn(x, y):
-        # Fast, early escape test
-        if x < xmin or x > xmax or y < ymin or y > ymax:
-            return False
-
-        q = np.array([x, y])
-        pq = q - p0
+        pqx = x - p0[0]
+        pqy = y - p0[1]
 
         # Closest point on line
-        a = np.dot(pq, dir)
+        a = pqx * dir[0] + pqy * dir[1]
         a = np.clip(a, 0, dist)
-        p = p0 + a * dir
+        px = p0[0] + a * dir[0]
+        py = p0[1] + a * dir[1]
 
-        dist_to_line = np.linalg.norm(q - p)
+        dist_to_line = np.sqrt((x - px) * (x - px) + (y - py) * (y - py))
         return dist_to_line <= r
 
     return fn
@@ -90,7 +104,7 @@ def point_in_circle(cx, cy, r):
 
 def point_in_rect(xmin, xmax, ymin, ymax):
     def fn(x, y):
-        return x >= xmin and x <= xmax and y >= ymin and y <= ymax
+        return (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
 
     return fn
 
@@ -100,25 +114,27 @@ def point_in_triangle(a, b, c):
     b = np.array(b, dtype=np.float32)
     c = np.array(c, dtype=np.float32)
 
-    def fn(x, y):
-        v0 = c - a
-        v1 = b - a
-        v2 = np.array((x, y)) - a
+    v0 = c - a
+    v1 = b - a
 
-        # Compute dot products
-        dot00 = np.dot(v0, v0)
-        dot01 = np.dot(v0, v1)
-        dot02 = np.dot(v0, v2)
-        dot11 = np.dot(v1, v1)
-        dot12 = np.dot(v1, v2)
+    # Compute dot products
+    dot00 = np.dot(v0, v0)
+    dot01 = np.dot(v0, v1)
+    dot11 = np.dot(v1, v1)
+    inv_denom = 1 / (dot00 * dot11 - dot01 * dot01)
+
+    def fn(x, y):
+        v2x = x - a[0]
+        v2y = y - a[1]
+        dot02 = v0[0] * v2x + v0[1] * v2y
+        dot12 = v1[0] * v2x + v1[1] * v2y
 
         # Compute barycentric coordinates
-        inv_denom = 1 / (dot00 * dot11 - dot01 * dot01)
         u = (dot11 * dot02 - dot01 * dot12) * inv_denom
         v = (dot00 * dot12 - dot01 * dot02) * inv_denom
 
         # Check if point is in triangle
-        return (u >= 0) and (v >= 0) and (u + v) < 1
+        return (u >= 0) & (v >= 0) & ((u + v) < 1)
 
     return fn
 
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from typing import Iterator
+
+import numpy as np
+
+# Columns of the trajectory shards and their types. Each row holds an
+# observation, the action taken after it and the results of that action.
+TRAJECTORY_COLUMNS = {
+    "image": np.uint8,
+    "direction": np.int8,
+    "mission": np.int32,
+    "action": np.int8,
+    "reward": np.float32,
+    "terminated": bool,
+    "truncated": bool,
+    "episode": np.int64,
+}
+
+
+class ShardWriter:
+    """
+    Write rows of trajectories into fixed-size columnar shards in a
+    background thread, so that adding rows never waits on the disk.
+
+    Rows are added into preallocated columns, which are handed over to the
+    thread once `shard_size` rows are filled. The queue of shards is
+    bounded, so that `add` blocks rather than buffering shards without
+    limit when the disk falls behind. Missions are stored as ids into a
+    table of distinct missions, each shard holding the missions first seen
+    in it. Errors from the thread are raised by the next call to `add`,
+    `flush` or `close`.
+
+    Shards are written as directories of `.npy` files, one per column,
+    which `ShardReader` memory-maps. They are written into temporary
+    directories which are then renamed, so that readers never see partial
+    shards.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        image_shape: tuple[int, ...],
+        shard_size: int = 2**16,
+        max_queue: int = 2,
+    ):
+        self.folder = os.path.abspath(folder)
+        os.makedirs(self.folder, exist_ok=True)
+        if any(name.startswith("shard-") for name in os.listdir(self.folder)):
+            raise FileExistsError(f"{self.folder} already holds shards")
+
+        self.image_shape = tuple(image_shape)
+        self.shard_size = shard_size
+        self.num_shards = 0
+
+        # Table of the missions, and the missions added since the last shard
+        self.mission_ids: dict[str, int] = {}
+        self._new_missions: list[str] = []
+
+        self._columns = self._new_columns()
+        self._size = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(
+            target=self._run, name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+
+    def add(
+        self,
+        image: np.ndarray,
+        direction: int,
+        mission: str,
+        action: int,
+        reward: float,
+        terminated: bool,
+        truncated: bool,
+        episode: int,
+    ):
+        """
+        Add a row, starting a new shard once the current one is full
+        """
+
+        mission_id = self.mission_ids.get(mission)
+        if mission_id is None:
+            mission_id = self.mission_ids[mission] = len(self.mission_ids)
+            self._new_missions.append(mission)
+
+        n = self._size
+        columns = self._columns
+        columns["image"][n] = image
+        columns["direction"][n] = direction
+        columns["mission"][n] = mission_id
+        columns["action"][n] = action
+        columns["reward"][n] = reward
+        columns["terminated"][n] = terminated
+        columns["truncated"][n] = truncated
+        columns["episode"][n] = episode
+        self._size += 1
+
+        if self._size == self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Queue the rows added since the last shard as a new shard, which may
+        then be smaller than `shard_size`
+        """
+
+        self._raise_error()
+        if self._size == 0:
+            return
+
+        columns = {name: column[: self._size] for name, column in self._columns.items()}
+        missions = {
+            "first_id": len(self.mission_ids) - len(self._new_missions),
+            "missions": self._new_missions,
+        }
+        self._put(("shard", (self.num_shards, columns, missions)))
+        self.num_shards += 1
+
+        self._columns = self._new_columns()
+        self._size = 0
+        self._new_missions = []
+
+    def close(self):
+        """
+        Write the last shard and wait until all the shards are written
+        """
+
+        # Stop the thread even if writing failed, then raise the error
+        if self._error is None:
+            self.flush()
+        if self._thread is not None:
+            self._queue.put(("close", None))
+            self._thread.join()
+            self._thread = None
+        self._raise_error()
+
+    def _new_columns(self) -> dict[str, np.ndarray]:
+        return {
+            name: np.empty(
+                (self.shard_size,) + (self.image_shape if name == "image" else ()),
+                dtype=dtype,
+            )
+            for name, dtype in TRAJECTORY_COLUMNS.items()
+        }
+
+    def _put(self, item):
+        self._raise_error()
+        self._queue.put(item)
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("writing trajectory shards failed") from error
+
+    def _run(self):
+        while True:
+            command, data = self._queue.get()
+            if command == "close":
+                break
+            if self._error is not None:
+                continue
+
+            index, columns, missions = data
+            tmp_path = None
+            try:
+                tmp_path = tempfile.mkdtemp(dir=self.folder, prefix=".tmp-")
+                for name, column in columns.items():
+                    np.save(os.path.join(tmp_path, f"{name}.npy"), column)
+                with open(os.path.join(tmp_path, "missions.json"), "w") as f:
+                    json.dump(missions, f)
+                os.chmod(tmp_path, 0o755)
+                os.rename(tmp_path, os.path.join(self.folder, f"shard-{index:06d}"))
+            except Exception as error:
+                self._error = error
+                if tmp_path is not None:
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+class ShardReader:
+    """
+    Read the trajectory shards written by a `ShardWriter`, with the
+    columns of each shard opened as read-only memory-mapped arrays, so that
+    only the rows being read are loaded from the disk.
+
+    Example:
+        >>> from minigrid.utils.trajectories import ShardReader
+        >>> reader = ShardReader("trajectories")  # doctest: +SKIP
+        >>> for batch in reader.iter_batches(256):  # doctest: +SKIP
+        ...     missions = [reader.missions[k] for k in batch["mission"]]
+    """
+
+    def __init__(self, folder: str):
+        self.folder = os.path.abspath(folder)
+        names = sorted(
+            name for name in os.listdir(self.folder) if name.startswith("shard-")
+        )
+
+        self.shards: list[dict[str, np.ndarray]] = []
+        self.missions: list[str] = []
+        for name in names:
+            path = os.path.join(self.folder, name)
+            with open(os.path.join(path, "missions.json")) as f:
+                missions = json.load(f)
+            if missions["first_id"] != len(self.missions):
+                raise ValueError(f"missing shards before {name}")
+            self.missions.extend(missions["missions"])
+            self.shards.append(
+                {
+                    column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+                    for column in TRAJECTORY_COLUMNS
+                }
+            )
+
+    def __len__(self) -> int:
+        """Number of rows of all the shards"""
+        return sum(len(shard["action"]) for shard in self.shards)
+
+    def iter_batches(
+        self,
+        batch_size: int,
+        columns: list[str] | None = None,
+        drop_last: bool = False,
+    ) -> Iterator[dict[str, np.ndarray]]:
+        """
+        Iterate over the rows in batches of `batch_size` rows, with the
+        given columns only if any. Batches within a shard are views of the
+        memory-mapped columns, batches spanning shards are copied.
+        """
+
+        columns = list(TRAJECTORY_COLUMNS) if columns is None else columns
+        pending: list[dict[str, np.ndarray]] = []
+        num_pending = 0
+
+        for shard in self.shards:
+            size = len(shard["action"])
+            start = 0
+            while start < size:
+                end = min(size, start + batch_size - num_pending)
+                pending.append({name: shard[name][start:end] for name in columns})
+                num_pending += end - start
+                start = end
+
+                if num_pending == batch_size:
+                    yield _concatenate(pending)
+                    pending, num_pending = [], 0
+
+        if pending and not drop_last:
+            yield _concatenate(pending)
+
+
+def _concatenate(parts: list[dict[str, np.ndarray]]) -> dict[str, np.ndarray]:
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Sequence
+
+import numpy as np
+from gymnasium.error import DependencyNotInstalled
+
+
+def find_ffmpeg() -> str:
+    """
+    Find the ffmpeg executable, on the `PATH` or bundled with the
+    `imageio-ffmpeg` package
+    """
+
+    path = shutil.which("ffmpeg")
+    if path is not None:
+        return path
+
+    try:
+        import imageio_ffmpeg
+    except ImportError:
+        raise DependencyNotInstalled(
+            "ffmpeg is not installed, install it or run `pip install imageio-ffmpeg`"
+        )
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def render_mission(mission: str, width: int, height: int) -> np.ndarray:
+    """
+    Render a mission string in black, centered on a white `(height, width)`
+    strip, without a display. Text wider than the strip is clipped.
+    """
+
+    import pygame.freetype
+
+    if not pygame.freetype.get_init():
+        pygame.freetype.init()
+
+    strip = np.full((height, width, 3), 255, dtype=np.uint8)
+    font_size = max(1, height // 2)
+    font = pygame.freetype.Font(None, font_size)
+    surf, _ = font.render(mission, fgcolor=(0, 0, 0), bgcolor=(255, 255, 255))
+    text = pygame.surfarray.array3d(surf).transpose(1, 0, 2)
+
+    # Center the text, cropping it if needed
+    text_height, text_width = min(text.shape[0], height), min(text.shape[1], width)
+    y0 = (text.shape[0] - text_height) // 2
+    x0 = (text.shape[1] - text_width) // 2
+    text = text[y0:, x0:][:text_height, :text_width]
+    top, left = (height - text_height) // 2, (width - text_width) // 2
+    bottom, right = top + text_height, left + text_width
+    strip[top:bottom, left:right] = text
+    return strip
+
+
+def frame_layout(
+    frame_shape: tuple[int, ...], show_mission: bool = True
+) -> tuple[tuple[int, int], tuple[int, int]]:
+    """
+    Get the `(height, width)` of the video frames holding frames of a given
+    shape, and the `(top, left)` position of the frames in them. With the
+    mission shown, frames get white borders as in the human render mode,
+    with the mission in the bottom border. Videos frames have even sizes,
+    as required by most codecs.
+    """
+
+    height, width = frame_shape[:2]
+    border = 2 * -(-width // 20) if show_mission else 0
+    video_height = height + border + (height + border) % 2
+    video_width = width + border + (width + border) % 2
+    return (video_height, video_width), (0, (video_width - width) // 2)
+
+
+class VideoRecorder:
+    """
+    Encode frames into video files with ffmpeg in a background thread,
+    without a display or throttling.
+
+    Frames are queued together with the mission to show below them, which
+    is only rendered again when it changes. The queue is bounded, so that
+    `write` blocks rather than buffering frames without limit when the
+    encoder falls behind. Queued frames must not be modified afterwards.
+    Errors from the encoder are raised by the next call to `start`,
+    `write`, `finish` or `close`, and the rest of the failed video is
+    dropped.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.utils.video import VideoRecorder
+        >>> env = gym.make("MiniGrid-Empty-5x5-v0").unwrapped
+        >>> _ = env.reset(seed=0)
+        >>> recorder = VideoRecorder(fps=10)  # doctest: +SKIP
+        >>> recorder.start("episode.mp4", env.get_frame().shape)  # doctest: +SKIP
+        >>> recorder.write(env.get_frame(), env.mission)  # doctest: +SKIP
+        >>> recorder.close()  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        fps: int = 10,
+        show_mission: bool = True,
+        max_queue: int = 256,
+        ffmpeg: str | None = None,
+        output_args: Sequence[str] = ("-pix_fmt", "yuv420p"),
+    ):
+        self.fps = fps
+        self.show_mission = show_mission
+        self.ffmpeg = ffmpeg or find_ffmpeg()
+        self.output_args = tuple(output_args)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._error: BaseException | None = None
+        self._thread: threading.Thread | None = None
+        self._recording = False
+        self._frame_shape: tuple[int, ...] = ()
+        self._mission: tuple[str | None, np.ndarray | None] = (None, None)
+
+    @property
+    def recording(self) -> bool:
+        return self._recording
+
+    def start(self, path: str | os.PathLike, frame_shape: tuple[int, ...]):
+        """
+        Start a new video file for frames of a given shape, finishing the
+        current one if any
+        """
+
+        if self._recording:
+            self.finish()
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=type(self).__name__, daemon=True
+            )
+            self._thread.start()
+        self._put(("start", (os.fspath(path), tuple(frame_shape))))
+        self._recording = True
+        self._frame_shape = tuple(frame_shape)
+        self._mission = (None, None)
+
+    def write(self, frame: np.ndarray, mission: str | None = None):
+        """
+        Queue a frame, and the mission to show below it
+        """
+
+        assert self._recording, "start a video before writing frames"
+        assert frame.shape == self._frame_shape, "frames must keep the same shape"
+
+        strip = None
+        if self.show_mission and mission is not None:
+            if mission != self._mission[0]:
+                (height, width), _ = frame_layout(self._frame_shape)
+                strip = render_mission(mission, width, height - frame.shape[0])
+                self._mission = (mission, strip)
+            strip = self._mission[1]
+
+        self._put(("frame", (frame, strip)))
+
+    def finish(self):
+        """
+        Finish the current video file, without waiting for it to be encoded
+        """
+
+        if self._recording:
+            self._put(("finish", None))
+            self._recording = False
+
+    def close(self):
+        """
+        Finish the current video file and wait until all the queued frames
+        are encoded
+        """
+
+        # Stop the thread even if encoding failed, then raise the error
+        if self._recording:
+            self._queue.put(("finish", None))
+            self._recording = False
+        if self._thread is not None:
+            self._queue.put(("close", None))
+            self._thread.join()
+            self._thread = None
+        self._raise_error()
+
+    def _put(self, item):
+        self._raise_error()
+        self._queue.put(item)
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("video encoding failed") from error
+
+    def _run(self):
+        process = None
+        video = np.empty((0, 0, 3), dtype=np.uint8)
+        mission = None
+        top = left = 0
+
+        while True:
+            command, data = self._queue.get()
+
+            try:
+                if command == "start":
+                    path, frame_shape = data
+                    (height, width), (top, left) = frame_layout(
+                        frame_shape, self.show_mission
+                    )
+                    video = np.full((height, width, 3), 255, dtype=np.uint8)
+                    mission = None
+                    process = subprocess.Popen(
+                        [
+                            self.ffmpeg,
+                            "-y",
+                            "-loglevel",
+                            "error",
+                            "-f",
+                            "rawvideo",
+                            "-pix_fmt",
+                            "rgb24",
+                            "-s",
+                            f"{width}x{height}",
+                            "-r",
+                            str(self.fps),
+                            "-i",
+                            "-",
+                            *self.output_args,
+                            path,
+                        ],
+                        stdin=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                    )
+
+                elif command == "frame" and process is not None:
+                    frame, strip = data
+                    bottom = top + frame.shape[0]
+                    right = left + frame.shape[1]
+                    video[top:bottom, left:right] = frame
+
+                    # Only copy the mission when it changes
+                    if strip is not None and strip is not mission:
+                        video[bottom:] = strip
+                        mission = strip
+                    process.stdin.write(video.data)
+
+                elif command in ("finish", "close") and process is not None:
+                    _, stderr = process.communicate()
+                    returncode, process = process.returncode, None
+                    if returncode != 0:
+                        raise RuntimeError(
+                            f"ffmpeg exited with code {returncode}:\n"
+                            f"{stderr.decode(errors='replace')}"
+                        )
+
+            except Exception as error:
+                self._error = error
+                if process is not None:
+                    process.kill()
+                    _, stderr = process.communicate()
+                    if stderr:
+                        self._error = RuntimeError(stderr.decode(errors="replace"))
+                        self._error.__cause__ = error
+                    process = None
+
+            if command == "close":
+                break
@@ -0,0 +1,4 @@
+from __future__ import annotations
+
+from minigrid.vector.subproc_vec_minigrid_env import SubprocVecMiniGridEnv
+from minigrid.vector.vec_minigrid_env import VecMiniGridEnv
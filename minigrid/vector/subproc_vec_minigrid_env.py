@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import ctypes
+import multiprocessing as mp
+import os
+import traceback
+from typing import Any, Callable, Iterable
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import VectorEnv
+from gymnasium.vector.utils import CloudpickleWrapper
+
+
+class _SharedArray:
+    """
+    NumPy array in shared memory which can be passed to worker processes
+    """
+
+    def __init__(self, shape: tuple[int, ...], dtype: Any):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * self.dtype.itemsize
+        self.buffer = mp.RawArray(ctypes.c_uint8, max(size, 1))
+
+    def array(self) -> np.ndarray:
+        array = np.frombuffer(self.buffer, dtype=self.dtype)
+        return array[: int(np.prod(self.shape))].reshape(self.shape)
+
+
+class SubprocVecMiniGridEnv(VectorEnv):
+    """
+    Vectorized environment running MiniGrid environments in worker
+    processes, for environments which `VecMiniGridEnv` cannot batch, such
+    as BabyAI levels.
+
+    Each worker steps a contiguous block of environments per message and
+    writes the results into shared memory:
+
+    - image observations go into a ring of `num_buffers` buffers, so the
+      observations of a step stay valid during the following
+      `num_buffers - 1` steps when `copy=False`
+    - missions are written as integer ids, the mission strings are only
+      sent through the pipes the first time a worker sees them
+    - rewards, terminations, truncations and directions go into arrays
+
+    Only the actions of each step and non-empty infos travel through the
+    pipes. Environments are reset automatically in the workers at the end
+    of an episode, with the final observation and info stored in
+    `info["final_observation"]` and `info["final_info"]` as in
+    `gymnasium.vector.AsyncVectorEnv`.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.vector import SubprocVecMiniGridEnv
+        >>> envs = SubprocVecMiniGridEnv(
+        ...     [lambda: gym.make("BabyAI-GoToRedBallGrey-v0")] * 4, num_workers=2
+        ... )
+        >>> obs, _ = envs.reset(seed=0)
+        >>> obs["image"].shape
+        (4, 7, 7, 3)
+        >>> obs["mission"]
+        ('go to the red ball', 'go to the red ball', 'go to the red ball', 'go to the red ball')
+        >>> envs.close()
+    """
+
+    def __init__(
+        self,
+        env_fns: Iterable[Callable[[], gym.Env]],
+        num_workers: int | None = None,
+        num_buffers: int = 2,
+        copy: bool = True,
+        context: str | None = None,
+    ):
+        env_fns = list(env_fns)
+        num_envs = len(env_fns)
+
+        # Get the spaces from a dummy environment
+        dummy_env = env_fns[0]()
+        observation_space = dummy_env.observation_space
+        action_space = dummy_env.action_space
+        dummy_env.close()
+        del dummy_env
+
+        if not (
+            isinstance(observation_space, spaces.Dict)
+            and {"image", "direction", "mission"} <= set(observation_space.spaces)
+        ):
+            raise ValueError(
+                "SubprocVecMiniGridEnv requires MiniGrid dictionary observations, "
+                f"got {observation_space}"
+            )
+
+        super().__init__(num_envs, observation_space, action_space)
+
+        assert num_buffers >= 1
+        self.num_buffers = num_buffers
+        self.copy = copy
+
+        # Shared memory
+        image_shape = observation_space["image"].shape
+        self._shared = {
+            "images": _SharedArray((num_buffers, num_envs) + image_shape, np.uint8),
+            "final_images": _SharedArray((num_envs,) + image_shape, np.uint8),
+            "actions": _SharedArray((num_envs,), np.int64),
+            "rewards": _SharedArray((num_envs,), np.float64),
+            "terminated": _SharedArray((num_envs,), bool),
+            "truncated": _SharedArray((num_envs,), bool),
+            "directions": _SharedArray((num_envs,), np.int64),
+            "final_directions": _SharedArray((num_envs,), np.int64),
+            "mission_ids": _SharedArray((num_envs,), np.int64),
+            "final_mission_ids": _SharedArray((num_envs,), np.int64),
+        }
+        self._arrays = {name: shared.array() for name, shared in self._shared.items()}
+
+        # Split the environments into contiguous blocks, one per worker
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, num_envs))
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self._blocks = list(zip(bounds[:-1], bounds[1:]))
+
+        # Mission strings seen by each worker, indexed by their id
+        self._mission_tables: list[list[str]] = [[] for _ in self._blocks]
+        self._env_workers = np.repeat(np.arange(num_workers), np.diff(bounds))
+        self._mission_ids = None
+        self._missions = ()
+
+        ctx = mp.get_context(context)
+        self.parent_pipes, self.processes = [], []
+        for start, stop in self._blocks:
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                name=f"Worker<{type(self).__name__}>-{start}:{stop}",
+                args=(
+                    [CloudpickleWrapper(env_fn) for env_fn in env_fns[start:stop]],
+                    start,
+                    self._shared,
+                    child_pipe,
+                    parent_pipe,
+                ),
+                daemon=True,
+            )
+            self.parent_pipes.append(parent_pipe)
+            self.processes.append(process)
+            process.start()
+            child_pipe.close()
+
+        self._step_index = 0
+
+    def reset_async(
+        self,
+        seed: int | list[int] | None = None,
+        options: dict[str, Any] | None = None,
+    ):
+        if seed is None:
+            seed = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+
+        self._slot = self._step_index % self.num_buffers
+        for pipe, (start, stop) in zip(self.parent_pipes, self._blocks):
+            pipe.send(("reset", (self._slot, seed[start:stop], options)))
+
+    def reset_wait(
+        self,
+        seed: int | list[int] | None = None,
+        options: dict[str, Any] | None = None,
+    ):
+        infos = {}
+        for i, info in self._receive():
+            infos = self._add_info(infos, info, i)
+
+        self._step_index += 1
+        return self._get_obs(), infos
+
+    def step_async(self, actions):
+        self._arrays["actions"][:] = actions
+        self._slot = self._step_index % self.num_buffers
+        for pipe in self.parent_pipes:
+            pipe.send(("step", self._slot))
+
+    def step_wait(self):
+        worker_infos = self._receive()
+        terminated = self._arrays["terminated"].copy()
+        truncated = self._arrays["truncated"].copy()
+
+        infos = {}
+        for i, info in worker_infos:
+            if terminated[i] or truncated[i]:
+                info["final_observation"] = {
+                    "image": self._arrays["final_images"][i].copy(),
+                    "direction": self._arrays["final_directions"][i],
+                    "mission": self._mission(i, self._arrays["final_mission_ids"][i]),
+                }
+            infos = self._add_info(infos, info, i)
+
+        self._step_index += 1
+        return (
+            self._get_obs(),
+            self._arrays["rewards"].copy(),
+            terminated,
+            truncated,
+            infos,
+        )
+
+    def _receive(self) -> list[tuple[int, dict[str, Any]]]:
+        """
+        Wait for all the workers to reply, and collect the new mission
+        strings and the infos of the environments
+        """
+
+        infos = []
+        for worker, pipe in enumerate(self.parent_pipes):
+            success, result = pipe.recv()
+            if not success:
+                raise RuntimeError(f"worker {worker} failed:\n{result}")
+            new_missions, worker_infos = result
+            self._mission_tables[worker].extend(new_missions)
+            infos.extend(worker_infos)
+        return infos
+
+    def _mission(self, i: int, mission_id: int) -> str:
+        return self._mission_tables[self._env_workers[i]][mission_id]
+
+    def _get_obs(self) -> dict[str, Any]:
+        images = self._arrays["images"][self._slot]
+
+        # Only look up the mission strings when some of them changed
+        mission_ids = self._arrays["mission_ids"]
+        if self._mission_ids is None or not np.array_equal(
+            mission_ids, self._mission_ids
+        ):
+            self._mission_ids = mission_ids.copy()
+            self._missions = tuple(
+                self._mission(i, mission_id) for i, mission_id in enumerate(mission_ids)
+            )
+
+        return {
+            "image": images.copy() if self.copy else images,
+            "direction": self._arrays["directions"].copy(),
+            "mission": self._missions,
+        }
+
+    def close_extras(self, timeout: float | None = None, terminate: bool = False):
+        for pipe in self.parent_pipes:
+            if not pipe.closed:
+                try:
+                    pipe.send(("close", None))
+                    pipe.recv()
+                except (BrokenPipeError, EOFError):
+                    pass
+                pipe.close()
+
+        for process in self.processes:
+            if terminate:
+                process.terminate()
+            process.join(timeout)
+
+
+def _worker(env_fns, start, shared, pipe, parent_pipe):
+    parent_pipe.close()
+
+    try:
+        envs = [env_fn() for env_fn in env_fns]
+        arrays = {name: shared_array.array() for name, shared_array in shared.items()}
+        mission_ids: dict[str, int] = {}
+        new_missions: list[str] = []
+
+        def write_obs(i, obs, slot, prefix=""):
+            if prefix:
+                arrays["final_images"][i] = obs["image"]
+            else:
+                arrays["images"][slot, i] = obs["image"]
+            arrays[f"{prefix}directions"][i] = obs["direction"]
+
+            mission = obs["mission"]
+            if mission not in mission_ids:
+                mission_ids[mission] = len(mission_ids)
+                new_missions.append(mission)
+            arrays[f"{prefix}mission_ids"][i] = mission_ids[mission]
+
+        while True:
+            command, data = pipe.recv()
+            infos = []
+
+            if command == "reset":
+                slot, seeds, options = data
+                for i, (env, seed) in enumerate(zip(envs, seeds), start):
+                    obs, info = env.reset(seed=seed, options=options)
+                    write_obs(i, obs, slot)
+                    if info:
+                        infos.append((i, info))
+
+            elif command == "step":
+                slot = data
+                for i, env in enumerate(envs, start):
+                    obs, reward, terminated, truncated, info = env.step(
+                        arrays["actions"][i]
+                    )
+                    arrays["rewards"][i] = reward
+                    arrays["terminated"][i] = terminated
+                    arrays["truncated"][i] = truncated
+
+                    if terminated or truncated:
+                        write_obs(i, obs, slot, prefix="final_")
+                        final_info = info
+                        obs, info = env.reset()
+                        info["final_info"] = final_info
+                    write_obs(i, obs, slot)
+                    if info:
+                        infos.append((i, info))
+
+            elif command == "close":
+                for env in envs:
+                    env.close()
+                pipe.send((True, None))
+                break
+
+            else:
+                raise RuntimeError(f"unknown command {command}")
+
+            pipe.send((True, (new_missions, infos)))
+            new_missions.clear()
+
+    except (KeyboardInterrupt, Exception):
+        pipe.send((False, traceback.format_exc()))
+    finally:
+        pipe.close()
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable
+
+import gymnasium as gym
+import numpy as np
+from gymnasium.vector import VectorEnv
+
+from minigrid.core.actions import Actions
+from minigrid.core.constants import (
+    DIR_TO_VEC,
+    IDX_TO_OBJECT,
+    OBJECT_TO_IDX,
+    STATE_TO_IDX,
+)
+from minigrid.core.grid import WALL_CODE, Grid
+from minigrid.core.world_object import WorldObj
+from minigrid.minigrid_env import MiniGridEnv
+
+EMPTY_CODE = (OBJECT_TO_IDX["empty"], 0, 0)
+
+DIR_TO_VEC_ARRAY = np.array(DIR_TO_VEC, dtype=np.int64)
+
+
+def _object_tables() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tables indexed by (type, state) telling whether the agent can walk over,
+    pick up and see behind each kind of object, taken from the world
+    object classes
+    """
+
+    shape = (len(OBJECT_TO_IDX), len(STATE_TO_IDX))
+    can_overlap = np.zeros(shape, dtype=bool)
+    can_pickup = np.zeros(shape, dtype=bool)
+    opaque = np.zeros(shape, dtype=bool)
+
+    for type_idx, obj_type in IDX_TO_OBJECT.items():
+        if obj_type == "agent":
+            continue
+        for state in range(shape[1]):
+            obj = WorldObj.decode(type_idx, 0, state)
+            can_overlap[type_idx, state] = obj is None or obj.can_overlap()
+            can_pickup[type_idx, state] = obj is not None and obj.can_pickup()
+            opaque[type_idx, state] = obj is not None and not obj.see_behind()
+
+    return can_overlap, can_pickup, opaque
+
+
+CAN_OVERLAP, CAN_PICKUP, OPAQUE = _object_tables()
+
+
+class VecMiniGridEnv(VectorEnv):
+    """
+    Vectorized environment holding the state of several MiniGrid
+    environments in stacked arrays and stepping all of them at once.
+
+    The environments are still generated one by one with their own
+    `reset`, after which their grid, agent position and direction,
+    carried object and step count are copied into the arrays. Steps and
+    observations are then computed on the arrays for the whole batch, so
+    the environment objects are left as generated and no longer reflect
+    the episode.
+
+    Only environments using the default `MiniGridEnv` dynamics are
+    supported, that is which don't override `step`, `_reward` or
+    `gen_obs` (e.g. Empty, FourRooms, DoorKey, Crossing and LavaGap), and
+    whose layouts contain no boxes. All environments must have the same
+    grid size, agent view size and `see_through_walls` setting. Wrappers
+    around the environments are not applied.
+
+    Environments are reset automatically at the end of an episode, with the
+    final observation and info stored in `info["final_observation"]` and
+    `info["final_info"]`, as in `gymnasium.vector.SyncVectorEnv`.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.vector import VecMiniGridEnv
+        >>> envs = VecMiniGridEnv(
+        ...     [lambda: gym.make("MiniGrid-DoorKey-5x5-v0")] * 4
+        ... )
+        >>> obs, _ = envs.reset(seed=0)
+        >>> obs["image"].shape
+        (4, 7, 7, 3)
+        >>> obs, rewards, terminated, truncated, _ = envs.step([0, 1, 2, 3])
+        >>> obs["direction"]
+        array([1, 2, 0, 0])
+    """
+
+    def __init__(self, env_fns: Iterable[Callable[[], gym.Env]]):
+        self.envs: list[MiniGridEnv] = [env_fn().unwrapped for env_fn in env_fns]
+        env = self.envs[0]
+
+        for other in self.envs:
+            self._check_supported(other)
+            if (other.width, other.height) != (env.width, env.height):
+                raise ValueError("all environments must have the same grid size")
+            if other.agent_view_size != env.agent_view_size:
+                raise ValueError("all environments must have the same view size")
+            if other.see_through_walls != env.see_through_walls:
+                raise ValueError(
+                    "all environments must have the same see_through_walls setting"
+                )
+
+        super().__init__(len(self.envs), env.observation_space, env.action_space)
+
+        self.width = env.width
+        self.height = env.height
+        self.agent_view_size = env.agent_view_size
+        self.see_through_walls = env.see_through_walls
+
+        # State of the environments. The grids are stored with a border of
+        # walls as wide as the agent view, so that views never go out of
+        # bounds.
+        n = self.num_envs
+        self._padding = p = self.agent_view_size - 1
+        self._padded_codes = np.empty(
+            (n, self.width + 2 * p, self.height + 2 * p, 3), dtype=np.uint8
+        )
+        self._padded_codes[...] = WALL_CODE
+        self.codes = self._padded_codes[:, p:-p, p:-p]
+        self.agent_pos = np.zeros((n, 2), dtype=np.int64)
+        self.agent_dir = np.zeros(n, dtype=np.int64)
+        self.carrying = np.zeros((n, 3), dtype=np.uint8)
+        self.step_count = np.zeros(n, dtype=np.int64)
+        self.max_steps = np.zeros(n, dtype=np.int64)
+        self.missions: list[str] = [""] * n
+
+        # Offsets in the flattened padded grids from the agent's cell to the
+        # cells of its view, for each direction. The agent is at the bottom
+        # center of its view, looking up, and the view columns go to the
+        # right of the agent.
+        size = self.agent_view_size
+        forward = size - 1 - np.arange(size)[None, :]
+        right = np.arange(size)[:, None] - size // 2
+        padded_height = self._padded_codes.shape[2]
+        self._view_offsets = np.array(
+            [
+                (dx * forward - dy * right) * padded_height + dy * forward + dx * right
+                for dx, dy in DIR_TO_VEC
+            ]
+        )
+
+    @staticmethod
+    def _check_supported(env: MiniGridEnv):
+        if not isinstance(env, MiniGridEnv):
+            raise ValueError(f"{env} is not a MiniGrid environment")
+        for name in ["step", "_reward", "gen_obs"]:
+            if getattr(type(env), name) is not getattr(MiniGridEnv, name):
+                raise ValueError(
+                    f"{type(env).__name__} overrides MiniGridEnv.{name}, "
+                    "which VecMiniGridEnv cannot vectorize"
+                )
+
+    def _load(self, i: int):
+        """
+        Copy the state of the i-th environment into the arrays
+        """
+
+        env = self.envs[i]
+        if (env.grid.codes[:, :, 0] == OBJECT_TO_IDX["box"]).any():
+            raise ValueError("VecMiniGridEnv does not support boxes")
+
+        self.codes[i] = env.grid.codes
+        self.agent_pos[i] = env.agent_pos
+        self.agent_dir[i] = env.agent_dir
+        self.carrying[i] = env.carrying.encode() if env.carrying else EMPTY_CODE
+        self.step_count[i] = env.step_count
+        self.max_steps[i] = env.max_steps
+        self.missions[i] = env.mission
+
+    def reset_wait(
+        self,
+        seed: int | list[int] | None = None,
+        options: dict[str, Any] | None = None,
+    ):
+        if seed is None:
+            seed = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+
+        infos = {}
+        for i, (env, single_seed) in enumerate(zip(self.envs, seed)):
+            _, info = env.reset(seed=single_seed, options=options)
+            self._load(i)
+            infos = self._add_info(infos, info, i)
+
+        return self._gen_obs(), infos
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions)
+
+    def step_wait(self):
+        actions = self._actions
+        if ((actions < 0) | (actions >= len(Actions))).any():
+            raise ValueError(f"Unknown actions: {actions}")
+
+        n = np.arange(self.num_envs)
+        self.step_count += 1
+
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+
+        # Contents of the cells in front of the agents
+        fwd_pos = self.agent_pos + DIR_TO_VEC_ARRAY[self.agent_dir]
+        fx, fy = fwd_pos[:, 0], fwd_pos[:, 1]
+        fwd_type, fwd_color, fwd_state = self.codes[n, fx, fy].T
+        fwd_empty = fwd_type == OBJECT_TO_IDX["empty"]
+        carrying_nothing = self.carrying[:, 0] == OBJECT_TO_IDX["empty"]
+
+        # Rotate left and right
+        self.agent_dir[actions == Actions.left] -= 1
+        self.agent_dir[actions == Actions.right] += 1
+        self.agent_dir %= 4
+
+        # Move forward
+        forward = actions == Actions.forward
+        move = forward & CAN_OVERLAP[fwd_type, fwd_state]
+        self.agent_pos[move] = fwd_pos[move]
+
+        goal = forward & (fwd_type == OBJECT_TO_IDX["goal"])
+        terminated |= goal
+        rewards[goal] = 1 - 0.9 * (self.step_count[goal] / self.max_steps[goal])
+        terminated |= forward & (fwd_type == OBJECT_TO_IDX["lava"])
+
+        # Pick up an object
+        pickup = actions == Actions.pickup
+        pickup &= CAN_PICKUP[fwd_type, fwd_state] & carrying_nothing
+        self.carrying[pickup] = self.codes[pickup, fx[pickup], fy[pickup]]
+        self.codes[pickup, fx[pickup], fy[pickup]] = EMPTY_CODE
+
+        # Drop an object
+        drop = (actions == Actions.drop) & fwd_empty & ~carrying_nothing
+        self.codes[drop, fx[drop], fy[drop]] = self.carrying[drop]
+        self.carrying[drop] = EMPTY_CODE
+
+        # Toggle doors, locked doors need a key of the same color
+        toggle = (actions == Actions.toggle) & (fwd_type == OBJECT_TO_IDX["door"])
+        has_key = (self.carrying[:, 0] == OBJECT_TO_IDX["key"]) & (
+            self.carrying[:, 1] == fwd_color
+        )
+        locked = fwd_state == STATE_TO_IDX["locked"]
+        toggle &= ~locked | has_key
+        new_state = np.where(
+            fwd_state == STATE_TO_IDX["open"],
+            STATE_TO_IDX["closed"],
+            STATE_TO_IDX["open"],
+        )
+        self.codes[toggle, fx[toggle], fy[toggle], 2] = new_state[toggle]
+
+        truncated = self.step_count >= self.max_steps
+
+        obs = self._gen_obs()
+
+        # Reset the environments whose episode is over
+        infos = {}
+        for i in np.flatnonzero(terminated | truncated):
+            final_obs = {
+                "image": obs["image"][i].copy(),
+                "direction": obs["direction"][i],
+                "mission": obs["mission"][i],
+            }
+            _, info = self.envs[i].reset()
+            self._load(i)
+            info["final_observation"] = final_obs
+            info["final_info"] = {}
+            infos = self._add_info(infos, info, i)
+
+        if infos:
+            obs = self._gen_obs()
+
+        return obs, rewards, terminated, truncated, infos
+
+    def _gen_obs(self) -> dict[str, Any]:
+        """
+        Generate the observations of all the environments
+        """
+
+        return {
+            "image": self._gen_obs_images(),
+            "direction": self.agent_dir.copy(),
+            "mission": tuple(self.missions),
+        }
+
+    def _gen_obs_images(self) -> np.ndarray:
+        """
+        Generate the `(N, view, view, 3)` encodings of the agents' views,
+        the same as `MiniGridEnv.gen_obs_image`. Each view cell is gathered
+        directly from the world position it shows, already rotated.
+        """
+
+        size = self.agent_view_size
+        padded_width, padded_height = self._padded_codes.shape[1:3]
+
+        # Index of the cell under each agent in the flattened padded arrays
+        x = self.agent_pos[:, 0] + self._padding
+        y = self.agent_pos[:, 1] + self._padding
+        index = (np.arange(self.num_envs) * padded_width + x) * padded_height + y
+
+        index = index[:, None, None] + self._view_offsets[self.agent_dir]
+        image = self._padded_codes.reshape(-1, 3).take(index, axis=0)
+
+        agent_pos = size // 2, size - 1
+
+        # Process occluders and visibility
+        if not self.see_through_walls:
+            opaque = OPAQUE[image[..., 0], image[..., 2]]
+            vis_mask = Grid.compute_vis_batch(opaque, agent_pos)
+            image[~vis_mask] = 0
+
+        # Make it so the agents see what they are carrying
+        image[:, agent_pos[0], agent_pos[1]] = self.carrying
+
+        return image
+
+    def close_extras(self, **kwargs):
+        for env in self.envs:
+            env.close()
@@ -2,16 +2,25 @@ from __future__ import annotations
 
 import math
 import operator
+import os
 from functools import reduce
-from typing import Any
+from typing import Any, Callable
 
 import gymnasium as gym
 import numpy as np
 from gymnasium import logger, spaces
 from gymnasium.core import ObservationWrapper, ObsType, Wrapper
 
-from minigrid.core.constants import COLOR_TO_IDX, OBJECT_TO_IDX, STATE_TO_IDX
+from minigrid.core.constants import (
+    COLOR_TO_IDX,
+    OBJECT_TO_IDX,
+    STATE_TO_IDX,
+    TILE_PIXELS,
+)
 from minigrid.core.world_object import Goal
+from minigrid.utils.episode_log import EpisodeLog, encode_kwargs
+from minigrid.utils.trajectories import ShardWriter
+from minigrid.utils.video import VideoRecorder
 
 
 class ReseedWrapper(Wrapper):
@@ -248,15 +257,18 @@ class OneHotPartialObsWrapper(ObservationWrapper):
               dtype=uint8)
     """
 
-    def __init__(self, env, tile_size=8):
+    def __init__(self, env, tile_size=8, copy=True):
         """A wrapper that makes the image observation a one-hot encoding of a partially observable agent view.
 
         Args:
             env: The environment to apply the wrapper
+            copy: If False, the one-hot images are written into a buffer owned by the wrapper,
+                which is overwritten by the next step or reset, instead of a new array
         """
         super().__init__(env)
 
         self.tile_size = tile_size
+        self.copy = copy
 
         obs_shape = env.observation_space["image"].shape
 
@@ -270,19 +282,22 @@ class OneHotPartialObsWrapper(ObservationWrapper):
             {**self.observation_space.spaces, "image": new_image_space}
         )
 
+        self._image = np.zeros(new_image_space.shape, dtype="uint8")
+        self._cells = np.ogrid[: obs_shape[0], : obs_shape[1]]
+
     def observation(self, obs):
         img = obs["image"]
-        out = np.zeros(self.observation_space.spaces["image"].shape, dtype="uint8")
-
-        for i in range(img.shape[0]):
-            for j in range(img.shape[1]):
-                type = img[i, j, 0]
-                color = img[i, j, 1]
-                state = img[i, j, 2]
+        if self.copy:
+            out = np.zeros(self.observation_space.spaces["image"].shape, dtype="uint8")
+        else:
+            out = self._image
+            out.fill(0)
 
-                out[i, j, type] = 1
-                out[i, j, len(OBJECT_TO_IDX) + color] = 1
-                out[i, j, len(OBJECT_TO_IDX) + len(COLOR_TO_IDX) + state] = 1
+        # Set the bits of the type, color and state of every cell
+        i, j = self._cells
+        out[i, j, img[:, :, 0]] = 1
+        out[i, j, len(OBJECT_TO_IDX) + img[:, :, 1]] = 1
+        out[i, j, len(OBJECT_TO_IDX) + len(COLOR_TO_IDX) + img[:, :, 2]] = 1
 
         return {**obs, "image": out}
 
@@ -306,11 +321,19 @@ class RGBImgObsWrapper(ObservationWrapper):
         ![RGBImgObsWrapper](../figures/lavacrossing_RGBImgObsWrapper.png)
     """
 
-    def __init__(self, env, tile_size=8):
+    def __init__(self, env, tile_size=8, copy=True, subdivs=3):
         super().__init__(env)
 
         self.tile_size = tile_size
 
+        # Supersampling factor of the tiles, 1 disables anti-aliasing
+        self.subdivs = subdivs
+
+        # If False, the images are rendered into a buffer owned by the
+        # wrapper, which is overwritten by the next step or reset
+        self.copy = copy
+        self._image = None
+
         new_image_space = spaces.Box(
             low=0,
             high=255,
@@ -323,7 +346,12 @@ class RGBImgObsWrapper(ObservationWrapper):
         )
 
     def observation(self, obs):
-        rgb_img = self.get_frame(highlight=True, tile_size=self.tile_size)
+        out = None if self.copy else self._image
+        rgb_img = self.get_frame(
+            highlight=True, tile_size=self.tile_size, out=out, subdivs=self.subdivs
+        )
+        if not self.copy:
+            self._image = rgb_img
 
         return {**obs, "image": rgb_img}
 
@@ -351,12 +379,20 @@ class RGBImgPartialObsWrapper(ObservationWrapper):
         ![RGBImgPartialObsWrapper](../figures/lavacrossing_RGBImgPartialObsWrapper.png)
     """
 
-    def __init__(self, env, tile_size=8):
+    def __init__(self, env, tile_size=8, copy=True, subdivs=3):
         super().__init__(env)
 
         # Rendering attributes for observations
         self.tile_size = tile_size
 
+        # Supersampling factor of the tiles, 1 disables anti-aliasing
+        self.subdivs = subdivs
+
+        # If False, the images are rendered into a buffer owned by the
+        # wrapper, which is overwritten by the next step or reset
+        self.copy = copy
+        self._image = None
+
         obs_shape = env.observation_space.spaces["image"].shape
         new_image_space = spaces.Box(
             low=0,
@@ -370,7 +406,12 @@ class RGBImgPartialObsWrapper(ObservationWrapper):
         )
 
     def observation(self, obs):
-        rgb_img_partial = self.get_frame(tile_size=self.tile_size, agent_pov=True)
+        out = None if self.copy else self._image
+        rgb_img_partial = self.get_frame(
+            tile_size=self.tile_size, agent_pov=True, out=out, subdivs=self.subdivs
+        )
+        if not self.copy:
+            self._image = rgb_img_partial
 
         return {**obs, "image": rgb_img_partial}
 
@@ -562,12 +603,17 @@ class FlatObsWrapper(ObservationWrapper):
         (2835,)
     """
 
-    def __init__(self, env, maxStrLen=96):
+    def __init__(self, env, maxStrLen=96, copy=True):
         super().__init__(env)
 
         self.maxStrLen = maxStrLen
         self.numCharCodes = 28
 
+        # If False, the observations are written into a buffer owned by the
+        # wrapper, which is overwritten by the next step or reset
+        self.copy = copy
+        self._flat = None
+
         imgSpace = env.observation_space.spaces["image"]
         imgSize = reduce(operator.mul, imgSpace.shape, 1)
 
@@ -612,7 +658,15 @@ class FlatObsWrapper(ObservationWrapper):
             self.cachedStr = mission
             self.cachedArray = strArray
 
-        obs = np.concatenate((image.flatten(), self.cachedArray.flatten()))
+        if self.copy or self._flat is None:
+            obs = np.concatenate((image.flatten(), self.cachedArray.flatten()))
+            if not self.copy:
+                self._flat = obs
+        else:
+            obs = self._flat
+            size = image.size
+            obs[:size] = image.ravel()
+            obs[size:] = self.cachedArray.ravel()
 
         return obs
 
@@ -656,10 +710,8 @@ class ViewSizeWrapper(ObservationWrapper):
     def observation(self, obs):
         env = self.unwrapped
 
-        grid, vis_mask = env.gen_obs_grid(self.agent_view_size)
-
         # Encode the partially observable view into a numpy array
-        image = grid.encode(vis_mask)
+        image = env.gen_obs_image(self.agent_view_size)
 
         return {**obs, "image": image}
 
@@ -764,3 +816,257 @@ class SymbolicObsWrapper(ObservationWrapper):
         obs["image"] = grid
 
         return obs
+
+
+class RecordVideoWrapper(Wrapper):
+    """
+    Wrapper recording episodes into video files without a display, for
+    example on machines running evaluations.
+
+    Frames are rendered with the incremental renderer of `get_frame`, with
+    the mission below them, and encoded with ffmpeg by a `VideoRecorder`
+    in a background thread, without throttling to the render frame rate.
+    Episodes for which `episode_trigger(episode_id)` is true are saved into
+    `{video_folder}/{name_prefix}-{episode_id}.mp4`, all of them by default.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.wrappers import RecordVideoWrapper
+        >>> env = gym.make("MiniGrid-Empty-5x5-v0")
+        >>> env = RecordVideoWrapper(env, "videos", tile_size=16)  # doctest: +SKIP
+        >>> _ = env.reset(seed=0)  # doctest: +SKIP
+        >>> _ = env.step(env.action_space.sample())  # doctest: +SKIP
+        >>> env.close()  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        env,
+        video_folder: str,
+        episode_trigger: Callable[[int], bool] | None = None,
+        name_prefix: str = "episode",
+        fps: int | None = None,
+        tile_size: int = TILE_PIXELS,
+        highlight: bool = True,
+        agent_pov: bool = False,
+        show_mission: bool = True,
+        max_queue: int = 256,
+    ):
+        super().__init__(env)
+
+        self.video_folder = os.path.abspath(video_folder)
+        os.makedirs(self.video_folder, exist_ok=True)
+        self.episode_trigger = episode_trigger
+        self.name_prefix = name_prefix
+        self.episode_id = -1
+
+        # Rendering attributes for the videos
+        self.tile_size = tile_size
+        self.highlight = highlight
+        self.agent_pov = agent_pov
+
+        if fps is None:
+            fps = env.metadata.get("render_fps", 10)
+        self.recorder = VideoRecorder(
+            fps=fps, show_mission=show_mission, max_queue=max_queue
+        )
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+
+        self.episode_id += 1
+        self.recorder.finish()
+        if self.episode_trigger is None or self.episode_trigger(self.episode_id):
+            frame = self._get_frame()
+            path = os.path.join(
+                self.video_folder, f"{self.name_prefix}-{self.episode_id}.mp4"
+            )
+            self.recorder.start(path, frame.shape)
+            self.recorder.write(frame, self.unwrapped.mission)
+
+        return obs, info
+
+    def step(self, action):
+        results = self.env.step(action)
+        if self.recorder.recording:
+            self.recorder.write(self._get_frame(), self.unwrapped.mission)
+        return results
+
+    def close(self):
+        super().close()
+        self.recorder.close()
+
+    def _get_frame(self):
+        # get_frame returns a new array, which can be queued as is
+        return self.unwrapped.get_frame(self.highlight, self.tile_size, self.agent_pov)
+
+
+class RecordEpisodeWrapper(Wrapper):
+    """
+    Wrapper logging episodes as the seed and options of their reset and
+    their actions, which `EpisodeReplay` plays again to rebuild any of
+    their observations or frames, rather than storing the observations.
+
+    Episodes for which `episode_trigger(episode_id)` is true are saved as
+    an `EpisodeLog` into `{log_folder}/{name_prefix}-{episode_id}.npz`
+    when they end, all of them by default. With `checkpoint_interval`, a
+    snapshot of the environment is stored every `checkpoint_interval` steps
+    for replays to start from. Episodes reset without a seed are also
+    stored with a snapshot on reset, as the seed alone cannot replay them.
+    The wrapper must be applied to the environment made by `gym.make`,
+    without wrappers changing the actions in between.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.wrappers import RecordEpisodeWrapper
+        >>> env = gym.make("MiniGrid-Empty-5x5-v0")
+        >>> env = RecordEpisodeWrapper(env, "episodes")  # doctest: +SKIP
+        >>> _ = env.reset(seed=0)  # doctest: +SKIP
+        >>> _ = env.step(env.action_space.sample())  # doctest: +SKIP
+        >>> env.close()  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        env,
+        log_folder: str,
+        episode_trigger: Callable[[int], bool] | None = None,
+        name_prefix: str = "episode",
+        checkpoint_interval: int | None = None,
+    ):
+        super().__init__(env)
+
+        assert env.spec is not None, "the environment must be made by gym.make"
+        self.env_kwargs = dict(env.spec.kwargs)
+        self.env_kwargs.pop("render_mode", None)
+        # Fail now rather than when saving the first episode
+        encode_kwargs(self.env_kwargs)
+        self.log_folder = os.path.abspath(log_folder)
+        os.makedirs(self.log_folder, exist_ok=True)
+        self.episode_trigger = episode_trigger
+        self.name_prefix = name_prefix
+        self.checkpoint_interval = checkpoint_interval
+        self.episode_id = -1
+        self.episode_log: EpisodeLog | None = None
+
+    def reset(self, *, seed=None, options=None):
+        self._save_log()
+        obs, info = self.env.reset(seed=seed, options=options)
+
+        self.episode_id += 1
+        if self.episode_trigger is None or self.episode_trigger(self.episode_id):
+            self.episode_log = EpisodeLog(
+                self.env.spec.id, self.env_kwargs, seed, options
+            )
+            if seed is None or self.checkpoint_interval:
+                self.episode_log.add_checkpoint(self.env)
+
+        return obs, info
+
+    def step(self, action):
+        results = self.env.step(action)
+        if self.episode_log is not None:
+            self.episode_log.actions.append(int(action))
+            if (
+                self.checkpoint_interval
+                and len(self.episode_log) % self.checkpoint_interval == 0
+            ):
+                self.episode_log.add_checkpoint(self.env)
+        return results
+
+    def close(self):
+        super().close()
+        self._save_log()
+
+    def _save_log(self):
+        if self.episode_log is not None:
+            path = os.path.join(
+                self.log_folder, f"{self.name_prefix}-{self.episode_id}.npz"
+            )
+            self.episode_log.save(path)
+            self.episode_log = None
+
+
+class RecordTrajectoryWrapper(Wrapper):
+    """
+    Wrapper streaming the trajectories of all episodes into columnar
+    shards of `shard_size` rows, written by a `ShardWriter` in a background
+    thread and read back with a `ShardReader`.
+
+    Each row holds an observation (its image, direction and the id of its
+    mission), the action taken after it, and the reward and termination
+    flags resulting from that action. The last observation of each episode
+    gets a row of its own, with an action of -1, so that episodes of `n`
+    steps take `n + 1` rows. Rows also hold the index of their episode.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.wrappers import RecordTrajectoryWrapper
+        >>> env = gym.make("MiniGrid-Empty-5x5-v0")
+        >>> env = RecordTrajectoryWrapper(env, "trajectories")  # doctest: +SKIP
+        >>> _ = env.reset(seed=0)  # doctest: +SKIP
+        >>> _ = env.step(env.action_space.sample())  # doctest: +SKIP
+        >>> env.close()  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        env,
+        folder: str,
+        shard_size: int = 2**16,
+        max_queue: int = 2,
+    ):
+        super().__init__(env)
+
+        self.writer = ShardWriter(
+            folder,
+            env.observation_space["image"].shape,
+            shard_size=shard_size,
+            max_queue=max_queue,
+        )
+        self.episode_id = -1
+
+        # Last observation, to be written with the action taken after it.
+        # Its image is copied, as environments may reuse their buffers.
+        self._obs: tuple[np.ndarray, int, str] | None = None
+
+    def reset(self, **kwargs):
+        self._end_episode()
+        obs, info = self.env.reset(**kwargs)
+        self.episode_id += 1
+        self._obs = self._keep(obs)
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        if self._obs is not None:
+            self._write(self._obs, action, reward, terminated, truncated)
+        self._obs = self._keep(obs)
+        return obs, reward, terminated, truncated, info
+
+    def close(self):
+        super().close()
+        self._end_episode()
+        self.writer.close()
+
+    def _end_episode(self):
+        if self._obs is not None:
+            self._write(self._obs, -1, 0, False, False)
+            self._obs = None
+
+    @staticmethod
+    def _keep(obs):
+        return obs["image"].copy(), obs["direction"], obs["mission"]
+
+    def _write(self, obs, action, reward, terminated, truncated):
+        image, direction, mission = obs
+        self.writer.add(
+            image,
+            direction,
+            mission,
+            action,
+            reward,
+            terminated,
+            truncated,
+            self.episode_id,
+        )
@@ -9,8 +9,11 @@ import pytest
 from gymnasium.envs.registration import EnvSpec
 from gymnasium.utils.env_checker import check_env, data_equivalence
 
-from minigrid.core.grid import Grid
+from minigrid.core.constants import OBJECT_TO_IDX
+from minigrid.core.grid import ZOBRIST_AGENT, ZOBRIST_CARRYING, Grid, zobrist_key
+from minigrid.core.level_bank import LevelBank
 from minigrid.core.mission import MissionSpace
+from minigrid.core.world_object import Ball, Box, Key, WorldObj
 from tests.utils import all_testing_env_specs, assert_equals
 
 CHECK_ENV_IGNORE_WARNINGS = [
@@ -327,3 +330,524 @@ def test_env_sync_vectorization(env_id):
     env.reset()
     env.step(env.action_space.sample())
     env.close()
+
+
+def encode_reference(grid, vis_mask=None):
+    """Encode a grid cell by cell from its objects."""
+    codes = np.zeros((grid.width, grid.height, 3), dtype=np.uint8)
+    for i in range(grid.width):
+        for j in range(grid.height):
+            if vis_mask is not None and not vis_mask[i, j]:
+                continue
+            v = grid.get(i, j)
+            codes[i, j] = v.encode() if v else (OBJECT_TO_IDX["empty"], 0, 0)
+    return codes
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_grid_codes_in_sync(env_spec):
+    """Test that the array encoding of the grid follows the grid objects."""
+
+    env = env_spec.make().unwrapped
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+    np.testing.assert_array_equal(env.grid.codes, encode_reference(env.grid))
+
+    for _ in range(NUM_STEPS):
+        _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        np.testing.assert_array_equal(env.grid.codes, encode_reference(env.grid))
+        if terminated or truncated:
+            env.reset()
+
+    env.close()
+
+
+@pytest.mark.parametrize("env_id", ["MiniGrid-DoorKey-16x16-v0", "BabyAI-BossLevel-v0"])
+def test_grid_encode(env_id):
+    """Test the vectorized grid encoding against a cell by cell encoding."""
+    env = gym.make(env_id).unwrapped
+    env.reset(seed=SEED)
+    rng = np.random.default_rng(SEED)
+
+    grid = env.grid
+    np.testing.assert_array_equal(grid.encode(), encode_reference(grid))
+
+    vis_mask = rng.random((grid.width, grid.height)) < 0.5
+    image = grid.encode(vis_mask)
+    assert image.dtype == np.uint8
+    np.testing.assert_array_equal(image, encode_reference(grid, vis_mask))
+
+    obs_grid, vis_mask = env.gen_obs_grid()
+    np.testing.assert_array_equal(
+        obs_grid.encode(vis_mask), encode_reference(obs_grid, vis_mask)
+    )
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_gen_obs_image(env_spec):
+    """Test that the array view of the agent matches the encoded sub-grid."""
+    env = env_spec.make().unwrapped
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+
+    for time_step in range(NUM_STEPS):
+        for see_through_walls in (False, True):
+            env.see_through_walls = see_through_walls
+            for agent_view_size in (3, 7):
+                grid, vis_mask = env.gen_obs_grid(agent_view_size)
+                image = env.gen_obs_image(agent_view_size)
+                assert image.flags.c_contiguous
+                np.testing.assert_array_equal(
+                    image, grid.encode(vis_mask), f"[{time_step}] "
+                )
+
+        _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        if terminated or truncated:
+            env.reset()
+
+    env.close()
+
+
+def compute_vis_reference(opaque, agent_pos):
+    """Row by row occlusion sweep, as originally done by `Grid.process_vis`."""
+    width, height = opaque.shape
+    mask = np.zeros(shape=(width, height), dtype=bool)
+    mask[agent_pos[0], agent_pos[1]] = True
+
+    for j in reversed(range(0, height)):
+        for i in range(0, width - 1):
+            if not mask[i, j] or opaque[i, j]:
+                continue
+            mask[i + 1, j] = True
+            if j > 0:
+                mask[i + 1, j - 1] = True
+                mask[i, j - 1] = True
+
+        for i in reversed(range(1, width)):
+            if not mask[i, j] or opaque[i, j]:
+                continue
+            mask[i - 1, j] = True
+            if j > 0:
+                mask[i - 1, j - 1] = True
+                mask[i, j - 1] = True
+
+    return mask
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_compute_vis(seed):
+    """Test the visibility mask against the reference sweep on random views."""
+    rng = np.random.default_rng(seed)
+
+    for _ in range(200):
+        width = int(rng.integers(3, 16))
+        height = int(rng.integers(3, 16))
+        opaque = rng.random((width, height)) < rng.random()
+        agent_pos = (int(rng.integers(width)), int(rng.integers(height)))
+
+        np.testing.assert_array_equal(
+            Grid.compute_vis(opaque, agent_pos),
+            compute_vis_reference(opaque, agent_pos),
+        )
+
+    # Views too wide for the rows to be packed in 64-bit integers
+    opaque = rng.random((70, 5)) < 0.2
+    np.testing.assert_array_equal(
+        Grid.compute_vis(opaque, (35, 4)), compute_vis_reference(opaque, (35, 4))
+    )
+
+
+@pytest.mark.parametrize(
+    "env_id", ["MiniGrid-DoorKey-8x8-v0", "MiniGrid-ObstructedMaze-2Dlhb-v0"]
+)
+def test_grid_copy(env_id):
+    """Test that grid copies share static objects and copy the others."""
+    env = gym.make(env_id).unwrapped
+    env.reset(seed=SEED)
+
+    grid = env.grid
+    grid_copy = grid.copy()
+    assert grid_copy == grid
+
+    for obj, obj_copy in zip(grid.grid, grid_copy.grid):
+        if obj is None:
+            assert obj_copy is None
+        elif obj.is_static():
+            assert obj_copy is obj
+        else:
+            assert obj_copy is not obj
+            assert obj_copy.encode() == obj.encode()
+            assert obj_copy.cur_pos == obj.cur_pos
+            if obj.contains is not None:
+                assert obj_copy.contains is not obj.contains
+                assert obj_copy.contains.encode() == obj.contains.encode()
+
+    # Modifying the copy leaves the original grid untouched
+    codes = grid.encode()
+    for i in range(grid.width):
+        for j in range(grid.height):
+            obj = grid_copy.get(i, j)
+            if obj is not None and obj.type == "door":
+                obj.is_open = not obj.is_open
+                grid_copy.set(i, j, obj)
+    np.testing.assert_array_equal(grid.encode(), codes)
+    np.testing.assert_array_equal(encode_reference(grid), codes)
+
+
+# Attributes changed by reset which are only used to generate the grid
+GENERATION_ATTRIBUTES = {"_np_random", "door_colors", "locked_room"}
+
+
+def reset_attributes(env):
+    """Names of the attributes set to new values by reset."""
+    env.reset(seed=SEED)
+    before = dict(vars(env))
+    env.reset(seed=SEED + 1)
+    return {
+        name
+        for name, value in vars(env).items()
+        if name not in before
+        or not (
+            value is before[name]
+            or isinstance(value, (int, float, str, tuple))
+            and value == before[name]
+        )
+    }
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_get_set_state(env_spec):
+    """Test that restoring a state snapshot replays the same rollout."""
+
+    env = env_spec.make().unwrapped
+
+    # Snapshots hold every attribute of the episode, which reset sets
+    missing = reset_attributes(env) - GENERATION_ATTRIBUTES
+    missing -= set(env.get_state_fields())
+    assert not missing, f"attributes missing from state_fields: {missing}"
+
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+    for _ in range(NUM_STEPS // 2):
+        _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        if terminated or truncated:
+            env.reset()
+
+    state = env.get_state()
+    expected_obs = env.gen_obs()
+    actions = [env.action_space.sample() for _ in range(NUM_STEPS)]
+
+    def rollout(env):
+        results = []
+        for action in actions:
+            results.append(env.step(action))
+            if results[-1][2] or results[-1][3]:
+                break
+        return tuple(results)
+
+    expected = rollout(env)
+
+    other_env = env_spec.make().unwrapped
+    other_env.reset(seed=SEED + 1)
+    for target, snapshot in [
+        (env, state),
+        (other_env, pickle.loads(pickle.dumps(state))),
+    ]:
+        target.set_state(snapshot)
+        assert_equals(target.gen_obs(), expected_obs)
+        results = rollout(target)
+        assert len(results) == len(expected)
+        assert_equals(results, expected)
+
+    env.close()
+    other_env.close()
+
+
+def hash_key_reference(env):
+    """Compute the Zobrist hash of an environment from scratch."""
+    grid = env.grid
+    key = 0
+    for j in range(grid.height):
+        for i in range(grid.width):
+            v = grid.get(i, j)
+            if v is not None:
+                key ^= zobrist_key(j * grid.width + i, v.encode())
+    x, y = env.agent_pos
+    key ^= zobrist_key(y * grid.width + x, (env.agent_dir, 0, 0), ZOBRIST_AGENT)
+    if env.carrying is not None:
+        key ^= zobrist_key(0, env.carrying.encode(), ZOBRIST_CARRYING)
+    return key
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_hash_key(env_spec):
+    """Test that the incremental hash matches a hash computed from scratch."""
+
+    env = env_spec.make().unwrapped
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+    keys = {}
+
+    for _ in range(NUM_STEPS):
+        key = env.hash_key()
+        assert key == hash_key_reference(env)
+        assert env.hash() == f"{key:016x}"
+        assert env.hash(8) == f"{key:016x}"[:8]
+
+        # Equal states have equal hashes
+        state = (env.grid.encode().tobytes(), tuple(env.agent_pos), env.agent_dir)
+        state += (env.carrying.encode() if env.carrying else None,)
+        assert keys.setdefault(state, key) == key
+
+        _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        if terminated or truncated:
+            env.reset()
+
+    with pytest.raises(ValueError):
+        env.hash(17)
+
+    env.close()
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_sample_free_cells(env_spec):
+    """Test generation with objects placed by sampling the empty cells."""
+
+    env_1 = env_spec.make(sample_free_cells=True).unwrapped
+    env_2 = env_spec.make(sample_free_cells=True).unwrapped
+    assert_equals(env_1.reset(seed=SEED), env_2.reset(seed=SEED))
+    assert env_1.grid == env_2.grid
+    np.testing.assert_array_equal(env_1.grid.codes, encode_reference(env_1.grid))
+
+    env_1.action_space.seed(SEED)
+    for _ in range(NUM_STEPS):
+        action = env_1.action_space.sample()
+        assert_equals(env_1.step(action), env_2.step(action))
+        np.testing.assert_array_equal(env_1.grid.codes, encode_reference(env_1.grid))
+
+    env_1.close()
+    env_2.close()
+
+
+@pytest.mark.parametrize("sample_free_cells", [False, True])
+def test_place_obj_full_grid(sample_free_cells):
+    """Test that place_obj fails once no empty position is left."""
+
+    env = gym.make(
+        "MiniGrid-Empty-5x5-v0", sample_free_cells=sample_free_cells
+    ).unwrapped
+    env.reset(seed=SEED)
+
+    # The agent and the goal already occupy two of the nine inner cells
+    for _ in range(7):
+        pos = env.place_obj(Ball())
+        assert not np.array_equal(pos, env.agent_pos)
+
+    with pytest.raises(RecursionError):
+        env.place_obj(Ball(), max_tries=100)
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_level_bank(env_spec):
+    """Test that loading a level of a bank replays the episode of its seed."""
+
+    seeds = [SEED, SEED + 7, SEED + 3]
+    bank = LevelBank.generate(env_spec.id, seeds)
+    assert len(bank) == len(seeds)
+
+    env = env_spec.make(level_bank=bank).unwrapped
+    other_env = env_spec.make().unwrapped
+    env.action_space.seed(SEED)
+    for level, seed in enumerate(seeds):
+        obs, info = env.reset(options={"level": level})
+        assert info == {"level": level, "level_seed": seed}
+        assert_equals(obs, other_env.reset(seed=seed)[0])
+        assert env.grid == other_env.grid
+        assert env.hash_key() == other_env.hash_key()
+
+        # The attributes referring to objects refer to those of the grid
+        for name in env.get_state_fields():
+            obj = getattr(env, name)
+            if isinstance(obj, WorldObj) and obj is not env.carrying:
+                assert any(cell is obj for cell in env.grid.grid)
+
+        for _ in range(NUM_STEPS // 10):
+            action = env.action_space.sample()
+            result = env.step(action)
+            assert_equals(result, other_env.step(action))
+            if result[2] or result[3]:
+                break
+
+    # Levels are drawn at random when none is given
+    _, info = env.reset(seed=SEED)
+    assert info["level_seed"] == seeds[info["level"]]
+
+    env.close()
+    other_env.close()
+
+
+def test_level_bank_save_load(tmp_path):
+    """Test saving a bank and loading it as read-only memory-mapped arrays."""
+
+    path = tmp_path / "bank"
+    bank = LevelBank.generate("BabyAI-GoToLocal-v0", range(4))
+    bank.save(path)
+    with pytest.raises(FileExistsError):
+        bank.save(path)
+
+    loaded = LevelBank.load(path)
+    assert loaded.env_class == bank.env_class
+    assert loaded.env_config == bank.env_config
+    assert loaded.env_id == "BabyAI-GoToLocal-v0"
+    for name in ["seeds", "offsets", "states", "extra_offsets", "extra_states"]:
+        array = getattr(loaded, name)
+        assert isinstance(array, np.memmap) and not array.flags.writeable
+        np.testing.assert_array_equal(array, getattr(bank, name))
+
+    env = gym.make("BabyAI-GoToLocal-v0", level_bank=str(path))
+    other_env = gym.make("BabyAI-GoToLocal-v0")
+    assert_equals(env.reset(options={"level": 2})[0], other_env.reset(seed=2)[0])
+
+    with pytest.raises(ValueError):
+        gym.make("BabyAI-GoToObj-v0", level_bank=loaded).reset()
+
+    env.close()
+    other_env.close()
+
+
+def test_level_bank_env_config(tmp_path):
+    """Test that levels are only loaded into environments of the same size."""
+
+    bank = LevelBank.generate("MiniGrid-DoorKey-5x5-v0", range(3))
+    bank.save(tmp_path / "bank")
+    for level_bank in [bank, str(tmp_path / "bank")]:
+        env = gym.make("MiniGrid-DoorKey-8x8-v0", level_bank=level_bank)
+        with pytest.raises(ValueError, match="generated with"):
+            env.reset()
+        env.close()
+
+    env = gym.make("MiniGrid-DoorKey-5x5-v0", level_bank=bank, max_steps=10)
+    with pytest.raises(ValueError, match="max_steps"):
+        env.reset()
+    env.close()
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_to_bytes(env_spec):
+    """Test restoring the state serialized by to_bytes."""
+
+    env = env_spec.make().unwrapped
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+    other_env = env_spec.make().unwrapped
+    other_env.reset(seed=SEED + 1)
+
+    for _ in range(NUM_STEPS // 10):
+        data = env.to_bytes()
+        other_env.load_bytes(data)
+        assert other_env.to_bytes() == data
+        assert other_env.grid == env.grid
+        np.testing.assert_array_equal(other_env.grid.opaque, env.grid.opaque)
+        assert other_env.grid.cell_keys == env.grid.cell_keys
+        assert other_env.hash_key() == env.hash_key()
+        assert other_env.step_count == env.step_count
+        obs, expected_obs = other_env.gen_obs(), env.gen_obs()
+        np.testing.assert_array_equal(obs["image"], expected_obs["image"])
+        assert obs["mission"] == expected_obs["mission"]
+
+        for _ in range(10):
+            _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+            if terminated or truncated:
+                env.reset()
+
+    env.close()
+    other_env.close()
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_extra_state_to_bytes(env_spec):
+    """Test that restoring both serialized states continues the episode."""
+
+    env = env_spec.make().unwrapped
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+    for _ in range(5):
+        env.step(env.action_space.sample())
+
+    other_env = env_spec.make().unwrapped
+    other_env.reset(seed=SEED + 1)
+    other_env.load_bytes(env.to_bytes())
+    other_env.load_extra_state_bytes(env.extra_state_to_bytes())
+    assert other_env.extra_state_to_bytes() == env.extra_state_to_bytes()
+
+    for _ in range(NUM_STEPS // 10):
+        action = env.action_space.sample()
+        result = env.step(action)
+        assert_equals(result, other_env.step(action))
+        if result[2] or result[3]:
+            break
+
+    env.close()
+    other_env.close()
+
+
+def test_extra_state_globals():
+    """Test that extra states only unpickle the classes of minigrid."""
+
+    env = gym.make("MiniGrid-Empty-5x5-v0").unwrapped
+    env.reset(seed=SEED)
+    # Environments adding no attributes to the state only write the header
+    header = env.extra_state_to_bytes()
+    env.load_extra_state_bytes(header + pickle.dumps({"agent_view_size": 5}))
+    assert env.agent_view_size == 5
+    with pytest.raises(pickle.UnpicklingError, match="not allowed"):
+        env.load_extra_state_bytes(header + pickle.dumps(warnings.warn))
+    env.close()
+
+
+def test_grid_to_bytes():
+    """Test that grids keep box contents and object positions."""
+
+    grid = Grid(5, 4)
+    grid.wall_rect(0, 0, 5, 4)
+    key = Key("red")
+    key.init_pos, key.cur_pos = (1, 1), (2, 1)
+    grid.set(2, 1, key)
+    grid.set(3, 2, Box("green", Box("blue", Ball("purple"))))
+
+    data = grid.to_bytes()
+    other_grid = Grid.from_bytes(data)
+    assert other_grid == grid
+    assert other_grid.zobrist == grid.zobrist
+    assert other_grid.get(0, 0) is other_grid.get(4, 3)
+
+    other_key = other_grid.get(2, 1)
+    assert other_key.init_pos == (1, 1) and other_key.cur_pos == (2, 1)
+    box = other_grid.get(3, 2)
+    assert box.init_pos is None and box.cur_pos is None
+    assert box.contains.encode() == Box("blue").encode()
+    assert box.contains.contains.encode() == Ball("purple").encode()
+    assert box.contains.contains.contains is None
+
+    with pytest.raises(ValueError, match="not a serialized grid"):
+        Grid.from_bytes(b"x" + data[1:])
+    with pytest.raises(ValueError, match="version"):
+        Grid.from_bytes(data[:4] + b"\xff" + data[5:])
+    with pytest.raises(ValueError, match="wrong size"):
+        Grid.from_bytes(data[:-1])
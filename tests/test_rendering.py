@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import gymnasium as gym
+import numpy as np
+import pygame
+import pygame.freetype
+import pytest
+
+from minigrid.core.grid import Grid
+from minigrid.core.tile_atlas import (
+    DRAWABLE,
+    TILE_ATLAS_VERSION,
+    TileAtlas,
+    TileCache,
+    TileFrame,
+    draw_tile,
+    render_frames,
+)
+from minigrid.utils.rendering import (
+    downsample,
+    fill_coords,
+    point_in_circle,
+    point_in_line,
+    point_in_rect,
+    point_in_triangle,
+    rotate_fn,
+)
+from minigrid.utils.video import frame_layout, render_mission
+
+PREDICATES = [
+    point_in_rect(0.12, 0.88, 0.47, 0.53),
+    point_in_circle(cx=0.56, cy=0.28, r=0.19),
+    point_in_line(0.1, 0.3, 0.3, 0.7, r=0.03),
+    point_in_line(0.7, 0.2, 0.2, 0.2, r=0.05),
+    point_in_triangle((0.12, 0.19), (0.87, 0.50), (0.12, 0.81)),
+    rotate_fn(
+        point_in_triangle((0.12, 0.19), (0.87, 0.50), (0.12, 0.81)),
+        cx=0.5,
+        cy=0.5,
+        theta=0.5 * math.pi,
+    ),
+]
+
+
+@pytest.mark.parametrize("fn", PREDICATES)
+def test_fill_coords(fn):
+    """Test that filling with a mask matches testing each pixel."""
+
+    img = np.zeros((48, 32, 3), dtype=np.uint8)
+    fill_coords(img, fn, (255, 0, 0))
+
+    for y in range(img.shape[0]):
+        for x in range(img.shape[1]):
+            inside = fn((x + 0.5) / img.shape[1], (y + 0.5) / img.shape[0])
+            expected = (255, 0, 0) if inside else (0, 0, 0)
+            assert tuple(img[y, x]) == expected
+
+
+@pytest.mark.parametrize("factor", [1, 2, 3, 4])
+def test_downsample(factor):
+    """Test that downsampling averages blocks of pixels with rounding."""
+
+    img = np.random.default_rng(factor).integers(0, 256, (4 * factor, 6 * factor, 3))
+    blocks = img.reshape(4, factor, 6, factor, 3)
+    expected = np.floor(blocks.mean(axis=(1, 3)) + 0.5)
+
+    small = downsample(img.astype(np.uint8), factor)
+    assert small.dtype == np.uint8
+    np.testing.assert_array_equal(small, expected)
+    np.testing.assert_allclose(downsample(img / 255, factor), blocks.mean((1, 3)) / 255)
+
+
+def render_tiles(grid, tile_size, agent_pos, agent_dir, highlight_mask, subdivs=3):
+    """Render a grid by drawing its tiles one by one."""
+
+    img = np.zeros((grid.height * tile_size, grid.width * tile_size, 3), np.uint8)
+    for j in range(grid.height):
+        for i in range(grid.width):
+            tile = Grid.render_tile(
+                grid.get(i, j),
+                agent_dir=agent_dir if (i, j) == tuple(agent_pos) else None,
+                highlight=highlight_mask[i, j],
+                tile_size=tile_size,
+                subdivs=subdivs,
+            )
+            x0, x1 = i * tile_size, (i + 1) * tile_size
+            y0, y1 = j * tile_size, (j + 1) * tile_size
+            img[y0:y1, x0:x1] = tile
+    return img
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    ["MiniGrid-DoorKey-8x8-v0", "MiniGrid-LavaGapS7-v0", "BabyAI-GoToLocal-v0"],
+)
+@pytest.mark.parametrize("tile_size", [8, 13])
+def test_tile_atlas(env_id, tile_size):
+    """Test that gathering tiles from the atlas matches drawing each tile."""
+
+    env = gym.make(env_id).unwrapped
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+
+    for _ in range(20):
+        highlight_mask = rng.random((env.width, env.height)) < 0.5
+        img = env.grid.render(tile_size, env.agent_pos, env.agent_dir, highlight_mask)
+        expected = render_tiles(
+            env.grid, tile_size, env.agent_pos, env.agent_dir, highlight_mask
+        )
+        np.testing.assert_array_equal(img, expected)
+
+        # The POV render shows hidden cells as empty tiles
+        grid, vis_mask = env.gen_obs_grid()
+        agent_pos = (env.agent_view_size // 2, env.agent_view_size - 1)
+        np.testing.assert_array_equal(
+            env.get_frame(tile_size=tile_size, agent_pov=True),
+            render_tiles(grid, tile_size, agent_pos, 3, vis_mask),
+        )
+
+        env.step(rng.integers(0, 3))
+
+    env.close()
+
+
+@pytest.mark.parametrize("subdivs", [1, 2])
+def test_subdivs(subdivs):
+    """Test rendering frames with fewer subdivisions than the default."""
+
+    env = gym.make("MiniGrid-DoorKey-8x8-v0").unwrapped
+    env.reset(seed=0)
+    highlight_mask = np.zeros((env.width, env.height), dtype=bool)
+
+    img = env.get_frame(highlight=False, tile_size=8, subdivs=subdivs)
+    np.testing.assert_array_equal(
+        img,
+        render_tiles(
+            env.grid, 8, env.agent_pos, env.agent_dir, highlight_mask, subdivs
+        ),
+    )
+    assert not np.array_equal(img, env.get_frame(highlight=False, tile_size=8))
+
+    # Tiles drawn with different subdivisions are cached separately
+    tile = Grid.render_tile(None, agent_dir=0, tile_size=8, subdivs=subdivs)
+    assert not np.array_equal(tile, Grid.render_tile(None, agent_dir=0, tile_size=8))
+
+    env.close()
+
+
+@pytest.mark.parametrize("env_id", ["MiniGrid-DoorKey-8x8-v0", "BabyAI-GoToLocal-v0"])
+def test_incremental_frames(env_id):
+    """Test that frames updated from the previous one match full renders."""
+
+    env = gym.make(env_id).unwrapped
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+
+    frames = []
+    for _ in range(100):
+        for highlight, agent_pov in [(True, False), (False, False), (True, True)]:
+            frame = env.get_frame(highlight, tile_size=8, agent_pov=agent_pov)
+            frames.append(frame)
+
+            # Render the frame again from scratch
+            frames_kept = env._frames
+            env._frames = {}
+            expected = env.get_frame(highlight, tile_size=8, agent_pov=agent_pov)
+            env._frames = frames_kept
+            np.testing.assert_array_equal(frame, expected)
+
+        _, _, terminated, truncated, _ = env.step(rng.integers(0, 6))
+        if terminated or truncated:
+            env.reset()
+
+    # The frames returned earlier are not modified by the next renders
+    assert not any(np.shares_memory(frames[0], frame) for frame in frames[1:])
+
+    env.close()
+
+
+def test_tile_frame():
+    """Test that updating a frame with changed tiles matches gathering them."""
+
+    atlas = TileAtlas(tile_size=4)
+    frame = TileFrame(atlas)
+    rng = np.random.default_rng(0)
+
+    index = rng.choice(np.flatnonzero(DRAWABLE), (5, 3))
+    for _ in range(20):
+        changed = rng.random(index.shape) < 0.2
+        index = np.where(changed, rng.choice(np.flatnonzero(DRAWABLE)), index)
+        np.testing.assert_array_equal(frame.update(index), atlas.gather(index))
+
+    # Frames of a different size are redrawn entirely
+    index = index[:4]
+    np.testing.assert_array_equal(frame.update(index), atlas.gather(index))
+
+
+@pytest.mark.parametrize("highlight, agent_pov", [(True, False), (False, True)])
+def test_render_frames(highlight, agent_pov):
+    """Test that frames rendered into one array match rendering each env."""
+
+    envs = [gym.make("MiniGrid-DoorKey-6x6-v0") for _ in range(5)]
+    for i, env in enumerate(envs):
+        env.reset(seed=i)
+
+    expected = np.stack(
+        [env.unwrapped.get_frame(highlight, 8, agent_pov) for env in envs]
+    )
+    out = np.zeros_like(expected)
+    frames = render_frames(envs, 8, highlight, agent_pov, out=out)
+    assert frames is out
+    np.testing.assert_array_equal(frames, expected)
+
+    np.testing.assert_array_equal(
+        render_frames(envs, 8, highlight, agent_pov), expected
+    )
+    with pytest.raises(ValueError):
+        render_frames(envs, 8, highlight, agent_pov, out=out[1:])
+
+
+def test_render_batch():
+    """Test that rendering stacked grids matches rendering each grid."""
+
+    rng = np.random.default_rng(0)
+    codes = np.zeros((2, 3, 5, 4, 3), dtype=np.uint8)
+    codes[..., 0] = rng.integers(1, 10, codes.shape[:-1])
+    codes[..., 1] = rng.integers(0, 6, codes.shape[:-1])
+    codes[..., 2] = rng.integers(0, 3, codes.shape[:-1])
+    highlight_mask = rng.random(codes.shape[:-1]) < 0.5
+    agent_pos = rng.integers(-1, 5, (2, 3, 2))
+    agent_dir = rng.integers(0, 4, (2, 3))
+
+    atlas = TileAtlas.get(tile_size=4)
+    frames = atlas.render(codes, agent_pos, agent_dir, highlight_mask)
+    shared_pos_frames = atlas.render(codes, (1, 2), 0)
+    for i in range(2):
+        for j in range(3):
+            np.testing.assert_array_equal(
+                frames[i, j],
+                atlas.render(
+                    codes[i, j],
+                    tuple(agent_pos[i, j]),
+                    agent_dir[i, j],
+                    highlight_mask[i, j],
+                ),
+            )
+            np.testing.assert_array_equal(
+                shared_pos_frames[i, j], atlas.render(codes[i, j], (1, 2), 0)
+            )
+
+
+def test_tile_atlas_cache(tmp_path, monkeypatch):
+    """Test that saved atlases are loaded read-only and render the same."""
+
+    monkeypatch.setattr(TileAtlas, "atlases", TileCache(max_bytes=2**30))
+    monkeypatch.setattr(TileAtlas, "cache_dir", str(tmp_path))
+
+    env = gym.make("MiniGrid-DoorKey-8x8-v0").unwrapped
+    env.reset(seed=0)
+    expected = env.grid.render(8, env.agent_pos, env.agent_dir)
+    assert (tmp_path / f"tiles_v{TILE_ATLAS_VERSION}_8_3.npy").exists()
+
+    # A new process opens the saved atlas instead of drawing the tiles
+    monkeypatch.setattr(TileAtlas, "atlases", TileCache(max_bytes=2**30))
+    atlas = TileAtlas.get(8)
+    assert isinstance(atlas.tiles, np.memmap)
+    assert not atlas.tiles.flags.writeable
+    np.testing.assert_array_equal(
+        env.grid.render(8, env.agent_pos, env.agent_dir), expected
+    )
+
+    tiles = np.random.default_rng(0).choice(np.flatnonzero(DRAWABLE), 100)
+    fresh_atlas = TileAtlas(8)
+    fresh_atlas.draw(tiles)
+    np.testing.assert_array_equal(atlas.tiles[tiles], fresh_atlas.tiles[tiles])
+
+    # Tiles of the agent type are blank rather than drawn into the array
+    agent_tiles = np.flatnonzero(~DRAWABLE)
+    assert not atlas.gather(agent_tiles.reshape(1, -1)).any()
+
+    np.save(tmp_path / "invalid.npy", np.zeros((2, 8, 8, 3), np.uint8))
+    with pytest.raises(ValueError):
+        TileAtlas.load(str(tmp_path / "invalid.npy"))
+
+
+def test_tile_atlas_cache_version(tmp_path, monkeypatch):
+    """Test that atlases saved by previous versions of the tiles are not reused."""
+
+    monkeypatch.setattr(TileAtlas, "atlases", TileCache(max_bytes=2**30))
+    monkeypatch.setattr(TileAtlas, "cache_dir", str(tmp_path))
+
+    # Atlases of the same shape with stale pixels, under the names of the
+    # first version and of the previous one
+    stale_tiles = np.full((len(DRAWABLE), 8, 8, 3), 255, dtype=np.uint8)
+    np.save(tmp_path / "tiles_8_3.npy", stale_tiles)
+    np.save(tmp_path / f"tiles_v{TILE_ATLAS_VERSION - 1}_8_3.npy", stale_tiles)
+
+    grid = Grid(5, 4)
+    grid.wall_rect(0, 0, 5, 4)
+    frame = grid.render(8, (1, 2), 0)
+    assert (tmp_path / f"tiles_v{TILE_ATLAS_VERSION}_8_3.npy").exists()
+    np.testing.assert_array_equal(
+        frame, TileAtlas(8).render(grid.codes, agent_pos=(1, 2), agent_dir=0)
+    )
+
+
+def test_tile_cache(monkeypatch):
+    """Test that the tile cache stays within its budget and counts lookups."""
+
+    tile_bytes = draw_tile(None, tile_size=8).nbytes
+    monkeypatch.setattr(Grid, "tile_cache", TileCache(max_bytes=10 * tile_bytes))
+
+    keys = [(d, h) for d in range(4) for h in (False, True)]
+    tiles = [Grid.render_tile(None, d, h, tile_size=8) for d, h in keys]
+    info = Grid.tile_cache.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (0, 8, 0)
+    assert info.nbytes == 8 * tile_bytes
+
+    # Drawing more tiles evicts the least recently used ones
+    assert Grid.render_tile(None, 0, False, tile_size=8) is tiles[0]
+    for tile_size in (9, 10):
+        Grid.render_tile(None, tile_size=tile_size)
+    info = Grid.tile_cache.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (1, 10, 1)
+    assert info.nbytes <= info.max_bytes
+    assert (0, False, 8, 3) in Grid.tile_cache
+    assert (0, True, 8, 3) not in Grid.tile_cache
+
+    Grid.tile_cache.clear()
+    assert Grid.tile_cache.cache_info() == (0, 0, 0, 0, 0, 10 * tile_bytes)
+
+
+def test_tile_cache_threads():
+    """Test that concurrent updates keep the cache consistent."""
+
+    cache = TileCache(max_bytes=100)
+
+    def update(i):
+        for j in range(1000):
+            key = (i * j) % 37
+            if cache.get(key) is None:
+                cache[key] = np.zeros(10, dtype=np.uint8)
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(update, range(8)))
+
+    info = cache.cache_info()
+    assert info.hits + info.misses == 8000
+    assert info.nbytes == 10 * len(cache) <= 100
+
+
+def test_tile_atlas_warm():
+    """Test that warming an atlas draws all its tiles."""
+
+    atlas = TileAtlas(tile_size=4, subdivs=1)
+    atlas.warm()
+    np.testing.assert_array_equal(atlas.drawn, DRAWABLE)
+
+
+@pytest.mark.parametrize("frame_shape", [(56, 56, 3), (65, 91, 3)])
+def test_render_mission(frame_shape):
+    """Test drawing missions below frames without a display."""
+
+    (height, width), (top, left) = frame_layout(frame_shape)
+    assert height % 2 == 0 and width % 2 == 0
+    assert top + frame_shape[0] < height and left + frame_shape[1] <= width
+
+    strip = render_mission("get the red key", width, height - frame_shape[0])
+    assert strip.shape == (height - frame_shape[0], width, 3)
+    assert (strip < 128).any() and (strip == 255).any()
+
+    # Long missions are clipped
+    long_strip = render_mission("go to the red key " * 10, width, 10)
+    assert long_strip.shape == (10, width, 3)
+
+
+def test_human_render(monkeypatch):
+    """Test that the human render mode reuses its font and surfaces."""
+
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    sys_font = pygame.freetype.SysFont
+    fonts = []
+
+    def counting_sys_font(*args, **kwargs):
+        fonts.append(sys_font(*args, **kwargs))
+        return fonts[-1]
+
+    monkeypatch.setattr(pygame.freetype, "SysFont", counting_sys_font)
+
+    env = gym.make("BabyAI-GoToLocal-v0", render_mode="human", render_fps=0)
+    env.reset(seed=0)
+    for i in range(10):
+        env.step(i % 3)
+        env.render()
+    assert len(fonts) == 1
+    window = pygame.surfarray.array3d(env.unwrapped.window)
+    env.close()
+
+    # The window matches the one of a first render
+    env.reset(seed=0)
+    for i in range(10):
+        env.step(i % 3)
+    env.render()
+    np.testing.assert_array_equal(
+        pygame.surfarray.array3d(env.unwrapped.window), window
+    )
+    env.close()
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import subprocess
+import sys
+
 import gymnasium as gym
 import numpy as np
 from pytest_mock import MockerFixture
 
-from minigrid.benchmark import benchmark
+from minigrid.benchmark import benchmark, benchmark_import
 from minigrid.manual_control import ManualControl
 from minigrid.minigrid_env import MiniGridEnv
 
@@ -15,6 +18,30 @@ def test_benchmark():
     benchmark(env_id, num_resets=10, num_frames=100)
 
 
+def test_benchmark_import():
+    "Test that the import benchmark works"
+    benchmark_import(num_runs=1)
+
+
+def test_lazy_imports():
+    "Test that pygame and the environments are only imported when needed"
+    code = (
+        "import sys, gymnasium\n"
+        "def loaded(prefixes):\n"
+        "    return sorted(m for m in sys.modules if m.startswith(prefixes))\n"
+        "import minigrid\n"
+        "print(loaded(('pygame', 'minigrid.envs', 'minigrid.minigrid_env')))\n"
+        "env = gymnasium.make('MiniGrid-Empty-5x5-v0')\n"
+        "env.reset()\n"
+        "env.step(0)\n"
+        "print(loaded(('pygame', 'minigrid.envs')))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    assert output == ["[]", "['minigrid.envs', 'minigrid.envs.empty']"]
+
+
 def test_manual_control(mocker: MockerFixture):
     class FakeRandomKeyboardEvent:
         active_actions = ["left", "right", "up", " ", "pageup", "pagedown"]
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from collections import deque
+
+import gymnasium as gym
+import numpy as np
+import pytest
+from gymnasium.vector import SyncVectorEnv
+
+from minigrid.core.grid import Grid
+from minigrid.vector import SubprocVecMiniGridEnv, VecMiniGridEnv
+from tests.utils import assert_equals
+
+NUM_ENVS = 8
+NUM_STEPS = 200
+
+VECTORIZED_ENV_IDS = [
+    "MiniGrid-Empty-5x5-v0",
+    "MiniGrid-Empty-Random-6x6-v0",
+    "MiniGrid-FourRooms-v0",
+    "MiniGrid-DoorKey-8x8-v0",
+    "MiniGrid-LavaCrossingS9N1-v0",
+    "MiniGrid-SimpleCrossingS9N2-v0",
+    "MiniGrid-LavaGapS7-v0",
+]
+
+
+def assert_vector_results_equal(results, expected):
+    obs, rewards, terminated, truncated, infos = results
+    (
+        expected_obs,
+        expected_rewards,
+        expected_terminated,
+        expected_truncated,
+        expected_infos,
+    ) = expected
+
+    np.testing.assert_array_equal(obs["image"], expected_obs["image"])
+    np.testing.assert_array_equal(obs["direction"], expected_obs["direction"])
+    assert obs["mission"] == expected_obs["mission"]
+    np.testing.assert_array_equal(rewards, expected_rewards)
+    np.testing.assert_array_equal(terminated, expected_terminated)
+    np.testing.assert_array_equal(truncated, expected_truncated)
+
+    assert infos.keys() == expected_infos.keys()
+    if "final_observation" in expected_infos:
+        np.testing.assert_array_equal(
+            infos["_final_observation"], expected_infos["_final_observation"]
+        )
+        for i in np.flatnonzero(expected_infos["_final_observation"]):
+            final_obs = infos["final_observation"][i]
+            expected_final_obs = expected_infos["final_observation"][i]
+            np.testing.assert_array_equal(
+                final_obs["image"], expected_final_obs["image"]
+            )
+            assert final_obs["direction"] == expected_final_obs["direction"]
+            assert final_obs["mission"] == expected_final_obs["mission"]
+
+
+@pytest.mark.parametrize("env_id", VECTORIZED_ENV_IDS)
+def test_vec_minigrid_env(env_id):
+    """Test that batched steps match stepping each environment."""
+
+    env_fns = [lambda: gym.make(env_id, max_steps=50)] * NUM_ENVS
+    envs = VecMiniGridEnv(env_fns)
+    expected_envs = SyncVectorEnv(env_fns)
+
+    obs, _ = envs.reset(seed=0)
+    expected_obs, _ = expected_envs.reset(seed=0)
+    assert_equals(obs["image"], expected_obs["image"])
+
+    rng = np.random.default_rng(0)
+    for _ in range(NUM_STEPS):
+        actions = rng.integers(0, envs.single_action_space.n, NUM_ENVS)
+        assert_vector_results_equal(envs.step(actions), expected_envs.step(actions))
+
+    envs.close()
+    expected_envs.close()
+
+
+@pytest.mark.parametrize(
+    "env_id", ["MiniGrid-Dynamic-Obstacles-5x5-v0", "MiniGrid-KeyCorridorS3R1-v0"]
+)
+def test_vec_minigrid_env_unsupported(env_id):
+    """Test that environments with custom dynamics are rejected."""
+
+    with pytest.raises(ValueError):
+        VecMiniGridEnv([lambda: gym.make(env_id)] * 2)
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    ["BabyAI-GoToLocal-v0", "BabyAI-Pickup-v0", "MiniGrid-ObstructedMaze-1Dl-v0"],
+)
+@pytest.mark.parametrize("copy", [False, True])
+def test_subproc_vec_minigrid_env(env_id, copy):
+    """Test that environments stepped in workers match stepping them here."""
+
+    env_fns = [lambda: gym.make(env_id, max_steps=30)] * NUM_ENVS
+    envs = SubprocVecMiniGridEnv(env_fns, num_workers=3, num_buffers=3, copy=copy)
+    expected_envs = SyncVectorEnv(env_fns)
+
+    obs, _ = envs.reset(seed=0)
+    expected_obs, _ = expected_envs.reset(seed=0)
+    assert_equals(obs["image"], expected_obs["image"])
+    assert obs["mission"] == expected_obs["mission"]
+
+    rng = np.random.default_rng(0)
+    # Observations stay valid for num_buffers - 1 steps, even without copies
+    recent_images = deque(maxlen=envs.num_buffers)
+    for _ in range(NUM_STEPS // 2):
+        actions = rng.integers(0, envs.single_action_space.n, NUM_ENVS)
+        results = envs.step(actions)
+        expected = expected_envs.step(actions)
+        assert_vector_results_equal(results, expected)
+
+        recent_images.append((results[0]["image"], expected[0]["image"].copy()))
+        for image, expected_image in recent_images:
+            np.testing.assert_array_equal(image, expected_image)
+
+    envs.close()
+    expected_envs.close()
+
+
+@pytest.mark.parametrize("view_size", [3, 7, 11])
+def test_compute_vis_batch(view_size):
+    """Test batched visibility against the visibility of each view."""
+
+    rng = np.random.default_rng(view_size)
+    opaque = rng.random((64, view_size, view_size)) < 0.3
+    agent_pos = (view_size // 2, view_size - 1)
+
+    vis_mask = Grid.compute_vis_batch(opaque, agent_pos)
+    for i in range(len(opaque)):
+        np.testing.assert_array_equal(
+            vis_mask[i], Grid.compute_vis(opaque[i], agent_pos)
+        )
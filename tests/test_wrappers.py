@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 import math
+import subprocess
 
 import gymnasium as gym
 import numpy as np
 import pytest
+from gymnasium.error import DependencyNotInstalled
 
 from minigrid.core.actions import Actions
 from minigrid.core.constants import OBJECT_TO_IDX
 from minigrid.envs import EmptyEnv
+from minigrid.minigrid_env import EXTRA_STATE_MAGIC, STATE_MAGIC
+from minigrid.utils.episode_log import EpisodeLog, EpisodeReplay
+from minigrid.utils.trajectories import ShardReader, ShardWriter
+from minigrid.utils.video import VideoRecorder, find_ffmpeg, frame_layout
 from minigrid.wrappers import (
     ActionBonus,
     DictObservationSpaceWrapper,
@@ -18,6 +24,9 @@ from minigrid.wrappers import (
     ImgObsWrapper,
     OneHotPartialObsWrapper,
     PositionBonus,
+    RecordEpisodeWrapper,
+    RecordTrajectoryWrapper,
+    RecordVideoWrapper,
     ReseedWrapper,
     RGBImgObsWrapper,
     RGBImgPartialObsWrapper,
@@ -338,3 +347,270 @@ def test_dict_observation_space_doesnt_clash_with_one_hot():
     assert obs["image"].shape == (7, 7, 20)
     assert env.observation_space["image"].shape == (7, 7, 20)
     env.close()
+
+
+@pytest.mark.parametrize(
+    "wrapper",
+    [
+        OneHotPartialObsWrapper,
+        RGBImgObsWrapper,
+        RGBImgPartialObsWrapper,
+        FlatObsWrapper,
+    ],
+)
+def test_wrappers_without_copy(wrapper):
+    """Test that observations written into reused buffers match new ones."""
+
+    def get_image(obs):
+        return obs if isinstance(obs, np.ndarray) else obs["image"]
+
+    env = wrapper(gym.make("MiniGrid-DoorKey-6x6-v0"))
+    buffered_env = wrapper(
+        gym.make("MiniGrid-DoorKey-6x6-v0", copy_obs=False), copy=False
+    )
+
+    obs, _ = env.reset(seed=0)
+    buffered_obs, _ = buffered_env.reset(seed=0)
+    buffer = get_image(buffered_obs)
+    assert_equals(get_image(obs), buffer)
+
+    rng = np.random.default_rng(0)
+    for _ in range(NUM_STEPS):
+        action = rng.integers(0, 6)
+        obs, _, terminated, truncated, _ = env.step(action)
+        buffered_obs, _, _, _, _ = buffered_env.step(action)
+        assert get_image(buffered_obs) is buffer
+        assert_equals(get_image(obs), buffer)
+
+        if terminated or truncated:
+            obs, _ = env.reset()
+            buffered_obs, _ = buffered_env.reset()
+            assert get_image(buffered_obs) is buffer
+            assert_equals(get_image(obs), buffer)
+
+    env.close()
+    buffered_env.close()
+
+
+def ffmpeg_or_skip():
+    try:
+        return find_ffmpeg()
+    except DependencyNotInstalled:
+        pytest.skip("ffmpeg is not installed")
+
+
+def read_video(ffmpeg, path, shape):
+    """Decode a video file into an array of RGB frames."""
+
+    frames = subprocess.run(
+        [ffmpeg, "-loglevel", "error", "-i", path, "-f", "rawvideo"]
+        + ["-pix_fmt", "rgb24", "-"],
+        capture_output=True,
+        check=True,
+    ).stdout
+    return np.frombuffer(frames, dtype=np.uint8).reshape((-1,) + shape + (3,))
+
+
+def test_record_video_wrapper(tmp_path):
+    """Test that the recorded episodes contain the rendered frames."""
+
+    ffmpeg = ffmpeg_or_skip()
+    env = gym.make("MiniGrid-DoorKey-5x5-v0", max_steps=10)
+    env = RecordVideoWrapper(
+        env, str(tmp_path), episode_trigger=lambda i: i % 2 == 0, tile_size=16
+    )
+
+    expected_frames = []
+    for episode in range(3):
+        env.reset(seed=episode)
+        frames = [env.unwrapped.get_frame(tile_size=16)]
+        for _ in range(10):
+            env.step(2)
+            frames.append(env.unwrapped.get_frame(tile_size=16))
+        expected_frames.append(frames)
+    env.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "episode-0.mp4",
+        "episode-2.mp4",
+    ]
+    shape, (top, left) = frame_layout(expected_frames[0][0].shape)
+    for episode in (0, 2):
+        video = read_video(ffmpeg, str(tmp_path / f"episode-{episode}.mp4"), shape)
+        bottom, right = top + 80, left + 80
+        frames = video[:, top:bottom, left:right]
+        assert len(frames) == len(expected_frames[episode])
+
+        # Frames are compressed with losses
+        error = np.abs(frames.astype(int) - expected_frames[episode])
+        assert error.mean() < 8
+
+        # The mission is written below the frames
+        assert (video[:, bottom:] < 128).any(axis=(1, 2, 3)).all()
+
+
+def test_video_recorder_error(tmp_path):
+    """Test that encoding errors are raised instead of being ignored."""
+
+    ffmpeg_or_skip()
+    recorder = VideoRecorder()
+    recorder.start(str(tmp_path / "missing" / "video.mp4"), (16, 16, 3))
+    for _ in range(3):
+        recorder.write(np.zeros((16, 16, 3), dtype=np.uint8), "mission")
+    with pytest.raises(RuntimeError):
+        recorder.close()
+
+    # The recorder can be used again after an error
+    recorder.start(str(tmp_path / "video.mp4"), (16, 16, 3))
+    recorder.write(np.zeros((16, 16, 3), dtype=np.uint8))
+    recorder.close()
+    assert (tmp_path / "video.mp4").exists()
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    [
+        "MiniGrid-Dynamic-Obstacles-6x6-v0",
+        "MiniGrid-KeyCorridorS3R3-v0",
+        "BabyAI-GoToLocal-v0",
+    ],
+)
+@pytest.mark.parametrize("seed,checkpoint_interval", [(1, None), (1, 4), (None, 4)])
+def test_record_episode_wrapper(env_id, seed, checkpoint_interval, tmp_path):
+    """Test that logged episodes replay the same observations in any order."""
+
+    env = gym.make(env_id, max_steps=20)
+    env = RecordEpisodeWrapper(
+        env,
+        str(tmp_path),
+        episode_trigger=lambda i: i == 1,
+        checkpoint_interval=checkpoint_interval,
+    )
+    env.action_space.seed(SEEDS[0])
+
+    env.reset(seed=seed)
+    obs, _ = env.reset(seed=seed)
+    expected_obs, expected_frames = [obs], [env.unwrapped.get_frame()]
+    for _ in range(20):
+        obs, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        expected_obs.append(obs)
+        expected_frames.append(env.unwrapped.get_frame())
+        if terminated or truncated:
+            break
+    env.reset(seed=seed)
+    env.close()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["episode-1.npz"]
+    log = EpisodeLog.load(tmp_path / "episode-1.npz")
+    assert log.env_id == env_id and log.seed == seed
+    assert len(log) == len(expected_obs) - 1
+    if seed is None:
+        assert 0 in log.checkpoints
+    for state, extra_state in log.checkpoints.values():
+        assert state.startswith(STATE_MAGIC)
+        assert extra_state.startswith(EXTRA_STATE_MAGIC)
+
+    replay = EpisodeReplay(log)
+    steps = np.random.default_rng(SEEDS[0]).permutation(len(replay))
+    for step in steps.tolist() + steps.tolist()[::-1]:
+        assert_equals(replay.observation(step), expected_obs[step])
+        np.testing.assert_array_equal(replay.frame(step), expected_frames[step])
+
+    with pytest.raises(IndexError):
+        replay.seek(len(replay))
+
+
+@pytest.mark.parametrize("env_id", ["MiniGrid-DoorKey-5x5-v0", "BabyAI-GoToLocal-v0"])
+@pytest.mark.parametrize("copy_obs", [True, False])
+def test_record_trajectory_wrapper(env_id, copy_obs, tmp_path):
+    """Test that the shards hold the rows of all the recorded episodes."""
+
+    env = gym.make(env_id, max_steps=8, copy_obs=copy_obs)
+    env = RecordTrajectoryWrapper(env, str(tmp_path), 7)
+    env.action_space.seed(SEEDS[0])
+
+    rows = []
+    for episode, seed in enumerate(SEEDS):
+        # Keep the images of the observations, which are overwritten by the
+        # next step without copy_obs
+        obs, _ = env.reset(seed=seed)
+        obs = dict(obs, image=obs["image"].copy())
+        for _ in range(10):
+            action = env.action_space.sample()
+            next_obs, reward, terminated, truncated, _ = env.step(action)
+            rows.append((obs, action, reward, terminated, truncated, episode))
+            obs = dict(next_obs, image=next_obs["image"].copy())
+            if terminated or truncated:
+                break
+        rows.append((obs, -1, 0, False, False, episode))
+    env.close()
+
+    with pytest.raises(FileExistsError):
+        ShardWriter(str(tmp_path), (7, 7, 3))
+
+    reader = ShardReader(str(tmp_path))
+    assert len(reader) == len(rows)
+    assert len(reader.shards) == math.ceil(len(rows) / 7)
+    assert sorted(set(reader.missions)) == sorted({row[0]["mission"] for row in rows})
+    for shard in reader.shards:
+        assert not shard["image"].flags.writeable
+
+    batches = list(reader.iter_batches(5))
+    assert [len(batch["action"]) for batch in batches[:-1]] == [5] * (len(batches) - 1)
+    batch = {
+        name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]
+    }
+    for k, (obs, action, reward, terminated, truncated, episode) in enumerate(rows):
+        np.testing.assert_array_equal(batch["image"][k], obs["image"])
+        assert batch["direction"][k] == obs["direction"]
+        assert reader.missions[batch["mission"][k]] == obs["mission"]
+        assert batch["action"][k] == action
+        assert batch["reward"][k] == np.float32(reward)
+        assert batch["terminated"][k] == terminated
+        assert batch["truncated"][k] == truncated
+        assert batch["episode"][k] == episode
+
+    batches = list(reader.iter_batches(5, columns=["action"], drop_last=True))
+    assert len(batches) == len(rows) // 5
+    assert list(batches[0]) == ["action"]
+
+
+def test_shard_writer_error(tmp_path):
+    """Test that errors of the writing thread are raised."""
+
+    folder = tmp_path / "shards"
+    writer = ShardWriter(str(folder), (2, 2, 3), shard_size=1)
+    folder.rmdir()
+    writer.add(np.zeros((2, 2, 3)), 0, "mission", 0, 0, False, False, 0)
+    with pytest.raises(RuntimeError, match="writing trajectory shards failed"):
+        writer.close()
+
+
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_record_episode_wrapper_envs(env_spec, tmp_path):
+    """Test that episodes of all environments can be saved and replayed."""
+
+    env = RecordEpisodeWrapper(env_spec.make(), str(tmp_path))
+    env.action_space.seed(SEEDS[0])
+    env.reset(seed=SEEDS[0])
+    for _ in range(5):
+        obs, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        if terminated or truncated:
+            break
+    env.close()
+
+    log = EpisodeLog.load(tmp_path / "episode-0.npz")
+    assert log.env_kwargs == {
+        name: value for name, value in env_spec.kwargs.items() if name != "render_mode"
+    }
+    assert_equals(EpisodeReplay(log).observation(len(log)), obs)
+
+
+def test_record_episode_wrapper_kwargs(tmp_path):
+    """Test that arguments which cannot be saved are rejected early."""
+
+    env = gym.make("MiniGrid-Empty-5x5-v0", agent_start_pos=np.array([1, 1]))
+    with pytest.raises(TypeError, match="agent_start_pos"):
+        RecordEpisodeWrapper(env, str(tmp_path))